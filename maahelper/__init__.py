@@ -46,7 +46,7 @@ from .core.llm_client import (
 # Configuration and utilities
 from .config.config_manager import config_manager
 from .utils.input_validator import input_validator
-from .utils.memory_manager import memory_manager
+from .utils.memory_manager import memory_manager, get_memory_manager
 from .utils.rate_limiter import global_rate_limiter
 from .utils.logging_system import get_logger
 
@@ -107,6 +107,7 @@ __all__ = [
     # Utilities
     "input_validator",
     "memory_manager",
+    "get_memory_manager",
     "global_rate_limiter",
     "get_logger",
 
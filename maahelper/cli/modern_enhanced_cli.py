@@ -6,6 +6,7 @@ Streamlined implementation using OpenAI client and Rich UI
 import asyncio
 import json
 import os
+import shlex
 import sys
 import time
 from pathlib import Path
@@ -27,6 +28,7 @@ from rich.columns import Columns
 # Internal imports
 from ..core.llm_client import UnifiedLLMClient, create_llm_client, get_all_providers, get_provider_models, get_provider_models_dynamic
 from ..utils.streaming import ModernStreamingHandler, ConversationManager
+from ..utils.memory_manager import get_memory_manager
 from ..managers.streamlined_api_key_manager import api_key_manager
 from ..utils.streamlined_file_handler import file_handler
 from ..workflows.commands import WorkflowCommands
@@ -37,9 +39,12 @@ console = Console()
 class ModernEnhancedCLI:
     """Modern Enhanced CLI with OpenAI client integration"""
     
-    def __init__(self, session_id: str = "default", workspace_path: str = "."):
+    def __init__(self, session_id: str = "default", workspace_path: str = ".",
+                 workflow_workers: Optional[int] = None):
         self.session_id = f"modern_cli_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         self.workspace_path = Path(workspace_path).resolve()
+        # Worker processes for CPU-bound workflow steps (None: from config)
+        self.workflow_workers = workflow_workers
         
         # Initialize components
         self.llm_client: Optional[UnifiedLLMClient] = None
@@ -309,7 +314,9 @@ Your intelligent coding assistant is ready. Awaiting command.
                 
                 task3 = progress.add_task("[green]Initializing conversation...", total=100)
                 await asyncio.sleep(0.3)
-                self.conversation_manager = ConversationManager(self.llm_client, self.session_id)
+                self.conversation_manager = ConversationManager(
+                    self.llm_client, self.session_id, get_memory_manager()
+                )
                 progress.update(task3, advance=50)
                 
                 self.current_provider = selected_provider
@@ -318,7 +325,9 @@ Your intelligent coding assistant is ready. Awaiting command.
                 # Initialize workflow and IDE commands
                 task4 = progress.add_task("[green]Initializing workflows...", total=100)
                 await asyncio.sleep(0.2)
-                self.workflow_commands = WorkflowCommands(self.llm_client, str(self.workspace_path))
+                self.workflow_commands = WorkflowCommands(
+                    self.llm_client, str(self.workspace_path), self.workflow_workers
+                )
                 progress.update(task4, advance=50)
 
                 task5 = progress.add_task("[green]Initializing IDE integration...", total=100)
@@ -396,7 +405,7 @@ Your intelligent coding assistant is ready. Awaiting command.
 ### 📊 Real-time Code Analysis
 - `analyze-start` - Start watching files for real-time feedback
 - `analyze-stop` - Stop real-time analysis
-- `analyze-workspace` - Analyze entire workspace for issues
+- `analyze-workspace [--changed-since REF] [--format ndjson|sarif --output FILE]` - Analyze entire workspace for issues
 
 ### 🔧 Git Integration
 - `git-commit` - AI-generated smart commit messages
@@ -418,7 +427,7 @@ Your intelligent coding assistant is ready. Awaiting command.
 - `workflow-templates` - List available workflow templates
 - `workflow-create <template>` - Create workflow from template
 - `workflow-list` - List all workflows
-- `workflow-execute <id>` - Execute a workflow
+- `workflow-execute <id> [--force [step,...]]` - Execute a workflow (--force re-runs cached steps)
 - `workflow-status <id>` - Get workflow status
 - `workflow-stats` - Get workflow statistics
 
@@ -602,27 +611,45 @@ Your intelligent coding assistant is ready. Awaiting command.
                 console.print(f"[red]Error stopping analysis: {e}[/red]")
             return False, True
 
-        elif command == 'analyze-workspace':
-            # Analyze entire workspace
-            with console.status("[bold green]Analyzing workspace...", spinner="dots"):
+        elif command == 'analyze-workspace' or command.startswith('analyze-workspace '):
+            # Analyze entire workspace (analyze_workspace shows its own progress bar)
+            try:
+                from ..features.realtime_analysis import realtime_analyzer
+                from ..features.analysis_export import build_parser
                 try:
-                    from ..features.realtime_analysis import realtime_analyzer
-                    results = await realtime_analyzer.analyze_workspace()
+                    # Options keep their case: git refs and output paths are case-sensitive
+                    args = build_parser("analyze-workspace").parse_args(shlex.split(user_input.strip())[1:])
+                except SystemExit:
+                    return False, True
+                if args.workspace != ".":
+                    console.print("[yellow]⚠️ analyze-workspace always analyzes the current workspace[/yellow]")
+
+                if args.format:
+                    if args.output == "-":
+                        console.print("[red]❌ --format needs --output FILE in interactive mode[/red]")
+                        return False, True
+                    with open(args.output, "w", encoding="utf-8") as stream:
+                        summary = await realtime_analyzer.export_workspace(
+                            stream, args.format, args.changed_since, args.workers
+                        )
+                    console.print(f"[green]📄 {args.format.upper()} results written to {args.output}[/green]")
+                else:
+                    await realtime_analyzer.analyze_workspace(args.workers, changed_since=args.changed_since)
                     summary = realtime_analyzer.get_summary()
-                    console.print(f"[green]✨ Workspace Analysis Complete![/green]")
-                    console.print(f"Files analyzed: {summary.get('files_analyzed', 0)}")
-                    console.print(f"Issues found: {summary.get('total_issues', 0)}")
-                    console.print(f"Errors: {summary.get('errors', 0)}")
-                    console.print(f"Warnings: {summary.get('warnings', 0)}")
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    if "tool choice" in error_msg or "function" in error_msg:
-                        console.print(f"[yellow]⚠️ Tool calling issue detected during analysis.[/yellow]")
-                        console.print(f"[yellow]   This has been automatically handled. Analysis may continue.[/yellow]")
-                        console.print(f"[dim]   Technical details: {e}[/dim]")
-                    else:
-                        console.print(f"[red]Error analyzing workspace: {e}[/red]")
-                        console.print(f"[dim]If this is a tool-related error, it should be automatically handled.[/dim]")
+                console.print(f"[green]✨ Workspace Analysis Complete![/green]")
+                console.print(f"Files analyzed: {summary.get('files_analyzed', 0)}")
+                console.print(f"Issues found: {summary.get('total_issues', 0)}")
+                console.print(f"Errors: {summary.get('errors', 0)}")
+                console.print(f"Warnings: {summary.get('warnings', 0)}")
+            except Exception as e:
+                error_msg = str(e).lower()
+                if "tool choice" in error_msg or "function" in error_msg:
+                    console.print(f"[yellow]⚠️ Tool calling issue detected during analysis.[/yellow]")
+                    console.print(f"[yellow]   This has been automatically handled. Analysis may continue.[/yellow]")
+                    console.print(f"[dim]   Technical details: {e}[/dim]")
+                else:
+                    console.print(f"[red]Error analyzing workspace: {e}[/red]")
+                    console.print(f"[dim]If this is a tool-related error, it should be automatically handled.[/dim]")
             return False, True
 
         elif command == 'git-commit':
@@ -826,10 +853,15 @@ Your intelligent coding assistant is ready. Awaiting command.
             return False, True
 
         elif command.startswith('workflow-execute '):
-            # Execute workflow
-            workflow_id = command[17:].strip()
+            # Execute workflow: workflow-execute <id> [--force [step_id,...]]
+            args = user_input.split()[1:]
+            workflow_id = args[0] if args else ''
+            force = False
+            if '--force' in args:
+                steps = args[args.index('--force') + 1:]
+                force = [step_id for part in steps for step_id in part.split(',') if step_id] or True
             if self.workflow_commands:
-                result = await self.workflow_commands.execute_workflow(workflow_id)
+                result = await self.workflow_commands.execute_workflow(workflow_id, force=force)
                 console.print(result)
             else:
                 console.print("[red]❌ Workflow system not initialized[/red]")
@@ -1008,11 +1040,15 @@ Your intelligent coding assistant is ready. Awaiting command.
             console.print("\n👋 [bold blue]Session cancelled. Goodbye![/bold blue]")
         except Exception as e:
             console.print(f"[red]❌ Fatal error: {e}[/red]")
+        finally:
+            if self.workflow_commands:
+                self.workflow_commands.close()
 
 
-def create_cli(session_id: str = "default", workspace_path: str = ".") -> ModernEnhancedCLI:
+def create_cli(session_id: str = "default", workspace_path: str = ".",
+               workflow_workers: Optional[int] = None) -> ModernEnhancedCLI:
     """Factory function to create CLI instance"""
-    return ModernEnhancedCLI(session_id, workspace_path)
+    return ModernEnhancedCLI(session_id, workspace_path, workflow_workers)
 
 
 def show_rich_help():
@@ -1035,6 +1071,7 @@ def show_rich_help():
   [cyan]-h, --help[/cyan]              Show this help message
   [cyan]-s, --session SESSION[/cyan]   Session ID for conversation history
   [cyan]-w, --workspace WORKSPACE[/cyan] Workspace directory path  
+  [cyan]--workflow-workers N[/cyan]    Worker processes for CPU-bound workflow steps
   [cyan]-v, --version[/cyan]           Show version information
 
 [bold green]✨ FEATURES:[/bold green]
@@ -1094,6 +1131,7 @@ async def async_main():
     args = sys.argv[1:] if len(sys.argv) > 1 else []
     session_id = "default"
     workspace = "."
+    workflow_workers = None
 
     i = 0
     while i < len(args):
@@ -1123,6 +1161,14 @@ async def async_main():
                 console.print("[red]❌ Error: --workspace requires a value[/red]")
                 return
                 
+        elif arg == '--workflow-workers':
+            if i + 1 < len(args) and args[i + 1].isdigit():
+                workflow_workers = int(args[i + 1])
+                i += 1
+            else:
+                console.print("[red]❌ Error: --workflow-workers requires a number[/red]")
+                return
+                
         else:
             console.print(f"[red]❌ Unknown argument: {arg}[/red]")
             console.print("[yellow]💡 Use --help for usage information[/yellow]")
@@ -1144,7 +1190,7 @@ async def async_main():
         border_style="blue"
     ))
 
-    cli = create_cli(session_id, workspace)
+    cli = create_cli(session_id, workspace, workflow_workers)
     await cli.start()
 
 def main():
@@ -60,6 +60,7 @@ def show_help():
   [cyan]optimize-performance[/cyan]    🆕 Performance optimization analysis
   [cyan]file-search <path>[/cyan]      Analyze any file with AI
   [cyan]analyze-workspace[/cyan]       Analyze entire workspace for issues
+                          (--changed-since REF, --format ndjson|sarif --output FILE)
   [cyan]discover-models[/cyan]         Auto-discover latest AI models
   [cyan]git-commit[/cyan]              AI-powered smart commit messages
   [cyan]files[/cyan]                   Show workspace files
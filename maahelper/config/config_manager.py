@@ -56,6 +56,7 @@ class PerformanceConfig:
     retry_delay: float = 1.0
     cache_responses: bool = True
     cache_ttl: int = 300
+    workflow_worker_processes: int = 0
 
 
 @dataclass
@@ -67,10 +68,22 @@ class FileHandlerConfig:
     ])
     max_depth: int = 3
     exclude_patterns: List[str] = field(default_factory=lambda: [
-        '__pycache__', '.git', '.vscode', 'node_modules', '.pytest_cache'
+        '__pycache__', '.git', '.vscode', 'node_modules', '.pytest_cache',
+        '.mypy_cache', '.tox', '.venv', 'venv'
     ])
 
 
+DEFAULT_MEMORY_BACKEND = "json"
+
+
+@dataclass
+class MemoryStorageConfig:
+    """Conversation memory storage configuration (off by default: memory stays in-process)"""
+    persist_to_disk: bool = False
+    storage_backend: str = DEFAULT_MEMORY_BACKEND  # "json" (single process) or "sqlite" (shared by CLI and LSP)
+    storage_path: str = ""  # Defaults to <config_dir>/memory
+
+
 @dataclass
 class AppConfig:
     """Main application configuration"""
@@ -86,6 +99,7 @@ class AppConfig:
     security: SecurityConfig = field(default_factory=SecurityConfig)
     performance: PerformanceConfig = field(default_factory=PerformanceConfig)
     file_handler: FileHandlerConfig = field(default_factory=FileHandlerConfig)
+    memory: MemoryStorageConfig = field(default_factory=MemoryStorageConfig)
     
     # Paths
     config_dir: str = ""
@@ -221,6 +235,9 @@ class ConfigManager:
         if 'file_handler' in config_data:
             self._update_dataclass(self.config.file_handler, config_data['file_handler'])
         
+        if 'memory' in config_data:
+            self._update_dataclass(self.config.memory, config_data['memory'])
+        
         # Update provider configurations
         if 'llm_providers' in config_data:
             for provider_name, provider_data in config_data['llm_providers'].items():
@@ -246,6 +263,16 @@ class ConfigManager:
         # Workspace path
         if os.getenv('MAAHELPER_WORKSPACE'):
             self.config.workspace_path = os.getenv('MAAHELPER_WORKSPACE')
+        
+        # Conversation memory backend
+        if os.getenv('MAAHELPER_MEMORY_BACKEND'):
+            self.config.memory.storage_backend = os.getenv('MAAHELPER_MEMORY_BACKEND').lower()
+    
+    def get_memory_storage_path(self) -> Path:
+        """Directory holding the conversation memory store"""
+        if self.config.memory.storage_path:
+            return Path(self.config.memory.storage_path).expanduser()
+        return self.config_dir / "memory"
     
     def get_provider_config(self, provider_name: str) -> Optional[LLMProviderConfig]:
         """Get configuration for a specific provider"""
@@ -267,6 +294,12 @@ class ConfigManager:
             if not provider_config.models:
                 issues.append(f"Provider {provider_name} has no models configured")
         
+        if self.config.memory.storage_backend not in ("json", "sqlite"):
+            issues.append(f"Unknown memory storage backend: {self.config.memory.storage_backend}")
+        
+        if self.config.performance.workflow_worker_processes < 0:
+            issues.append("performance.workflow_worker_processes must not be negative")
+        
         # Validate paths
         if not Path(self.config.workspace_path).exists():
             issues.append(f"Workspace path does not exist: {self.config.workspace_path}")
@@ -5,6 +5,8 @@ New features for version 0.0.5 including dynamic model discovery, real-time anal
 
 from .model_discovery import DynamicModelDiscovery, ModelInfo, model_discovery
 from .realtime_analysis import RealTimeAnalysisEngine, CodeAnalyzer, CodeIssue, realtime_analyzer
+from .analyzer_plugins import AnalyzerPlugin, available_plugins
+from .issue_store import IssueStore
 from .git_integration import GitIntegration, GitAnalyzer, CommitSuggestion, git_integration
 
 __all__ = [
@@ -18,6 +20,9 @@ __all__ = [
     "CodeAnalyzer",
     "CodeIssue",
     "realtime_analyzer",
+    "AnalyzerPlugin",
+    "available_plugins",
+    "IssueStore",
     
     # Git Integration
     "GitIntegration",
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Analysis Export
+Streams analysis results as NDJSON or SARIF while files complete, for CI use
+"""
+
+import abc
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from dataclasses import asdict
+from pathlib import Path
+from typing import IO, Any, Dict, Optional
+
+from rich.console import Console
+
+from .realtime_analysis import AnalysisResult
+
+console = Console(stderr=True)
+
+EXPORT_FORMATS = ("ndjson", "sarif")
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_LEVELS = {"error": "error", "warning": "warning", "info": "note", "suggestion": "note"}
+
+
+class ResultWriter(abc.ABC):
+    """Writes each AnalysisResult to a stream as soon as it is available
+
+    Nothing but the running counters (and, for SARIF, the set of rule ids)
+    is kept, so memory stays flat regardless of workspace size.
+    """
+
+    def __init__(self, stream: IO[str], root: Path):
+        self.stream = stream
+        self.root = Path(root).resolve()
+        self.files = 0
+        self.files_with_errors = 0
+        self.severities: Counter = Counter()
+
+    def _relative(self, file_path: str) -> str:
+        path = Path(file_path).resolve()
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def write(self, result: AnalysisResult) -> None:
+        self.files += 1
+        severities = Counter(issue.severity for issue in result.issues)
+        self.severities.update(severities)
+        self.files_with_errors += severities["error"] > 0
+        self._write(result)
+
+    @abc.abstractmethod
+    def _write(self, result: AnalysisResult) -> None:
+        """Emit one result in the writer's format"""
+
+    def close(self) -> None:
+        self.stream.flush()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "files_analyzed": self.files,
+            "total_issues": sum(self.severities.values()),
+            "errors": self.severities["error"],
+            "warnings": self.severities["warning"],
+            "suggestions": self.severities["suggestion"],
+            "info": self.severities["info"],
+            "files_with_errors": self.files_with_errors,
+        }
+
+
+class NdjsonWriter(ResultWriter):
+    """One JSON object per analyzed file, one per line"""
+
+    def _write(self, result: AnalysisResult) -> None:
+        record = {
+            "file": self._relative(result.file_path),
+            "issues": [asdict(issue) for issue in result.issues],
+            "metrics": result.metrics,
+            "timestamp": result.timestamp,
+        }
+        for issue in record["issues"]:
+            issue["file_path"] = record["file"]
+        self.stream.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+
+class SarifWriter(ResultWriter):
+    """A SARIF 2.1.0 log whose results array is written incrementally
+
+    JSON object members are unordered, so the run's tool section (which
+    lists the rules seen) is written after the results.
+    """
+
+    def __init__(self, stream: IO[str], root: Path, tool_version: str = ""):
+        super().__init__(stream, root)
+        self.tool_version = tool_version
+        self.rules: Dict[str, str] = {}  # rule id -> first message seen
+        self._first = True
+        self.stream.write(f'{{"$schema":"{SARIF_SCHEMA}","version":"2.1.0","runs":[{{"results":[')
+
+    def _write(self, result: AnalysisResult) -> None:
+        uri = self._relative(result.file_path)
+        for issue in result.issues:
+            rule_id = issue.rule_id or issue.category
+            self.rules.setdefault(rule_id, issue.message)
+            message = f"{issue.message}. {issue.suggestion}" if issue.suggestion else issue.message
+            record = {
+                "ruleId": rule_id,
+                "level": SARIF_LEVELS.get(issue.severity, "note"),
+                "message": {"text": message},
+                "locations": [{
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": uri, "uriBaseId": "%SRCROOT%"},
+                        "region": {"startLine": max(1, issue.line_number), "startColumn": issue.column + 1},
+                    }
+                }],
+                "properties": {"category": issue.category, "severity": issue.severity},
+            }
+            self.stream.write(("" if self._first else ",") + json.dumps(record, separators=(',', ':')))
+            self._first = False
+
+    def close(self) -> None:
+        driver = {
+            "name": "maahelper",
+            "version": self.tool_version,
+            "informationUri": "https://github.com/AIMLDev726/maahelper",
+            "rules": [
+                {"id": rule_id, "shortDescription": {"text": message}}
+                for rule_id, message in sorted(self.rules.items())
+            ],
+        }
+        tail = {
+            "tool": {"driver": driver},
+            "originalUriBaseIds": {"%SRCROOT%": {"uri": self.root.as_uri() + "/"}},
+        }
+        self.stream.write("]," + json.dumps(tail, separators=(',', ':'))[1:-1] + "}]}\n")
+        super().close()
+
+
+def open_result_writer(stream: IO[str], fmt: str, root: Path) -> ResultWriter:
+    """Writer for one of EXPORT_FORMATS"""
+    if fmt == "ndjson":
+        return NdjsonWriter(stream, root)
+    if fmt == "sarif":
+        from .. import __version__
+        return SarifWriter(stream, root, __version__)
+    raise ValueError(f"Unknown export format '{fmt}' (expected one of: {', '.join(EXPORT_FORMATS)})")
+
+
+def build_parser(prog: str = "maahelper-analyze") -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=prog, description="Analyze a workspace and stream the results")
+    parser.add_argument("workspace", nargs="?", default=".", help="workspace to analyze (default: .)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None,
+                        help="stream results in this format instead of only printing a summary")
+    parser.add_argument("--output", "-o", default="-", help="output file for --format (default: stdout)")
+    parser.add_argument("--changed-since", metavar="GIT_REF", default=None,
+                        help="only analyze files changed relative to this git ref")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    return parser
+
+
+async def run_export(workspace: str, fmt: str, output: str, changed_since: Optional[str] = None,
+                     max_workers: Optional[int] = None, show_progress: bool = True) -> Dict[str, Any]:
+    """Analyze a workspace, streaming results to output ('-' for stdout)"""
+    from .realtime_analysis import RealTimeAnalysisEngine
+
+    engine = RealTimeAnalysisEngine(workspace)
+    if output == "-":
+        # The progress bar shares stdout with the results
+        return await engine.export_workspace(sys.stdout, fmt, changed_since, max_workers, show_progress=False)
+    with open(output, "w", encoding="utf-8") as stream:
+        return await engine.export_workspace(stream, fmt, changed_since, max_workers, show_progress)
+
+
+def main():
+    """Non-interactive entry point for CI"""
+    args = build_parser().parse_args()
+    try:
+        summary = asyncio.run(run_export(args.workspace, args.format or "ndjson", args.output,
+                                         args.changed_since, args.workers))
+    except Exception as e:
+        console.print(f"[red]❌ Analysis failed: {e}[/red]")
+        sys.exit(2)
+
+    console.print(f"✅ [green]Analyzed {summary['files_analyzed']} files: {summary['total_issues']} issues "
+                  f"({summary['errors']} errors, {summary['warnings']} warnings)[/green]")
+
+
+if __name__ == "__main__":
+    main()
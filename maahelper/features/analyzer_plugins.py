@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Analyzer Plugins
+External linter backends (ruff, pyflakes) whose findings are normalized into CodeIssue
+"""
+
+import abc
+import ast
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from .realtime_analysis import CodeIssue
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyflakes
+    from pyflakes import checker as pyflakes_checker
+    PYFLAKES_AVAILABLE = True
+except ImportError:
+    PYFLAKES_AVAILABLE = False
+
+# Built-in heuristics that a real linter supersedes for the files it checks
+HEURISTIC_RULES = frozenset({"inefficient_string_concat", "global_in_loop"})
+
+RUFF_CODE = re.compile(r'^([A-Z]+)(\d+)$')
+RUFF_FAMILIES: Dict[str, Tuple[str, str]] = {
+    "S": ("warning", "security"),
+    "PERF": ("suggestion", "performance"),
+    "C": ("suggestion", "maintainability"),
+    "PLR": ("suggestion", "maintainability"),
+    "B": ("warning", "maintainability"),
+    "F": ("warning", "maintainability"),
+    "E": ("info", "style"),
+    "W": ("info", "style"),
+}
+# Command lines stay well below OS argument limits
+RUFF_BATCH_FILES = 500
+
+PYFLAKES_ERRORS = {"UndefinedName", "UndefinedLocal", "UndefinedExport"}
+
+
+class AnalyzerPlugin(abc.ABC):
+    """Base class for analyzer backends
+
+    check() analyzes one file's content in-process or via a subprocess.
+    Plugins with batched = True are instead given whole lists of files
+    through check_files(), so one linter run covers many files.
+    """
+
+    name = "plugin"
+    extensions = frozenset({'.py'})
+    replaces = HEURISTIC_RULES
+    batched = False
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return False
+
+    @property
+    def version(self) -> str:
+        return "0"
+
+    @abc.abstractmethod
+    def check(self, file_path: str, content: str) -> List[CodeIssue]:
+        """Issues for one file's content"""
+
+    def check_files(self, paths: List[str]) -> Dict[str, List[CodeIssue]]:
+        """Issues for several files on disk, keyed by the given paths"""
+        results = {}
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    results[path] = self.check(path, f.read())
+            except (OSError, UnicodeDecodeError) as e:
+                logger.debug(f"{self.name} could not read {path}: {e}")
+                results[path] = []
+        return results
+
+
+class RuffPlugin(AnalyzerPlugin):
+    """ruff, run as a subprocess with JSON output, batched across files"""
+
+    name = "ruff"
+    batched = True
+
+    def __init__(self, executable: Optional[str] = None, timeout: float = 120.0):
+        self.executable = executable or shutil.which("ruff")
+        self.timeout = timeout
+        self._version: Optional[str] = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return shutil.which("ruff") is not None
+
+    @property
+    def version(self) -> str:
+        if self._version is None:
+            try:
+                output = subprocess.run([self.executable, "--version"], capture_output=True,
+                                        text=True, timeout=10).stdout
+                self._version = output.strip().split()[-1] if output.strip() else "unknown"
+            except (OSError, subprocess.SubprocessError):
+                self._version = "unknown"
+        return self._version
+
+    @staticmethod
+    def classify(code: str) -> Tuple[str, str]:
+        """(severity, category) for a ruff rule code"""
+        match = RUFF_CODE.match(code)
+        letters, digits = match.groups() if match else (code, "")
+        if (letters == "E" and digits.startswith("9")) or \
+                (letters == "F" and digits.startswith(("63", "7", "82"))):
+            return "error", "syntax"
+        return RUFF_FAMILIES.get(letters, ("suggestion", "style"))
+
+    def _run(self, args: List[str], stdin: Optional[str] = None) -> List[dict]:
+        process = subprocess.run(
+            [self.executable, "check", "--output-format", "json", "--exit-zero", "--no-fix", *args],
+            input=stdin, capture_output=True, text=True, timeout=self.timeout
+        )
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.strip() or f"ruff exited with {process.returncode}")
+        return json.loads(process.stdout or "[]")
+
+    def _to_issue(self, item: dict, file_path: str) -> Optional[CodeIssue]:
+        code = item.get("code")
+        if not code or not RUFF_CODE.match(code):
+            # Syntax errors are already reported by the built-in syntax check
+            return None
+        severity, category = self.classify(code)
+        location = item.get("location") or {}
+        return CodeIssue(
+            file_path=file_path,
+            line_number=location.get("row", 1),
+            column=max(0, location.get("column", 1) - 1),
+            severity=severity,
+            category=category,
+            message=item.get("message", code),
+            suggestion=(item.get("fix") or {}).get("message") or "",
+            rule_id=f"ruff_{code}"
+        )
+
+    def check(self, file_path: str, content: str) -> List[CodeIssue]:
+        items = self._run(["--stdin-filename", file_path, "-"], stdin=content)
+        return [issue for issue in (self._to_issue(item, file_path) for item in items) if issue]
+
+    def check_files(self, paths: List[str]) -> Dict[str, List[CodeIssue]]:
+        results: Dict[str, List[CodeIssue]] = {path: [] for path in paths}
+        by_absolute = {os.path.abspath(path): path for path in paths}
+        for i in range(0, len(paths), RUFF_BATCH_FILES):
+            # --force-exclude keeps ruff's own excludes for explicitly passed files
+            for item in self._run(["--force-exclude", *paths[i:i + RUFF_BATCH_FILES]]):
+                path = by_absolute.get(os.path.abspath(item.get("filename", "")))
+                if path is None:
+                    continue
+                issue = self._to_issue(item, path)
+                if issue:
+                    results[path].append(issue)
+        return results
+
+
+class PyflakesPlugin(AnalyzerPlugin):
+    """pyflakes, run in-process on the already loaded content"""
+
+    name = "pyflakes"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return PYFLAKES_AVAILABLE
+
+    @property
+    def version(self) -> str:
+        return pyflakes.__version__
+
+    def check(self, file_path: str, content: str) -> List[CodeIssue]:
+        try:
+            tree = ast.parse(content, filename=file_path)
+        except (SyntaxError, ValueError):
+            # Reported by the built-in syntax check
+            return []
+
+        issues = []
+        messages = pyflakes_checker.Checker(tree, filename=file_path).messages
+        for message in sorted(messages, key=lambda m: (m.lineno, m.col)):
+            kind = type(message).__name__
+            issues.append(CodeIssue(
+                file_path=file_path,
+                line_number=message.lineno,
+                column=message.col or 0,
+                severity="error" if kind in PYFLAKES_ERRORS else "warning",
+                category="maintainability",
+                message=message.message % message.message_args,
+                rule_id=f"pyflakes_{kind}"
+            ))
+        return issues
+
+
+def available_plugins() -> List[AnalyzerPlugin]:
+    """The best installed linter backend; ruff already covers pyflakes' checks"""
+    if RuffPlugin.is_available():
+        return [RuffPlugin()]
+    if PyflakesPlugin.is_available():
+        return [PyflakesPlugin()]
+    return []
@@ -353,6 +353,16 @@ Respond with just the commit message.
         
         return f"{prefix}{clean_desc[:40]}"
     
+    async def get_changed_files(self, ref: str) -> List[str]:
+        """Files added, copied, modified or renamed since ref (plus untracked ones), relative to repo_path"""
+        # --relative keeps paths (and the diff) scoped to repo_path when it is a subdirectory
+        changed = await self._run_git_command(
+            ["diff", "--relative", "--name-only", "--diff-filter=ACMR", "-z", ref, "--"]
+        )
+        untracked = await self._run_git_command(["ls-files", "--others", "--exclude-standard", "-z"])
+        files = [path for path in (changed + untracked).split('\0') if path]
+        return list(dict.fromkeys(files))
+
     async def _run_git_command(self, args: List[str]) -> str:
         """Run Git command and return output"""
         try:
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Issue Store
+Analysis results per file with incrementally maintained counters and optional columnar filtering
+"""
+
+import array
+from collections import Counter
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .realtime_analysis import AnalysisResult, CodeIssue
+
+
+class _Interner:
+    """Maps strings to small integer codes"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class IssueColumns:
+    """Append-only columns (file, line, severity, category, rule) over every stored issue
+
+    Replacing a file's result appends its new rows and marks the old ones
+    dead; dead rows are compacted away once they outnumber live ones.
+    Columns are NumPy arrays when NumPy is installed (vectorized filters)
+    and array.array otherwise.
+    """
+
+    COLUMNS = ("file", "line", "severity", "category", "rule")
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else use_numpy and NUMPY_AVAILABLE
+        self.files = _Interner()
+        self.severities = _Interner()
+        self.categories = _Interner()
+        self.rules = _Interner()
+        self.issues: List[Optional["CodeIssue"]] = []
+        self._rows: Dict[str, Tuple[int, int]] = {}  # file -> (start, end) of its live rows
+        self._dead = 0
+        self._size = 0
+        self._reset_columns(0)
+
+    def _reset_columns(self, capacity: int) -> None:
+        if self.use_numpy:
+            self._columns = {name: np.zeros(max(capacity, 1024), dtype=np.int32) for name in self.COLUMNS}
+            self._alive = np.zeros(max(capacity, 1024), dtype=bool)
+        else:
+            self._columns = {name: array.array('i') for name in self.COLUMNS}
+            self._alive = array.array('b')
+
+    def _append(self, values: Dict[str, List[int]], count: int) -> None:
+        if self.use_numpy:
+            needed = self._size + count
+            if needed > len(self._alive):
+                capacity = max(needed, len(self._alive) * 2)
+                for name in self.COLUMNS:
+                    grown = np.zeros(capacity, dtype=np.int32)
+                    grown[:self._size] = self._columns[name][:self._size]
+                    self._columns[name] = grown
+                alive = np.zeros(capacity, dtype=bool)
+                alive[:self._size] = self._alive[:self._size]
+                self._alive = alive
+            for name in self.COLUMNS:
+                self._columns[name][self._size:needed] = values[name]
+            self._alive[self._size:needed] = True
+        else:
+            for name in self.COLUMNS:
+                self._columns[name].extend(values[name])
+            self._alive.extend([1] * count)
+        self._size += count
+
+    def remove(self, file_path: str) -> None:
+        rows = self._rows.pop(file_path, None)
+        if rows is None:
+            return
+        start, end = rows
+        for row in range(start, end):
+            self.issues[row] = None
+        if self.use_numpy:
+            self._alive[start:end] = False
+        else:
+            for row in range(start, end):
+                self._alive[row] = 0
+        self._dead += end - start
+
+    def put(self, file_path: str, issues: List["CodeIssue"]) -> None:
+        self.remove(file_path)
+        if self._dead > 1024 and self._dead > self._size - self._dead:
+            self._compact()
+
+        file_code = self.files.code(file_path)
+        values = {
+            "file": [file_code] * len(issues),
+            "line": [issue.line_number for issue in issues],
+            "severity": [self.severities.code(issue.severity) for issue in issues],
+            "category": [self.categories.code(issue.category) for issue in issues],
+            "rule": [self.rules.code(issue.rule_id) for issue in issues],
+        }
+        start = self._size
+        self._append(values, len(issues))
+        self.issues.extend(issues)
+        self._rows[file_path] = (start, self._size)
+
+    def _compact(self) -> None:
+        live = [(path, self.issues[start:end]) for path, (start, end) in self._rows.items()]
+        self.issues = []
+        self._rows = {}
+        self._dead = 0
+        self._size = 0
+        self._reset_columns(sum(len(issues) for _, issues in live))
+        for path, issues in live:
+            self.put(path, issues)
+
+    def _mask(self, file_path: Optional[str], severity: Optional[str],
+              category: Optional[str], rule_id: Optional[str]):
+        """Boolean mask over rows, or None when a filter value was never seen"""
+        conditions = []
+        for name, interner, value in (("file", self.files, file_path), ("severity", self.severities, severity),
+                                      ("category", self.categories, category), ("rule", self.rules, rule_id)):
+            if value is not None:
+                code = interner.codes.get(value)
+                if code is None:
+                    return None
+                conditions.append((name, code))
+
+        if self.use_numpy:
+            mask = self._alive[:self._size].copy()
+            for name, code in conditions:
+                mask &= self._columns[name][:self._size] == code
+            return mask
+
+        columns = [(self._columns[name], code) for name, code in conditions]
+        return [
+            bool(self._alive[row]) and all(column[row] == code for column, code in columns)
+            for row in range(self._size)
+        ]
+
+    def filter(self, file_path: Optional[str] = None, severity: Optional[str] = None,
+               category: Optional[str] = None, rule_id: Optional[str] = None) -> List["CodeIssue"]:
+        """Issues matching every given criterion"""
+        mask = self._mask(file_path, severity, category, rule_id)
+        if mask is None:
+            return []
+        rows = np.flatnonzero(mask) if self.use_numpy else [row for row, keep in enumerate(mask) if keep]
+        return [self.issues[row] for row in rows]
+
+    def count(self, file_path: Optional[str] = None, severity: Optional[str] = None,
+              category: Optional[str] = None, rule_id: Optional[str] = None) -> int:
+        mask = self._mask(file_path, severity, category, rule_id)
+        if mask is None:
+            return 0
+        return int(mask.sum()) if self.use_numpy else sum(mask)
+
+
+class IssueStore(MutableMapping):
+    """Latest AnalysisResult per file, with severity and category counters
+
+    Counters are adjusted by the difference between a file's old and new
+    result whenever it is stored or removed, so summaries never re-scan
+    issues. With columnar=True an IssueColumns layout is kept alongside for
+    fast filtering across all files.
+    """
+
+    def __init__(self, columnar: bool = False, use_numpy: Optional[bool] = None):
+        self._results: Dict[str, "AnalysisResult"] = {}
+        self._file_severities: Dict[str, Counter] = {}
+        self.severity_totals: Counter = Counter()
+        self.category_totals: Counter = Counter()
+        self.total_issues = 0
+        self.files_with_errors = 0
+        self.columns = IssueColumns(use_numpy) if columnar else None
+
+    # Mapping interface
+
+    def __getitem__(self, file_path: str) -> "AnalysisResult":
+        return self._results[file_path]
+
+    def __setitem__(self, file_path: str, result: "AnalysisResult") -> None:
+        if file_path in self._results:
+            self._forget(file_path)
+        severities = Counter(issue.severity for issue in result.issues)
+        self._results[file_path] = result
+        self._file_severities[file_path] = severities
+        self.severity_totals.update(severities)
+        self.category_totals.update(issue.category for issue in result.issues)
+        self.total_issues += len(result.issues)
+        self.files_with_errors += severities["error"] > 0
+        if self.columns is not None:
+            self.columns.put(file_path, result.issues)
+
+    def __delitem__(self, file_path: str) -> None:
+        if file_path not in self._results:
+            raise KeyError(file_path)
+        self._forget(file_path)
+        del self._results[file_path]
+        del self._file_severities[file_path]
+        if self.columns is not None:
+            self.columns.remove(file_path)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._results)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _forget(self, file_path: str) -> None:
+        result = self._results[file_path]
+        severities = self._file_severities[file_path]
+        self.severity_totals.subtract(severities)
+        self.category_totals.subtract(issue.category for issue in result.issues)
+        self.total_issues -= len(result.issues)
+        self.files_with_errors -= severities["error"] > 0
+
+    # Queries
+
+    def file_counts(self, file_path: str) -> Counter:
+        """Issue counts by severity for one file"""
+        return self._file_severities.get(file_path, Counter())
+
+    def summary(self) -> Dict[str, object]:
+        """Totals across all files, from the maintained counters"""
+        return {
+            "files_analyzed": len(self._results),
+            "total_issues": self.total_issues,
+            "errors": self.severity_totals["error"],
+            "warnings": self.severity_totals["warning"],
+            "suggestions": self.severity_totals["suggestion"],
+            "info": self.severity_totals["info"],
+            "files_with_errors": self.files_with_errors,
+            "by_category": {category: count for category, count in self.category_totals.items() if count},
+        }
+
+    def filter(self, file_path: Optional[str] = None, severity: Optional[str] = None,
+               category: Optional[str] = None, rule_id: Optional[str] = None) -> List["CodeIssue"]:
+        """Issues matching every given criterion, vectorized when the store is columnar"""
+        if self.columns is not None:
+            return self.columns.filter(file_path, severity, category, rule_id)
+
+        results = [self._results[file_path]] if file_path in self._results else \
+            [] if file_path is not None else self._results.values()
+        return [
+            issue for result in results for issue in result.issues
+            if (severity is None or issue.severity == severity)
+            and (category is None or issue.category == category)
+            and (rule_id is None or issue.rule_id == rule_id)
+        ]
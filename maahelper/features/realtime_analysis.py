@@ -5,11 +5,17 @@ Live code feedback with file watching and incremental suggestions
 """
 
 import asyncio
-import ast
+import bisect
+import difflib
+import os
+import threading
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Callable, Set
-from dataclasses import dataclass, field
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, AsyncIterator, Dict, List, Optional, Any, Callable, Sequence, Set, Tuple
+from dataclasses import dataclass, field, replace
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent
 import re
@@ -18,8 +24,15 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.live import Live
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
-console = Console()
+from .issue_store import IssueStore, NUMPY_AVAILABLE
+from ..utils.outline import Symbol, outline_service
+from ..utils.workspace_index import configured_exclude_patterns, get_workspace_index, hash_content
+from ..utils.workspace_scanner import WorkspaceScanner
+
+# Messages go to stderr so results exported to stdout stay machine-readable
+console = Console(stderr=True)
 
 
 @dataclass
@@ -44,91 +57,139 @@ class AnalysisResult:
     timestamp: float = field(default_factory=time.time)
 
 
-class CodeAnalyzer:
-    """Analyzes code for various issues and improvements"""
-    
+# Bump when a rule is added or changed so cached results are not reused
+RULE_SET_VERSION = 1
+
+MAX_LINE_LENGTH = 88
+MAX_FUNCTION_LINES = 50
+MAX_INDENT = 16
+NESTING_KEYWORDS = ('if', 'for', 'while', 'try')
+
+# (pattern, rule_id, severity, category, message, suggestion)
+REGEX_LINE_RULES = [
+    (r'for\s+\w+\s+in.*global', "global_in_loop", "suggestion", "performance",
+     "Global variable access in loop", "Consider caching global variables locally"),
+] + [
+    (pattern, f"security_{pattern[:10]}", "warning", "security", message, suggestion)
+    for pattern, message, suggestion in [
+        (r'eval\s*\(', "Use of eval() is dangerous", "Consider safer alternatives"),
+        (r'exec\s*\(', "Use of exec() is dangerous", "Consider safer alternatives"),
+        (r'input\s*\(.*\)', "Raw input() usage", "Validate and sanitize user input"),
+        (r'shell=True', "Shell injection risk", "Avoid shell=True or sanitize input"),
+        (r'pickle\.loads?', "Pickle deserialization risk", "Use safer serialization formats"),
+    ]
+]
+
+# Issues are reported grouped by rule family, in this order
+RULE_GROUPS = ("syntax", "style", "performance", "security", "maintainability", "complexity")
+LINE_RULE_GROUPS = ("style", "performance", "security", "complexity")
+
+WORKSPACE_EXTENSIONS = ['.py', '.js', '.ts', '.jsx', '.tsx']
+# Below this many files a process pool costs more than it saves
+MIN_PARALLEL_FILES = 32
+MAX_CHUNK_FILES = 64
+# Files at least this long re-run line rules only on the lines that changed
+INCREMENTAL_MIN_LINES = 1000
+
+
+class RuleEngine:
+    """Runs every analysis rule with one parse and one pass over the lines
+
+    The regex rules are folded into a single precompiled alternation that is
+    searched over the whole content to find candidate lines; only those lines
+    are matched against the individual patterns. Plain line checks and the
+    line metrics share one loop, and the syntax and function rules read the
+    file's cached outline, so Python is parsed once per content version.
+    """
+
     def __init__(self):
-        self.rules = self._initialize_rules()
-    
-    def _initialize_rules(self) -> Dict[str, Callable]:
-        """Initialize analysis rules"""
-        return {
-            "syntax_check": self._check_syntax,
-            "style_check": self._check_style,
-            "performance_check": self._check_performance,
-            "security_check": self._check_security,
-            "maintainability_check": self._check_maintainability,
-            "complexity_check": self._check_complexity
-        }
-    
-    async def analyze_file(self, file_path: Path) -> AnalysisResult:
-        """Analyze a single file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            result = AnalysisResult(file_path=str(file_path))
-            
-            # Run all analysis rules
-            for rule_name, rule_func in self.rules.items():
-                try:
-                    issues = await rule_func(content, file_path)
-                    result.issues.extend(issues)
-                except Exception as e:
-                    console.print(f"[red]Error in {rule_name}: {e}[/red]")
-            
-            # Calculate metrics
-            result.metrics = self._calculate_metrics(content, result.issues)
-            
-            return result
-            
-        except Exception as e:
-            console.print(f"[red]Error analyzing {file_path}: {e}[/red]")
-            return AnalysisResult(file_path=str(file_path))
-    
-    async def _check_syntax(self, content: str, file_path: Path) -> List[CodeIssue]:
-        """Check for syntax errors"""
-        issues = []
-        
-        if file_path.suffix == '.py':
-            try:
-                ast.parse(content)
-            except SyntaxError as e:
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
-                    line_number=e.lineno or 1,
-                    column=e.offset or 0,
-                    severity="error",
-                    category="syntax",
-                    message=f"Syntax error: {e.msg}",
-                    rule_id="syntax_error"
+        self.regex_rules = [(re.compile(pattern), *rest) for pattern, *rest in REGEX_LINE_RULES]
+        # \s in the combined pattern must not cross line boundaries
+        self.candidate_pattern = re.compile('|'.join(
+            '(?:' + pattern.replace(r'\s', r'[^\S\n]') + ')' for pattern, *_ in REGEX_LINE_RULES
+        ))
+
+    def _candidate_lines(self, content: str) -> Set[int]:
+        """Line numbers on which at least one regex rule may match"""
+        candidates: Set[int] = set()
+        line, last = 1, 0
+        for match in self.candidate_pattern.finditer(content):
+            line += content.count('\n', last, match.start())
+            last = match.start()
+            candidates.add(line)
+        return candidates
+
+    def check_ast(self, syntax_error: Optional[Tuple[int, int, str]], functions: Sequence[Symbol],
+                  file_path: str) -> Dict[str, List[CodeIssue]]:
+        """Syntax and function rules for Python, from an outline's syntax error and functions"""
+        groups: Dict[str, List[CodeIssue]] = {"syntax": [], "maintainability": []}
+        if syntax_error:
+            line_number, column, message = syntax_error
+            groups["syntax"].append(CodeIssue(
+                file_path=file_path,
+                line_number=line_number,
+                column=column,
+                severity="error",
+                category="syntax",
+                message=f"Syntax error: {message}",
+                rule_id="syntax_error"
+            ))
+            return groups
+
+        for symbol in functions:
+            if symbol.is_async:
+                continue
+            def_line = symbol.def_line or symbol.start_line
+            func_lines = symbol.end_line - def_line + 1
+            if func_lines > MAX_FUNCTION_LINES:
+                groups["maintainability"].append(CodeIssue(
+                    file_path=file_path,
+                    line_number=def_line,
+                    column=symbol.column,
+                    severity="suggestion",
+                    category="maintainability",
+                    message=f"Function '{symbol.name}' is too long ({func_lines} lines)",
+                    suggestion="Consider breaking this function into smaller functions",
+                    rule_id="long_function"
                 ))
-        
-        return issues
-    
-    async def _check_style(self, content: str, file_path: Path) -> List[CodeIssue]:
-        """Check for style issues"""
-        issues = []
-        lines = content.split('\n')
-        
-        for i, line in enumerate(lines, 1):
-            # Long lines
-            if len(line) > 88:
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
+        return groups
+
+    def check_python(self, content: str, file_path: str) -> Dict[str, List[CodeIssue]]:
+        """check_ast over the content's cached outline"""
+        outline = outline_service.get_outline(content, 'python')
+        return self.check_ast(outline.syntax_error, outline.functions, file_path)
+
+    def check_lines(self, lines: List[str], file_path: str, start: int = 0,
+                    end: Optional[int] = None) -> Tuple[Dict[str, List[CodeIssue]], Dict[str, int]]:
+        """Line rules and line counts for lines[start:end]"""
+        end = len(lines) if end is None else end
+        groups: Dict[str, List[CodeIssue]] = {group: [] for group in LINE_RULE_GROUPS}
+        style, performance = groups["style"], groups["performance"]
+        security, complexity = groups["security"], groups["complexity"]
+        candidates = {start + line for line in self._candidate_lines('\n'.join(lines[start:end]))}
+        code_lines = comment_lines = blank_lines = 0
+        previous_blank = start > 0 and not lines[start - 1].strip()
+
+        for i in range(start + 1, end + 1):
+            line = lines[i - 1]
+            length = len(line)
+            stripped = line.strip()
+
+            if length > MAX_LINE_LENGTH:
+                style.append(CodeIssue(
+                    file_path=file_path,
                     line_number=i,
-                    column=88,
+                    column=MAX_LINE_LENGTH,
                     severity="warning",
                     category="style",
-                    message=f"Line too long ({len(line)} > 88 characters)",
+                    message=f"Line too long ({length} > {MAX_LINE_LENGTH} characters)",
                     suggestion="Consider breaking this line into multiple lines",
                     rule_id="line_too_long"
                 ))
-            
-            # Trailing whitespace
-            if line.endswith(' ') or line.endswith('\t'):
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
+
+            if line.endswith((' ', '\t')):
+                style.append(CodeIssue(
+                    file_path=file_path,
                     line_number=i,
                     column=len(line.rstrip()),
                     severity="info",
@@ -137,32 +198,31 @@ class CodeAnalyzer:
                     suggestion="Remove trailing whitespace",
                     rule_id="trailing_whitespace"
                 ))
-            
-            # Multiple blank lines
-            if i > 1 and not line.strip() and not lines[i-2].strip():
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
-                    line_number=i,
-                    column=0,
-                    severity="info",
-                    category="style",
-                    message="Multiple blank lines",
-                    suggestion="Use single blank line",
-                    rule_id="multiple_blank_lines"
-                ))
-        
-        return issues
-    
-    async def _check_performance(self, content: str, file_path: Path) -> List[CodeIssue]:
-        """Check for performance issues"""
-        issues = []
-        lines = content.split('\n')
-        
-        for i, line in enumerate(lines, 1):
-            # Inefficient string concatenation
+
+            if not stripped:
+                blank_lines += 1
+                if previous_blank:
+                    style.append(CodeIssue(
+                        file_path=file_path,
+                        line_number=i,
+                        column=0,
+                        severity="info",
+                        category="style",
+                        message="Multiple blank lines",
+                        suggestion="Use single blank line",
+                        rule_id="multiple_blank_lines"
+                    ))
+                previous_blank = True
+            else:
+                previous_blank = False
+                if stripped[0] == '#':
+                    comment_lines += 1
+                else:
+                    code_lines += 1
+
             if '+=' in line and 'str' in line.lower():
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
+                performance.append(CodeIssue(
+                    file_path=file_path,
                     line_number=i,
                     column=line.find('+='),
                     severity="suggestion",
@@ -171,163 +231,462 @@ class CodeAnalyzer:
                     suggestion="Consider using join() or f-strings for better performance",
                     rule_id="inefficient_string_concat"
                 ))
-            
-            # Global variable access in loops
-            if re.search(r'for\s+\w+\s+in.*global', line):
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
+
+            if i in candidates:
+                for pattern, rule_id, severity, category, message, suggestion in self.regex_rules:
+                    if pattern.search(line):
+                        (performance if category == "performance" else security).append(CodeIssue(
+                            file_path=file_path,
+                            line_number=i,
+                            column=0,
+                            severity=severity,
+                            category=category,
+                            message=message,
+                            suggestion=suggestion,
+                            rule_id=rule_id
+                        ))
+
+            if length - len(line.lstrip()) > MAX_INDENT and any(keyword in line for keyword in NESTING_KEYWORDS):
+                complexity.append(CodeIssue(
+                    file_path=file_path,
                     line_number=i,
                     column=0,
                     severity="suggestion",
-                    category="performance",
-                    message="Global variable access in loop",
-                    suggestion="Consider caching global variables locally",
-                    rule_id="global_in_loop"
+                    category="maintainability",
+                    message="High nesting level detected",
+                    suggestion="Consider extracting nested logic into separate functions",
+                    rule_id="high_nesting"
                 ))
+
+        line_counts = {
+            "total_lines": end - start,
+            "code_lines": code_lines,
+            "comment_lines": comment_lines,
+            "blank_lines": blank_lines,
+        }
+        return groups, line_counts
+
+    def run(self, content: str, file_path: str, is_python: bool) -> Tuple[List[CodeIssue], Dict[str, int]]:
+        """Return (issues, line counts) for one file"""
+        groups, line_counts = self.check_lines(content.split('\n'), file_path)
+        if is_python:
+            groups.update(self.check_python(content, file_path))
+        return [issue for group in RULE_GROUPS if group in groups for issue in groups[group]], line_counts
+
+
+def _line_kinds(lines: List[str]) -> Counter:
+    """Count code, comment and blank lines"""
+    kinds: Counter = Counter()
+    for line in lines:
+        stripped = line.strip()
+        kinds["blank_lines" if not stripped else "comment_lines" if stripped[0] == '#' else "code_lines"] += 1
+    return kinds
+
+
+def _changed_ranges(old: List[str], new: List[str]) -> List[Tuple[int, int, int, int]]:
+    """Replaced line ranges (i1, i2, j1, j2) turning old into new"""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    # Only the region between the common prefix and suffix needs a real diff
+    matcher = difflib.SequenceMatcher(None, old[prefix:len(old) - suffix], new[prefix:len(new) - suffix])
+    return [
+        (i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+@dataclass
+class _CachedAnalysis:
+    """Everything needed to reuse or incrementally update one file's analysis"""
+    content_hash: str
+    rule_set_version: str
+    lines: List[str]
+    line_groups: Dict[str, List[CodeIssue]]
+    line_counts: Dict[str, int]
+    result: AnalysisResult
+
+
+class AnalysisCache:
+    """Latest analysis of each file, valid while its content hash and the rule set are unchanged"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CachedAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str, rule_set_version: str) -> Optional[_CachedAnalysis]:
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None or entry.rule_set_version != rule_set_version:
+                return None
+            self._entries.move_to_end(file_path)
+            return entry
+
+    def put(self, file_path: str, entry: _CachedAnalysis) -> None:
+        with self._lock:
+            self._entries[file_path] = entry
+            self._entries.move_to_end(file_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, file_path: str) -> None:
+        with self._lock:
+            self._entries.pop(file_path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CodeAnalyzer:
+    """Analyzes code for various issues and improvements"""
+    
+    def __init__(self, plugins: Optional[List] = None):
+        self.engine = RuleEngine()
+        self.cache = AnalysisCache()
+        if plugins is None:
+            from .analyzer_plugins import available_plugins
+            plugins = available_plugins()
+        self.plugins = plugins
+    
+    @property
+    def rule_set_version(self) -> str:
+        """Built-in rule version plus the name and version of every plugin"""
+        return "+".join([str(RULE_SET_VERSION)] + [f"{plugin.name}-{plugin.version}" for plugin in self.plugins])
+    
+    def _plugins_for(self, file_path: Path) -> List:
+        return [plugin for plugin in self.plugins if file_path.suffix in plugin.extensions]
+    
+    def _run_plugin(self, plugin, file_path: str, content: str) -> List[CodeIssue]:
+        try:
+            return plugin.check(file_path, content)
+        except Exception as e:
+            console.print(f"[yellow]⚠️ {plugin.name} failed on {file_path}: {e}[/yellow]")
+            return []
+    
+    async def analyze_file(self, file_path: Path) -> AnalysisResult:
+        """Analyze a single file in the default executor, off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.analyze_path, file_path)
+    
+    def analyze_path(self, file_path: Path) -> AnalysisResult:
+        """Read and analyze a file synchronously (used by worker processes)"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            return self.analyze_content(content, file_path)
+            
+        except Exception as e:
+            console.print(f"[red]Error analyzing {file_path}: {e}[/red]")
+            return AnalysisResult(file_path=str(file_path))
+    
+    def analyze_paths(self, file_paths: List[Path]) -> List[AnalysisResult]:
+        """Analyze several files, running each batched plugin once for all changed ones"""
+        results: Dict[str, AnalysisResult] = {}
+        changed: List[Tuple[Path, str]] = []
+        rule_set_version = self.rule_set_version
+        for file_path in map(Path, file_paths):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                console.print(f"[red]Error analyzing {file_path}: {e}[/red]")
+                results[str(file_path)] = AnalysisResult(file_path=str(file_path))
+                continue
+            cached = self.cache.get(str(file_path), rule_set_version)
+            if cached is not None and cached.content_hash == hash_content(content.encode('utf-8', errors='replace')):
+                results[str(file_path)] = replace(cached.result, timestamp=time.time())
+            else:
+                changed.append((file_path, content))
         
-        return issues
+        plugin_issues: Dict[str, Dict[str, List[CodeIssue]]] = {}
+        for plugin in self.plugins:
+            targets = [str(path) for path, _ in changed if path.suffix in plugin.extensions]
+            if not plugin.batched or not targets:
+                continue
+            try:
+                batch = plugin.check_files(targets)
+            except Exception as e:
+                console.print(f"[yellow]⚠️ {plugin.name} failed: {e}[/yellow]")
+                batch = {path: [] for path in targets}
+            for path, issues in batch.items():
+                plugin_issues.setdefault(path, {})[plugin.name] = issues
+        
+        for file_path, content in changed:
+            results[str(file_path)] = self.analyze_content(content, file_path, plugin_issues.get(str(file_path)))
+        return [results[str(file_path)] for file_path in file_paths]
     
-    async def _check_security(self, content: str, file_path: Path) -> List[CodeIssue]:
-        """Check for security issues"""
-        issues = []
-        lines = content.split('\n')
+    def analyze_content(self, content: str, file_path: Path,
+                        plugin_issues: Optional[Dict[str, List[CodeIssue]]] = None) -> AnalysisResult:
+        """Run all rules over already loaded content, reusing the cached analysis where possible
         
-        security_patterns = [
-            (r'eval\s*\(', "Use of eval() is dangerous", "Consider safer alternatives"),
-            (r'exec\s*\(', "Use of exec() is dangerous", "Consider safer alternatives"),
-            (r'input\s*\(.*\)', "Raw input() usage", "Validate and sanitize user input"),
-            (r'shell=True', "Shell injection risk", "Avoid shell=True or sanitize input"),
-            (r'pickle\.loads?', "Pickle deserialization risk", "Use safer serialization formats"),
-        ]
+        plugin_issues holds results already produced for this content by
+        batched plugins, keyed by plugin name; other plugins run here.
+        """
+        file_path = Path(file_path)
+        key = str(file_path)
+        content_hash = hash_content(content.encode('utf-8', errors='replace'))
+        rule_set_version = self.rule_set_version
         
-        for i, line in enumerate(lines, 1):
-            for pattern, message, suggestion in security_patterns:
-                if re.search(pattern, line):
-                    issues.append(CodeIssue(
-                        file_path=str(file_path),
-                        line_number=i,
-                        column=0,
-                        severity="warning",
-                        category="security",
-                        message=message,
-                        suggestion=suggestion,
-                        rule_id=f"security_{pattern[:10]}"
-                    ))
+        cached = self.cache.get(key, rule_set_version)
+        if cached is not None and cached.content_hash == content_hash:
+            # Unchanged save (editor double-write, touch): nothing to re-run
+            return replace(cached.result, timestamp=time.time())
         
-        return issues
-    
-    async def _check_maintainability(self, content: str, file_path: Path) -> List[CodeIssue]:
-        """Check for maintainability issues"""
-        issues = []
+        lines = content.split('\n')
+        update = None
+        if cached is not None and len(lines) >= INCREMENTAL_MIN_LINES:
+            update = self._update_line_rules(cached, lines, key)
+        line_groups, line_counts = update or self.engine.check_lines(lines, key)
         
-        # Function length
+        groups = dict(line_groups)
         if file_path.suffix == '.py':
-            try:
-                tree = ast.parse(content)
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.FunctionDef):
-                        func_lines = node.end_lineno - node.lineno + 1
-                        if func_lines > 50:
-                            issues.append(CodeIssue(
-                                file_path=str(file_path),
-                                line_number=node.lineno,
-                                column=node.col_offset,
-                                severity="suggestion",
-                                category="maintainability",
-                                message=f"Function '{node.name}' is too long ({func_lines} lines)",
-                                suggestion="Consider breaking this function into smaller functions",
-                                rule_id="long_function"
-                            ))
-            except:
-                pass
+            groups.update(self.engine.check_python(content, key))
         
-        return issues
+        result = AnalysisResult(file_path=key)
+        result.issues = [issue for group in RULE_GROUPS if group in groups for issue in groups[group]]
+        for plugin in self._plugins_for(file_path):
+            if plugin_issues is not None and plugin.name in plugin_issues:
+                issues = plugin_issues[plugin.name]
+            else:
+                issues = self._run_plugin(plugin, key, content)
+            self._merge_plugin_issues(result, plugin, issues)
+        result.metrics = self._calculate_metrics(line_counts, result.issues)
+        self.cache.put(key, _CachedAnalysis(content_hash, rule_set_version, lines, line_groups, line_counts, result))
+        return result
     
-    async def _check_complexity(self, content: str, file_path: Path) -> List[CodeIssue]:
-        """Check for complexity issues"""
-        issues = []
-        lines = content.split('\n')
+    @staticmethod
+    def _merge_plugin_issues(result: AnalysisResult, plugin, issues: List[CodeIssue]) -> None:
+        """Add a plugin's issues, dropping the built-in rules it supersedes"""
+        if plugin.replaces:
+            result.issues = [issue for issue in result.issues if issue.rule_id not in plugin.replaces]
+        result.issues.extend(sorted(issues, key=lambda issue: (issue.line_number, issue.column)))
+    
+    def apply_plugin_issues(self, result: AnalysisResult, plugin, issues: List[CodeIssue]) -> AnalysisResult:
+        """Merge batched plugin issues into a result produced without that plugin"""
+        self._merge_plugin_issues(result, plugin, issues)
+        line_counts = {name: result.metrics[name] for name in
+                       ("total_lines", "code_lines", "comment_lines", "blank_lines") if name in result.metrics}
+        result.metrics = self._calculate_metrics(line_counts, result.issues)
+        return result
+    
+    def _update_line_rules(self, cached: _CachedAnalysis, lines: List[str], file_path: str
+                           ) -> Optional[Tuple[Dict[str, List[CodeIssue]], Dict[str, int]]]:
+        """Re-run line rules on changed ranges only, shifting carried-over issues
         
-        for i, line in enumerate(lines, 1):
-            # Nested conditions
-            indent_level = len(line) - len(line.lstrip())
-            if indent_level > 16 and any(keyword in line for keyword in ['if', 'for', 'while', 'try']):
-                issues.append(CodeIssue(
-                    file_path=str(file_path),
-                    line_number=i,
-                    column=0,
-                    severity="suggestion",
-                    category="maintainability",
-                    message="High nesting level detected",
-                    suggestion="Consider extracting nested logic into separate functions",
-                    rule_id="high_nesting"
-                ))
+        Returns None when so much changed that a full pass is cheaper.
+        """
+        changes = _changed_ranges(cached.lines, lines)
+        if sum(j2 - j1 for _, _, j1, j2 in changes) * 2 > len(lines):
+            return None
+        
+        # Changed lines plus the line after each change, whose blank-line rule
+        # depends on its predecessor
+        dirty: List[List[int]] = []
+        for _, _, j1, j2 in changes:
+            start, end = j1, min(len(lines), j2 + 1)
+            if dirty and start <= dirty[-1][1]:
+                dirty[-1][1] = max(dirty[-1][1], end)
+            elif start < end:
+                dirty.append([start, end])
+        dirty_starts = [start for start, _ in dirty]
+        
+        # Unchanged old blocks as (old start, old end, shift)
+        unchanged: List[Tuple[int, int, int]] = []
+        old_pos = new_pos = 0
+        for i1, i2, j1, j2 in changes:
+            unchanged.append((old_pos, i1, new_pos - old_pos))
+            old_pos, new_pos = i2, j2
+        unchanged.append((old_pos, len(cached.lines), new_pos - old_pos))
+        block_starts = [start for start, _, _ in unchanged]
+        
+        def shifted(issue: CodeIssue) -> Optional[CodeIssue]:
+            old_index = issue.line_number - 1
+            block = unchanged[bisect.bisect_right(block_starts, old_index) - 1]
+            if not block[0] <= old_index < block[1]:
+                return None
+            new_index = old_index + block[2]
+            nearest = bisect.bisect_right(dirty_starts, new_index) - 1
+            if nearest >= 0 and new_index < dirty[nearest][1]:
+                return None
+            return issue if block[2] == 0 else replace(issue, line_number=new_index + 1)
+        
+        groups: Dict[str, List[CodeIssue]] = {}
+        for group, issues in cached.line_groups.items():
+            groups[group] = [moved for moved in map(shifted, issues) if moved is not None]
+        for start, end in dirty:
+            fresh, _ = self.engine.check_lines(lines, file_path, start, end)
+            for group, issues in fresh.items():
+                groups[group].extend(issues)
+        for issues in groups.values():
+            issues.sort(key=lambda issue: issue.line_number)
         
-        return issues
+        line_counts = Counter(cached.line_counts)
+        for i1, i2, j1, j2 in changes:
+            line_counts.subtract(_line_kinds(cached.lines[i1:i2]))
+            line_counts.update(_line_kinds(lines[j1:j2]))
+        line_counts["total_lines"] = len(lines)
+        return groups, dict(line_counts)
     
-    def _calculate_metrics(self, content: str, issues: List[CodeIssue]) -> Dict[str, Any]:
+    def _calculate_metrics(self, line_counts: Dict[str, int], issues: List[CodeIssue]) -> Dict[str, Any]:
         """Calculate code metrics"""
-        lines = content.split('\n')
+        severities = Counter(issue.severity for issue in issues)
         
         return {
-            "total_lines": len(lines),
-            "code_lines": len([line for line in lines if line.strip() and not line.strip().startswith('#')]),
-            "comment_lines": len([line for line in lines if line.strip().startswith('#')]),
-            "blank_lines": len([line for line in lines if not line.strip()]),
+            **line_counts,
             "total_issues": len(issues),
-            "errors": len([issue for issue in issues if issue.severity == "error"]),
-            "warnings": len([issue for issue in issues if issue.severity == "warning"]),
-            "suggestions": len([issue for issue in issues if issue.severity == "suggestion"]),
-            "info": len([issue for issue in issues if issue.severity == "info"]),
+            "errors": severities["error"],
+            "warnings": severities["warning"],
+            "suggestions": severities["suggestion"],
+            "info": severities["info"],
         }
 
 
-class FileWatcher(FileSystemEventHandler):
-    """Watches files for changes and triggers analysis"""
+_worker_analyzer: Optional[CodeAnalyzer] = None
+
+
+def _analyze_paths(paths: List[str]) -> List[AnalysisResult]:
+    """Analyze one chunk of files, reusing a single analyzer per worker process
+
+    Batched plugins are left to the parent, which runs them once over all files.
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        from .analyzer_plugins import available_plugins
+        _worker_analyzer = CodeAnalyzer([plugin for plugin in available_plugins() if not plugin.batched])
+    return [_worker_analyzer.analyze_path(Path(path)) for path in paths]
 
-    def __init__(self, analyzer: CodeAnalyzer, callback: Callable[[AnalysisResult], None], loop: asyncio.AbstractEventLoop = None):
+
+class FileWatcher(FileSystemEventHandler):
+    """Watches files for changes and analyzes them through one coalescing scheduler
+
+    Filesystem events only mark a path dirty (hopping from the watchdog thread
+    to the event loop with call_soon_threadsafe). A single scheduler task
+    waits until each dirty file has been quiet for debounce_time and then
+    analyzes ready files in batches on worker threads, with at most
+    max_in_flight batches running, so a burst such as a git checkout becomes
+    a bounded stream of batch analyses instead of one coroutine per event.
+    """
+
+    CODE_EXTENSIONS = {'.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.cs'}
+
+    def __init__(self, analyzer: CodeAnalyzer, callback: Callable[[AnalysisResult], None], loop: asyncio.AbstractEventLoop = None,
+                 removed_callback: Optional[Callable[[str], None]] = None,
+                 is_ignored: Optional[Callable[[str], bool]] = None,
+                 max_in_flight: int = 4, batch_size: int = 16):
         self.analyzer = analyzer
         self.callback = callback
+        self.removed_callback = removed_callback
+        self.is_ignored = is_ignored
         self.debounce_time = 1.0  # 1 second debounce
-        self.pending_files: Dict[str, float] = {}
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.pending_files: Dict[str, float] = {}  # dirty path -> time of its latest event
         self.loop = loop  # Store reference to the main event loop
+        self._in_flight: Set[str] = set()
+        self._scheduler: Optional[asyncio.Task] = None
+
+    def _wants(self, path: str) -> bool:
+        if Path(path).suffix not in self.CODE_EXTENSIONS:
+            return False
+        return not (self.is_ignored and self.is_ignored(path))
+
+    def _post(self, func: Callable, *args) -> None:
+        """Run func on the event loop; called from the watchdog thread"""
+        if self.loop and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(func, *args)
+            except RuntimeError as e:  # loop closed in the meantime
+                console.print(f"[red]Error scheduling analysis: {e}[/red]")
+        else:
+            console.print("[yellow]⚠️ Event loop not available for analysis[/yellow]")
+
+    def on_created(self, event):
+        if not event.is_directory and self._wants(event.src_path):
+            self._post(self._mark_dirty, event.src_path)
 
     def on_modified(self, event):
-        if isinstance(event, FileModifiedEvent) and not event.is_directory:
-            file_path = Path(event.src_path)
-
-            # Only analyze code files
-            if file_path.suffix in ['.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.cs']:
-                current_time = time.time()
-                self.pending_files[str(file_path)] = current_time
-
-                # Schedule analysis using the main event loop
-                if self.loop and not self.loop.is_closed():
-                    try:
-                        # Use run_coroutine_threadsafe to schedule from watchdog thread
-                        asyncio.run_coroutine_threadsafe(
-                            self._debounced_analysis(file_path, current_time),
-                            self.loop
-                        )
-                    except Exception as e:
-                        console.print(f"[red]Error scheduling analysis: {e}[/red]")
+        if isinstance(event, FileModifiedEvent) and not event.is_directory and self._wants(event.src_path):
+            self._post(self._mark_dirty, event.src_path)
+
+    def on_deleted(self, event):
+        self._post(self._mark_removed, event.src_path)
+
+    def on_moved(self, event):
+        self._post(self._mark_removed, event.src_path)
+        if not event.is_directory and self._wants(event.dest_path):
+            self._post(self._mark_dirty, event.dest_path)
+
+    def _mark_dirty(self, path: str) -> None:
+        self.pending_files[os.path.abspath(path)] = time.monotonic()
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.ensure_future(self._run_scheduler())
+
+    def _mark_removed(self, path: str) -> None:
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        for pending in [p for p in self.pending_files if p == path or p.startswith(prefix)]:
+            del self.pending_files[pending]
+        if self.removed_callback:
+            self.removed_callback(path)
+
+    async def _run_scheduler(self):
+        """Drain the dirty set in debounced, bounded batches"""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        running: Set[asyncio.Future] = set()
+
+        while True:
+            now = time.monotonic()
+            waiting = {path: t for path, t in self.pending_files.items() if path not in self._in_flight}
+            ready = [path for path, t in waiting.items() if now - t >= self.debounce_time]
+
+            if not ready:
+                if waiting:
+                    await asyncio.sleep(min(waiting.values()) + self.debounce_time - now)
+                elif running:
+                    # Everything dirty is being analyzed; re-check once a batch finishes
+                    await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
                 else:
-                    console.print("[yellow]⚠️ Event loop not available for analysis[/yellow]")
-    
-    async def _debounced_analysis(self, file_path: Path, trigger_time: float):
-        """Perform analysis after debounce period"""
-        await asyncio.sleep(self.debounce_time)
-        
-        # Check if this is still the latest trigger for this file
-        if self.pending_files.get(str(file_path)) == trigger_time:
-            try:
-                result = await self.analyzer.analyze_file(file_path)
+                    return
+                continue
+
+            for i in range(0, len(ready), self.batch_size):
+                await semaphore.acquire()
+                batch = [path for path in ready[i:i + self.batch_size] if path in self.pending_files]
+                for path in batch:
+                    del self.pending_files[path]
+                self._in_flight.update(batch)
+
+                task = asyncio.ensure_future(self._analyze_batch(batch))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+
+    def _analyze_paths(self, paths: List[str]) -> List[AnalysisResult]:
+        # Files deleted since their event are skipped; the delete event handles them
+        return self.analyzer.analyze_paths([Path(path) for path in paths if os.path.exists(path)])
+
+    async def _analyze_batch(self, paths: List[str]):
+        """Analyze one batch off the event loop and report each result"""
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(None, self._analyze_paths, paths)
+            for result in results:
                 self.callback(result)
-            except Exception as e:
-                console.print(f"[red]Error analyzing {file_path}: {e}[/red]")
-            finally:
-                # Clean up
-                self.pending_files.pop(str(file_path), None)
+        except Exception as e:
+            console.print(f"[red]Error analyzing {len(paths)} file(s): {e}[/red]")
+        finally:
+            self._in_flight.difference_update(paths)
+
+    def close(self):
+        """Stop the scheduler; pending changes are dropped"""
+        self.pending_files.clear()
+        if self._scheduler is not None and self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._scheduler.cancel)
 
 
 class RealTimeAnalysisEngine:
@@ -337,7 +696,8 @@ class RealTimeAnalysisEngine:
         self.workspace_path = Path(workspace_path)
         self.analyzer = CodeAnalyzer()
         self.observer = Observer()
-        self.results: Dict[str, AnalysisResult] = {}
+        # Counters are kept current as results are replaced, so summaries are O(1)
+        self.results = IssueStore(columnar=NUMPY_AVAILABLE)
         self.is_running = False
         self.live_display: Optional[Live] = None
         self.event_handler = None  # Store reference to event handler
@@ -358,8 +718,14 @@ class RealTimeAnalysisEngine:
             return
 
         # Setup file watcher with event loop reference
-        self.event_handler = FileWatcher(self.analyzer, self._on_analysis_result, loop)
+        scanner = WorkspaceScanner(str(self.workspace_path), extensions=FileWatcher.CODE_EXTENSIONS,
+                                   exclude_patterns=configured_exclude_patterns())
+        self.event_handler = FileWatcher(self.analyzer, self._on_analysis_result, loop,
+                                         removed_callback=self._on_file_removed,
+                                         is_ignored=scanner.is_ignored_path)
         self.observer.schedule(self.event_handler, str(self.workspace_path), recursive=True)
+        # The same observer keeps the workspace index current while watching
+        get_workspace_index(str(self.workspace_path)).start_watching(self.observer)
         self.observer.start()
         self.is_running = True
 
@@ -386,12 +752,16 @@ class RealTimeAnalysisEngine:
         console.print("⏹️ [cyan]Stopping real-time analysis...[/cyan]")
 
         try:
+            get_workspace_index(str(self.workspace_path)).stop_watching()
+
             # Stop the observer
             if self.observer.is_alive():
                 self.observer.stop()
                 self.observer.join(timeout=5.0)  # Wait max 5 seconds
 
             # Clean up references
+            if self.event_handler:
+                self.event_handler.close()
             self.event_handler = None
             self.is_running = False
 
@@ -418,15 +788,27 @@ class RealTimeAnalysisEngine:
             console.print(f"❌ [red]{len(errors)} error(s) found in {Path(result.file_path).name}[/red]")
             for error in errors[:3]:  # Show first 3 errors
                 console.print(f"   Line {error.line_number}: {error.message}")
+        self._update_live_display()
+    
+    def _on_file_removed(self, path: str):
+        """Forget results for a deleted or moved-away file or directory"""
+        prefix = path.rstrip(os.sep) + os.sep
+        for file_path in [p for p in self.results if p == path or p.startswith(prefix)]:
+            del self.results[file_path]
+            self.analyzer.cache.invalidate(file_path)
+        self._update_live_display()
     
     def _start_live_display(self):
         """Start live display of analysis results"""
-        def generate_display():
-            return self._create_summary_panel()
-        
-        self.live_display = Live(generate_display(), refresh_per_second=1, console=console)
+        self.live_display = Live(self._create_summary_panel(), refresh_per_second=2, console=console)
         self.live_display.start()
     
+    def _update_live_display(self):
+        """Rebuild the summary panel on the event loop, where results are changed"""
+        # Rich's refresh thread only redraws the finished panel; it must not read self.results
+        if self.live_display:
+            self.live_display.update(self._create_summary_panel())
+    
     def _create_summary_panel(self) -> Panel:
         """Create summary panel for live display"""
         if not self.results:
@@ -441,9 +823,8 @@ class RealTimeAnalysisEngine:
         
         for file_path, result in sorted(self.results.items()):
             file_name = Path(file_path).name
-            errors = len([i for i in result.issues if i.severity == "error"])
-            warnings = len([i for i in result.issues if i.severity == "warning"])
-            suggestions = len([i for i in result.issues if i.severity == "suggestion"])
+            counts = self.results.file_counts(file_path)
+            errors, warnings, suggestions = counts["error"], counts["warning"], counts["suggestion"]
             
             last_updated = time.strftime("%H:%M:%S", time.localtime(result.timestamp))
             
@@ -457,42 +838,161 @@ class RealTimeAnalysisEngine:
         
         return Panel(table, title="📊 Real-time Code Analysis", border_style="blue")
     
-    async def analyze_workspace(self) -> Dict[str, AnalysisResult]:
-        """Analyze all files in workspace"""
-        console.print("🔍 [cyan]Analyzing workspace...[/cyan]")
+    async def iter_workspace_analysis(self, code_files: Sequence[Path], max_workers: Optional[int] = None,
+                                      chunk_size: Optional[int] = None,
+                                      store: bool = True) -> AsyncIterator[AnalysisResult]:
+        """Analyze files in chunks on a process pool, yielding results as each chunk completes
+
+        With store=False results are only yielded, not kept in self.results.
+        """
+        if not code_files:
+            return
+        
+        loop = asyncio.get_running_loop()
+        workers = max_workers or os.cpu_count() or 1
+        paths = [str(path) for path in code_files]
+        if chunk_size is None:
+            # Several chunks per worker keep the cores busy when file sizes vary
+            chunk_size = max(1, min(MAX_CHUNK_FILES, -(-len(paths) // (workers * 4))))
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
         
-        code_files = []
-        for pattern in ["**/*.py", "**/*.js", "**/*.ts", "**/*.jsx", "**/*.tsx"]:
-            code_files.extend(self.workspace_path.glob(pattern))
+        pool = None
+        if workers > 1 and len(paths) >= MIN_PARALLEL_FILES:
+            try:
+                pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+            except (OSError, NotImplementedError) as e:
+                console.print(f"[yellow]⚠️ Process pool unavailable, analyzing in a background thread: {e}[/yellow]")
+        
+        # Submitting every chunk first forks all pool workers before any linter
+        # subprocess opens pipes they would inherit. Without a pool the chunks
+        # still run off the event loop, in the default executor.
+        pending = {
+            asyncio.ensure_future(self._analyze_chunk(loop, chunk, loop.run_in_executor(pool, _analyze_paths, chunk)))
+            for chunk in chunks
+        }
+        try:
+            while pending:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    results = future.result()
+                    if store:
+                        for result in results:
+                            self.results[result.file_path] = result
+                        self._update_live_display()
+                    for result in results:
+                        yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+    
+    async def _analyze_chunk(self, loop: asyncio.AbstractEventLoop, chunk: List[str],
+                             rules: asyncio.Future) -> List[AnalysisResult]:
+        """Run a chunk's batched linters (e.g. ruff) alongside its rule run, then merge them"""
+        plugin_runs = []
+        for plugin in self.analyzer.plugins:
+            targets = [path for path in chunk if Path(path).suffix in plugin.extensions]
+            if plugin.batched and targets:
+                plugin_runs.append((plugin, asyncio.ensure_future(
+                    loop.run_in_executor(None, plugin.check_files, targets)
+                )))
+        try:
+            try:
+                results = await rules
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); finish its chunk in-process
+                results = await loop.run_in_executor(None, _analyze_paths, chunk)
+            plugin_results = await self._collect_plugin_runs(plugin_runs)
+        finally:
+            rules.cancel()
+            for _, future in plugin_runs:
+                future.cancel()
+        for result in results:
+            for plugin, issues in plugin_results:
+                if Path(result.file_path).suffix in plugin.extensions:
+                    self.analyzer.apply_plugin_issues(result, plugin, issues.get(result.file_path, []))
+        return results
+    
+    @staticmethod
+    async def _collect_plugin_runs(plugin_runs: List[Tuple[Any, asyncio.Future]]) -> List[Tuple[Any, Dict[str, List[CodeIssue]]]]:
+        """Wait for batched plugin runs; a failed plugin leaves the built-in rules in place"""
+        collected = []
+        for plugin, future in plugin_runs:
+            try:
+                collected.append((plugin, await future))
+            except Exception as e:
+                console.print(f"[yellow]⚠️ {plugin.name} failed: {e}[/yellow]")
+        return collected
+    
+    async def _workspace_files(self, changed_since: Optional[str] = None) -> List[Path]:
+        """Indexed code files, largest first, optionally limited to those changed since a git ref"""
+        index = get_workspace_index(str(self.workspace_path)).ensure_fresh()
+        entries = index.files(WORKSPACE_EXTENSIONS)
+        if changed_since:
+            from .git_integration import GitAnalyzer
+            changed = await GitAnalyzer(str(self.workspace_path)).get_changed_files(changed_since)
+            changed = {Path(path).as_posix() for path in changed}
+            entries = [entry for entry in entries if entry.path in changed]
+        # Largest files first so the slowest chunks start early
+        entries = sorted(entries, key=lambda entry: entry.size, reverse=True)
+        return [Path(index.absolute_path(entry)) for entry in entries]
+    
+    def _progress(self, show_progress: bool) -> Progress:
+        return Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            console=console,
+            transient=True,
+            disable=not show_progress
+        )
+    
+    async def analyze_workspace(self, max_workers: Optional[int] = None, show_progress: bool = True,
+                                changed_since: Optional[str] = None) -> Dict[str, AnalysisResult]:
+        """Analyze all files in workspace, or only those changed since a git ref"""
+        console.print("🔍 [cyan]Analyzing workspace...[/cyan]")
+        code_files = await self._workspace_files(changed_since)
         
         results = {}
-        for file_path in code_files:
-            if file_path.is_file():
-                result = await self.analyzer.analyze_file(file_path)
-                results[str(file_path)] = result
-                self.results[str(file_path)] = result
+        with self._progress(show_progress) as progress:
+            task = progress.add_task("Analyzing files...", total=len(code_files))
+            async for result in self.iter_workspace_analysis(code_files, max_workers):
+                results[result.file_path] = result
+                progress.advance(task)
         
         console.print(f"✅ [green]Analyzed {len(results)} files[/green]")
         return results
     
+    async def export_workspace(self, stream: IO[str], fmt: str = "ndjson", changed_since: Optional[str] = None,
+                               max_workers: Optional[int] = None, show_progress: bool = True) -> Dict[str, Any]:
+        """Stream results to a text stream as NDJSON or SARIF as each file completes
+
+        Results are written and dropped rather than stored, so memory does
+        not grow with the number of files. Returns the writer's summary.
+        """
+        from .analysis_export import open_result_writer
+        
+        writer = open_result_writer(stream, fmt, self.workspace_path)
+        code_files = await self._workspace_files(changed_since)
+        with self._progress(show_progress) as progress:
+            task = progress.add_task(f"Exporting {fmt}...", total=len(code_files))
+            try:
+                async for result in self.iter_workspace_analysis(code_files, max_workers, store=False):
+                    writer.write(result)
+                    progress.advance(task)
+            finally:
+                writer.close()
+        return writer.summary()
+    
     def get_summary(self) -> Dict[str, Any]:
         """Get analysis summary"""
         if not self.results:
             return {}
         
-        total_issues = sum(len(result.issues) for result in self.results.values())
-        total_errors = sum(len([i for i in result.issues if i.severity == "error"]) for result in self.results.values())
-        total_warnings = sum(len([i for i in result.issues if i.severity == "warning"]) for result in self.results.values())
-        total_suggestions = sum(len([i for i in result.issues if i.severity == "suggestion"]) for result in self.results.values())
-        
-        return {
-            "files_analyzed": len(self.results),
-            "total_issues": total_issues,
-            "errors": total_errors,
-            "warnings": total_warnings,
-            "suggestions": total_suggestions,
-            "files_with_errors": len([r for r in self.results.values() if any(i.severity == "error" for i in r.issues)])
-        }
+        return self.results.summary()
 
 
 # Global instance
@@ -9,6 +9,8 @@ import re
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+from ..utils.outline import outline_service
+
 logger = logging.getLogger(__name__)
 
 class TextDocumentHandler:
@@ -212,9 +214,13 @@ class DiagnosticsHandler:
 class HoverHandler:
     """Provides AI-powered hover information"""
     
-    def __init__(self, server, llm_client):
+    # Memory session holding past hover questions and answers
+    MEMORY_SESSION = "lsp_hover"
+    
+    def __init__(self, server, llm_client, memory=None):
         self.server = server
         self.llm_client = llm_client
+        self.memory = memory
     
     async def provide_hover(self, params):
         """Provide hover information"""
@@ -241,7 +247,7 @@ class HoverHandler:
             if not word:
                 return None
             
-            hover_info = await self._generate_ai_hover(text, word, position.line)
+            hover_info = await self._generate_ai_hover(text, word, position.line, uri)
             
             if hover_info:
                 return {
@@ -282,25 +288,60 @@ class HoverHandler:
             "end": {"line": 0, "character": start_char + len(word)}
         }
     
-    async def _generate_ai_hover(self, text: str, word: str, line: int) -> Optional[str]:
+    def _symbol_context(self, text: str, word: str, line: int, uri: str) -> str:
+        """Definition and enclosing scope of a symbol, taken from the cached outline"""
+        language = outline_service.language_for(uri)
+        if not language:
+            return ""
+
+        outline = outline_service.get_outline(text, language)
+        lines = text.split('\n')
+        parts = []
+        for symbol in outline.find(word)[:2]:
+            # Signature plus a few body lines is enough to describe a definition
+            end = min(symbol.end_line, symbol.start_line + 5)
+            definition = '\n'.join(lines[symbol.start_line - 1:end])
+            parts.append(f"Defined as {symbol.kind} '{symbol.qualname}' "
+                         f"(lines {symbol.start_line}-{symbol.end_line}):\n{definition}")
+        enclosing = outline.symbol_at(line + 1)
+        if enclosing is not None and enclosing.name != word:
+            parts.append(f"Used inside {enclosing.kind} '{enclosing.qualname}'")
+        return '\n\n'.join(parts)
+
+    async def _generate_ai_hover(self, text: str, word: str, line: int, uri: str = "") -> Optional[str]:
         """Generate AI-powered hover information"""
         try:
             context_lines = text.split('\n')[max(0, line-3):line+4]
             context = '\n'.join(context_lines)
+            symbol_context = self._symbol_context(text, word, line, uri)
             
             prompt = f"""
             Explain the symbol '{word}' in the following code context:
             
             {context}
             
+            {symbol_context}
+            
             Provide a brief, helpful explanation in markdown format.
             """
             
-            response = await self.llm_client.achat_completion([
-                {"role": "user", "content": prompt}
-            ])
+            # Earlier explanations relevant to this symbol keep answers consistent
+            messages = []
+            if self.memory:
+                if self.memory.get_session_stats(self.MEMORY_SESSION) is None:
+                    self.memory.create_session(self.MEMORY_SESSION)
+                messages = self.memory.get_session_context(self.MEMORY_SESSION, query=prompt)
+            messages.append({"role": "user", "content": prompt})
+            
+            response = await self.llm_client.achat_completion(messages)
+            answer = response.strip()
+            
+            if self.memory:
+                location = f"{Path(uri).name}:{line + 1}" if uri else f"line {line + 1}"
+                self.memory.add_message(self.MEMORY_SESSION, "user", f"Explain '{word}' ({location})")
+                self.memory.add_message(self.MEMORY_SESSION, "assistant", answer)
             
-            return response.strip()
+            return answer
             
         except Exception as e:
             logger.error(f"AI hover generation error: {e}")
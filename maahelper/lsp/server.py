@@ -89,6 +89,7 @@ except ImportError:
 
 from ..core.llm_client import UnifiedLLMClient, create_llm_client
 from ..managers.streamlined_api_key_manager import api_key_manager
+from ..utils.memory_manager import get_memory_manager
 from .handlers import (
     TextDocumentHandler,
     CompletionHandler,
@@ -255,7 +256,7 @@ class MaaHelperLSPServer:
         self.document_handler = TextDocumentHandler(self.server)
         self.completion_handler = CompletionHandler(self.server, self.llm_client)
         self.diagnostics_handler = DiagnosticsHandler(self.server, self.llm_client)
-        self.hover_handler = HoverHandler(self.server, self.llm_client)
+        self.hover_handler = HoverHandler(self.server, self.llm_client, get_memory_manager())
         self.code_action_handler = CodeActionHandler(self.server, self.llm_client)
     
     def start_server(self, port: int = 2087):
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Bounded File Reader
+Memory-mapped head/tail/outline extraction so large files are never fully decoded
+"""
+
+import codecs
+import mmap
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+SAMPLE_BYTES = 64 * 1024
+COUNT_CHUNK_BYTES = 1024 * 1024
+
+# Declarations worth showing when only part of a file fits in the prompt
+OUTLINE_PATTERNS: Dict[str, "re.Pattern[bytes]"] = {
+    'python': re.compile(rb'^[ \t]*(?:async[ \t]+def|def|class)[ \t]+\w+[^\r\n]*', re.M),
+    'javascript': re.compile(
+        rb'^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?(?:function\*?|class)[ \t]+\w+[^\r\n]*', re.M
+    ),
+    'typescript': re.compile(
+        rb'^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:abstract[ \t]+)?(?:async[ \t]+)?'
+        rb'(?:function\*?|class|interface|enum|type)[ \t]+\w+[^\r\n]*', re.M
+    ),
+    'markdown': re.compile(rb'^#{1,6}[ \t][^\r\n]*', re.M),
+}
+# The keyword that makes an outline line a declaration ('def', 'class', 'function', ...)
+DECLARATION_KIND = re.compile(rb'\b(def|class|function|interface|enum|type)\b')
+
+
+@dataclass
+class FileWindows:
+    """The parts of a file that are actually used for display and prompts"""
+    path: str
+    size: int
+    encoding: str
+    line_count: int
+    head: str
+    tail: str = ""
+    outline: List[Tuple[int, str]] = field(default_factory=list)
+    # Declarations of the whole file by keyword, also past max_outline (truncated files only)
+    declarations: Dict[str, int] = field(default_factory=dict)
+    truncated: bool = False
+    is_binary: bool = False
+
+    def prompt_excerpt(self) -> str:
+        """Head of the file, plus outline and tail when the file was truncated"""
+        if not self.truncated:
+            return self.head
+
+        parts = [f"{self.head}..."]
+        if self.outline:
+            parts.append("\n\nOutline (line: declaration):")
+            parts.extend(f"\n{line}: {text}" for line, text in self.outline)
+        if self.tail:
+            parts.append(f"\n\nLast lines:\n...{self.tail}")
+        return ''.join(parts)
+
+
+def count_newlines(buffer, start: int = 0, end: Optional[int] = None) -> int:
+    """Count b'\\n' in a buffer range, one bounded chunk at a time"""
+    end = len(buffer) if end is None else end
+    count = 0
+    for offset in range(start, end, COUNT_CHUNK_BYTES):
+        count += buffer[offset:min(offset + COUNT_CHUNK_BYTES, end)].count(b'\n')
+    return count
+
+
+def detect_encoding(sample: bytes) -> Tuple[str, bool]:
+    """Detect encoding from a sample, returning (encoding, is_binary)"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig', False
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16', False
+
+    try:
+        # Incremental decoding tolerates a multi-byte character cut at the sample boundary
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8', b'\x00' in sample
+    except UnicodeDecodeError:
+        pass
+
+    if b'\x00' in sample:
+        return 'utf-8', True
+
+    try:
+        import chardet
+        encoding = chardet.detect(sample)['encoding']
+    except ImportError:
+        encoding = None
+    return encoding or 'latin-1', False
+
+
+def _decode(data: bytes, encoding: str) -> str:
+    return data.decode(encoding, errors='replace')
+
+
+def read_file_windows(path: str, head_chars: int = 4000, tail_chars: int = 1500,
+                      language: Optional[str] = None, max_outline: int = 200) -> FileWindows:
+    """Read only the head, tail and declaration outline of a file via mmap"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return FileWindows(path=path, size=0, encoding='utf-8', line_count=0, head="")
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        encoding, is_binary = detect_encoding(mm[:SAMPLE_BYTES])
+
+        line_count = count_newlines(mm)
+        if mm[size - 1:size] != b'\n':
+            line_count += 1
+
+        # Enough bytes for head_chars characters even if each one is 4 bytes wide
+        head_bytes = head_chars * 4
+        head = _decode(mm[:head_bytes], encoding)
+        truncated = size > head_bytes or len(head) > head_chars
+        head = head[:head_chars]
+
+        windows = FileWindows(
+            path=path, size=size, encoding=encoding, line_count=line_count,
+            head=head, truncated=truncated, is_binary=is_binary
+        )
+        if not truncated or is_binary:
+            return windows
+
+        tail_start = max(0, size - tail_chars * 4)
+        tail = _decode(mm[tail_start:], encoding)[-tail_chars:]
+        # Start the tail on a line boundary when there is one
+        newline = tail.find('\n')
+        windows.tail = tail[newline + 1:] if 0 <= newline < len(tail) - 1 else tail
+
+        pattern = OUTLINE_PATTERNS.get(language or '')
+        ascii_compatible = not encoding.lower().replace('-', '').startswith(('utf16', 'utf32'))
+        if pattern is not None and ascii_compatible:
+            line, last = 1, 0
+            for match in pattern.finditer(mm):
+                kind = DECLARATION_KIND.search(match.group(0))
+                if kind is not None:
+                    key = kind.group(1).decode('ascii')
+                    windows.declarations[key] = windows.declarations.get(key, 0) + 1
+                if len(windows.outline) < max_outline:
+                    line += count_newlines(mm, last, match.start())
+                    last = match.start()
+                    windows.outline.append((line, _decode(match.group(0), encoding).strip()))
+
+        return windows
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Chunked Analysis
+Map-reduce AI analysis of files larger than a single prompt window
+"""
+
+import ast
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config.config_manager import config_manager
+from .workspace_index import hash_content
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompts change so cached summaries are not reused across versions
+PROMPT_VERSION = 1
+
+MARKDOWN_HEADING = re.compile(r'^#{1,6}\s')
+
+# Merge rounds before the remaining summaries are truncated into one final prompt
+MAX_REDUCE_ROUNDS = 4
+
+
+@dataclass
+class FileChunk:
+    """A contiguous range of lines analyzed as one unit"""
+    index: int
+    start_line: int  # 1-based, inclusive
+    end_line: int
+    title: str
+    text: str
+
+    @property
+    def content_hash(self) -> str:
+        return hash_content(self.text.encode('utf-8', errors='replace'))
+
+
+@dataclass
+class MapReduceResult:
+    """Merged analysis plus per-chunk bookkeeping"""
+    summary: str
+    chunks: List[FileChunk]
+    chunk_summaries: List[str]
+    cached_chunks: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def _python_units(content: str, lines: List[str]) -> Optional[List[Tuple[int, int, str]]]:
+    """Top-level statements as (start, end, title), decorators included"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    units = []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+        end = getattr(node, 'end_lineno', None) or start
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            title = f"def {node.name}"
+        elif isinstance(node, ast.ClassDef):
+            title = f"class {node.name}"
+        else:
+            title = "module code"
+        units.append((start, end, title))
+
+    # Attach comments/blank lines between statements to the following unit
+    covered = []
+    next_start = 1
+    for start, end, title in units:
+        covered.append((next_start, end, title))
+        next_start = end + 1
+    if covered and next_start <= len(lines):
+        start, _, title = covered[-1]
+        covered[-1] = (start, len(lines), title)
+    return covered
+
+
+def _markdown_units(lines: List[str]) -> List[Tuple[int, int, str]]:
+    """Sections starting at each heading outside fenced code blocks"""
+    units = []
+    start, title, in_fence = 1, "preamble", False
+    for number, line in enumerate(lines, 1):
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+        if not in_fence and MARKDOWN_HEADING.match(line) and number > start:
+            units.append((start, number - 1, title))
+            start = number
+        if not in_fence and MARKDOWN_HEADING.match(line):
+            title = line.strip()
+    units.append((start, len(lines), title))
+    return units
+
+
+def split_into_chunks(content: str, language: str = "text", max_chars: int = 12000) -> List[FileChunk]:
+    """Split content along syntactic boundaries into chunks of at most ~max_chars"""
+    lines = content.splitlines(keepends=True)
+    if not lines:
+        return []
+
+    units = None
+    if language == 'python':
+        units = _python_units(content, lines)
+    elif language == 'markdown':
+        units = _markdown_units(lines)
+    if not units:
+        units = [(1, len(lines), "lines")]
+
+    chunks: List[FileChunk] = []
+    pending: List[Tuple[int, int, str]] = []
+    pending_chars = 0
+
+    def flush() -> None:
+        nonlocal pending, pending_chars
+        if not pending:
+            return
+        start, end = pending[0][0], pending[-1][1]
+        titles = [title for _, _, title in pending if title not in ("module code", "lines")]
+        title = ", ".join(titles[:3]) + (" ..." if len(titles) > 3 else "") if titles else f"lines {start}-{end}"
+        chunks.append(FileChunk(len(chunks), start, end, title, ''.join(lines[start - 1:end])))
+        pending, pending_chars = [], 0
+
+    for start, end, title in units:
+        size = sum(len(line) for line in lines[start - 1:end])
+        if size > max_chars:
+            # Oversized units fall back to fixed windows of whole lines
+            flush()
+            window_start, window_chars = start, 0
+            for number in range(start, end + 1):
+                line_chars = len(lines[number - 1])
+                if window_chars and window_chars + line_chars > max_chars:
+                    pending = [(window_start, number - 1, title)]
+                    flush()
+                    window_start, window_chars = number, 0
+                window_chars += line_chars
+            pending, pending_chars = [(window_start, end, title)], window_chars
+            continue
+
+        if pending_chars + size > max_chars:
+            flush()
+        pending.append((start, end, title))
+        pending_chars += size
+
+        # Content-defined cut points keep later chunk boundaries (and their cache
+        # entries) stable when an edit changes the size of an earlier unit
+        unit_hash = hash_content(''.join(lines[start - 1:end]).encode('utf-8', errors='replace'))
+        if pending_chars >= max_chars // 4 and int(unit_hash[:8], 16) % 4 == 0:
+            flush()
+
+    flush()
+    return chunks
+
+
+class ChunkSummaryCache:
+    """Chunk summaries keyed by content hash, in memory and optionally on disk"""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory: Dict[str, str] = {}
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}.json" if self.cache_dir else None
+
+    def get(self, key: str) -> Optional[str]:
+        if key in self._memory:
+            return self._memory[key]
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            summary = json.loads(path.read_text(encoding='utf-8'))['summary']
+        except (OSError, ValueError, KeyError):
+            return None
+        self._memory[key] = summary
+        return summary
+
+    def put(self, key: str, summary: str) -> None:
+        self._memory[key] = summary
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps({'summary': summary}), encoding='utf-8')
+        except OSError as e:
+            logger.debug(f"Could not cache chunk summary: {e}")
+
+
+class MapReduceAnalyzer:
+    """Analyzes chunks concurrently and merges the partial summaries"""
+
+    def __init__(self, llm_client, cache: Optional[ChunkSummaryCache] = None,
+                 max_concurrency: Optional[int] = None, chunk_chars: int = 12000):
+        self.llm_client = llm_client
+        self.cache = cache or ChunkSummaryCache()
+        self.max_concurrency = max_concurrency or config_manager.config.performance.max_concurrent_requests
+        self.chunk_chars = chunk_chars
+
+    def _cache_key(self, kind: str, text: str) -> str:
+        model = getattr(getattr(self.llm_client, 'config', None), 'model', '')
+        return hash_content(f"{PROMPT_VERSION}\0{kind}\0{model}\0{text}".encode('utf-8', errors='replace'))
+
+    async def _complete(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            return await self.llm_client.achat_completion([
+                {"role": "system", "content": "You are an expert code and document analyst. Be concise."},
+                {"role": "user", "content": prompt}
+            ])
+
+    async def _summarize_chunk(self, chunk: FileChunk, total: int, file_name: str,
+                               semaphore: asyncio.Semaphore) -> Tuple[str, bool]:
+        key = self._cache_key("map", chunk.text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        prompt = f"""This is part {chunk.index + 1} of {total} of {file_name} (lines {chunk.start_line}-{chunk.end_line}: {chunk.title}).
+Summarize what this part contains, its key functions/classes/sections, and any issues you notice.
+
+{chunk.text}"""
+        summary = (await self._complete(prompt, semaphore)).strip()
+        self.cache.put(key, summary)
+        return summary, False
+
+    async def _merge(self, group: List[str], file_name: str, semaphore: asyncio.Semaphore,
+                     final: bool) -> str:
+        joined = "\n\n".join(group)
+        key = self._cache_key("reduce-final" if final else "reduce", joined)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if final:
+            prompt = f"""Below are summaries of consecutive parts of {file_name}. Combine them into one analysis with:
+1. Brief summary of what the file contains
+2. Key functions/classes/components (if code)
+3. Main purpose and functionality
+4. Any issues or suggestions for improvement
+
+{joined}"""
+        else:
+            prompt = f"Merge these summaries of consecutive parts of {file_name} into one shorter summary:\n\n{joined}"
+        merged = (await self._complete(prompt, semaphore)).strip()
+        self.cache.put(key, merged)
+        return merged
+
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        """Consecutive summaries in groups of at most chunk_chars characters"""
+        groups: List[List[str]] = [[]]
+        size = 0
+        for summary in summaries:
+            if groups[-1] and size + len(summary) > self.chunk_chars:
+                groups.append([])
+                size = 0
+            groups[-1].append(summary)
+            size += len(summary)
+        return groups
+
+    def _truncate(self, summaries: List[str]) -> List[str]:
+        """Cut every summary to an equal share of one prompt"""
+        share = max(1, self.chunk_chars // len(summaries))
+        return [summary[:share] for summary in summaries]
+
+    async def _reduce(self, summaries: List[str], file_name: str, semaphore: asyncio.Semaphore,
+                      errors: List[str]) -> str:
+        # Merge in groups until the partial summaries fit in one prompt. If a
+        # round stops shrinking them (or there are too many rounds), they are
+        # truncated to fit instead. Failed merges keep their group unmerged.
+        size = sum(len(summary) for summary in summaries)
+        for _ in range(MAX_REDUCE_ROUNDS):
+            groups = self._group(summaries)
+            if len(groups) == 1:
+                break
+            results = await asyncio.gather(
+                *(self._merge(group, file_name, semaphore, False) for group in groups),
+                return_exceptions=True
+            )
+            summaries = []
+            for group, result in zip(groups, results):
+                if isinstance(result, Exception):
+                    errors.append(f"merging {len(group)} partial summaries: {result}")
+                    summaries.extend(group)
+                else:
+                    summaries.append(result)
+            merged_size = sum(len(summary) for summary in summaries)
+            if merged_size >= size:
+                break
+            size = merged_size
+
+        if len(self._group(summaries)) > 1:
+            summaries = self._truncate(summaries)
+        try:
+            return await self._merge(summaries, file_name, semaphore, True)
+        except Exception as e:
+            errors.append(f"final merge: {e}")
+            return "\n\n".join(summaries)
+
+    async def analyze(self, content: str, file_name: str, language: str = "text") -> MapReduceResult:
+        """Split, summarize each chunk concurrently, then merge"""
+        chunks = split_into_chunks(content, language, self.chunk_chars)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        results = await asyncio.gather(
+            *(self._summarize_chunk(chunk, len(chunks), file_name, semaphore) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        summaries: List[str] = []
+        errors: List[str] = []
+        cached = 0
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                errors.append(f"lines {chunk.start_line}-{chunk.end_line}: {result}")
+                summaries.append(f"(lines {chunk.start_line}-{chunk.end_line} could not be analyzed)")
+                continue
+            summary, from_cache = result
+            summaries.append(f"Lines {chunk.start_line}-{chunk.end_line} ({chunk.title}):\n{summary}")
+            cached += from_cache
+
+        summary = await self._reduce(summaries, file_name, semaphore, errors) if chunks else ""
+        return MapReduceResult(summary, chunks, summaries, cached, errors)
@@ -6,14 +6,19 @@ Manages conversation history with limits, cleanup, and optimization
 
 import time
 import json
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from dataclasses import dataclass, field, asdict
 from collections import deque
 from pathlib import Path
 
 from rich.console import Console
 
-console = Console()
+from ..config.config_manager import DEFAULT_MEMORY_BACKEND, config_manager
+from .semantic_memory import HashingVectorizer, SemanticMemoryIndex
+from .memory_store import SQLiteMemoryStore
+
+# Status messages go to stderr: the LSP server speaks JSON-RPC over stdout
+console = Console(stderr=True)
 
 
 @dataclass
@@ -50,6 +55,12 @@ class MemoryConfig:
     cleanup_interval_minutes: int = 30
     persist_to_disk: bool = True
     storage_path: str = ""
+    storage_backend: str = DEFAULT_MEMORY_BACKEND  # "json" (single process) or "sqlite" (shared across processes)
+    enable_semantic_retrieval: bool = True
+    retrieval_top_k: int = 4
+    retrieval_min_score: float = 0.2
+    retrieval_recent_messages: int = 4
+    embedding_dimensions: int = 1024
 
 
 class ConversationMemoryManager:
@@ -60,14 +71,39 @@ class ConversationMemoryManager:
         self.sessions: Dict[str, ConversationSession] = {}
         self.last_cleanup = time.time()
         
+        # Semantic indexes are built lazily per session and dropped whenever
+        # the session's message list is rewritten (trim, delete, cleanup)
+        self.vectorizer = HashingVectorizer(self.config.embedding_dimensions)
+        self._semantic_indexes: Dict[str, SemanticMemoryIndex] = {}
+        
+        # Shared store (sqlite backend) and listeners called with
+        # (session_id, kind) for changes made by other processes
+        self.store: Optional[SQLiteMemoryStore] = None
+        self._change_listeners: List[Callable[[str, str], None]] = []
+        
         # Setup storage
         if self.config.persist_to_disk and self.config.storage_path:
-            self.storage_path = Path(self.config.storage_path)
-            self.storage_path.mkdir(parents=True, exist_ok=True)
-            self._load_from_disk()
+            self._open_storage()
+    
+    def _open_storage(self) -> None:
+        """Open the configured storage and load the sessions already in it"""
+        self.storage_path = Path(self.config.storage_path)
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+        if self.config.storage_backend == "sqlite":
+            self.store = SQLiteMemoryStore(str(self.storage_path / "conversations.db"))
+        self._load_from_disk()
+    
+    def use_storage(self, storage_path: str, backend: str = "json") -> None:
+        """Switch to persisting in storage_path with the given backend (json or sqlite)"""
+        self.close()
+        self.config.persist_to_disk = True
+        self.config.storage_path = storage_path
+        self.config.storage_backend = backend
+        self._open_storage()
     
     def create_session(self, session_id: str, provider: str = "", model: str = "") -> ConversationSession:
         """Create a new conversation session"""
+        self.sync()
         if session_id in self.sessions:
             console.print(f"[yellow]⚠ Session {session_id} already exists, returning existing session[/yellow]")
             return self.sessions[session_id]
@@ -79,6 +115,8 @@ class ConversationMemoryManager:
         )
         
         self.sessions[session_id] = session
+        if self.store:
+            self.store.save_session(self._session_meta(session))
         self._maybe_cleanup()
         
         console.print(f"[green]✅ Created conversation session: {session_id}[/green]")
@@ -86,6 +124,7 @@ class ConversationMemoryManager:
     
     def add_message(self, session_id: str, role: str, content: str, tokens: int = 0, **metadata) -> bool:
         """Add a message to a conversation session"""
+        self.sync()
         if session_id not in self.sessions:
             console.print(f"[red]❌ Session {session_id} not found[/red]")
             return False
@@ -112,6 +151,13 @@ class ConversationMemoryManager:
         session.total_tokens += tokens
         session.last_activity = time.time()
         
+        index = self._semantic_indexes.get(session_id)
+        if index is not None:
+            index.add(len(session.messages) - 1, content)
+        
+        if self.store:
+            self.store.append_message(session_id, asdict(message), session.last_activity)
+        
         self._maybe_cleanup()
         self._maybe_persist()
         
@@ -119,6 +165,7 @@ class ConversationMemoryManager:
     
     def get_session_messages(self, session_id: str, limit: Optional[int] = None) -> List[ConversationMessage]:
         """Get messages from a session"""
+        self.sync()
         if session_id not in self.sessions:
             return []
         
@@ -127,11 +174,21 @@ class ConversationMemoryManager:
             return messages[-limit:]
         return messages
     
-    def get_session_context(self, session_id: str, max_tokens: Optional[int] = None) -> List[Dict[str, str]]:
-        """Get session context formatted for LLM API"""
+    def get_session_context(self, session_id: str, max_tokens: Optional[int] = None,
+                            query: Optional[str] = None) -> List[Dict[str, str]]:
+        """Get session context formatted for LLM API
+
+        When a query is given and semantic retrieval is enabled, only the last
+        few messages are sent verbatim and older turns are included only if
+        they are relevant to the query.
+        """
+        self.sync()
         if session_id not in self.sessions:
             return []
-        
+
+        if query and self.config.enable_semantic_retrieval:
+            return self._get_retrieval_context(session_id, query, max_tokens)
+
         session = self.sessions[session_id]
         context = []
         total_tokens = 0
@@ -146,13 +203,97 @@ class ConversationMemoryManager:
                 "content": message.content
             })
             total_tokens += message.tokens
-        
+
         return context
-    
+
+    def search_session(self, session_id: str, query: str,
+                       top_k: Optional[int] = None) -> List[Tuple[ConversationMessage, float]]:
+        """Find the messages in a session most similar to the query"""
+        self.sync()
+        if session_id not in self.sessions:
+            return []
+
+        session = self.sessions[session_id]
+        index = self._get_semantic_index(session_id)
+        hits = index.search(
+            query,
+            top_k=top_k or self.config.retrieval_top_k,
+            min_score=self.config.retrieval_min_score
+        )
+        return [(session.messages[position], score) for position, score in hits]
+
+    def _get_retrieval_context(self, session_id: str, query: str,
+                               max_tokens: Optional[int]) -> List[Dict[str, str]]:
+        """Build context from recent messages plus relevant older turns"""
+        session = self.sessions[session_id]
+        messages = session.messages
+        budget = max_tokens if max_tokens else float('inf')
+        selected: Dict[int, ConversationMessage] = {}
+        used_tokens = 0
+
+        def take(position: int) -> bool:
+            nonlocal used_tokens
+            if position in selected:
+                return True
+            message = messages[position]
+            if used_tokens + message.tokens > budget:
+                return False
+            selected[position] = message
+            used_tokens += message.tokens
+            return True
+
+        # System messages are always kept, as during trimming
+        for position, message in enumerate(messages):
+            if message.role == 'system':
+                take(position)
+
+        recent_start = max(0, len(messages) - self.config.retrieval_recent_messages)
+        for position in range(len(messages) - 1, recent_start - 1, -1):
+            if not take(position):
+                break
+
+        # Retrieve older turns; a hit on either side of a user/assistant
+        # exchange pulls in the whole turn so the answer keeps its question
+        index = self._get_semantic_index(session_id)
+        hits = index.search(
+            query,
+            top_k=self.config.retrieval_top_k,
+            min_score=self.config.retrieval_min_score,
+            exclude=set(range(recent_start, len(messages)))
+        )
+        for position, _score in hits:
+            turn = [position]
+            role = messages[position].role
+            if role == 'user' and position + 1 < recent_start and messages[position + 1].role == 'assistant':
+                turn.append(position + 1)
+            elif role == 'assistant' and position > 0 and messages[position - 1].role == 'user':
+                turn.insert(0, position - 1)
+
+            if sum(messages[p].tokens for p in turn if p not in selected) + used_tokens > budget:
+                continue
+            for p in turn:
+                take(p)
+
+        return [
+            {"role": message.role, "content": message.content}
+            for _position, message in sorted(selected.items())
+        ]
+
+    def _get_semantic_index(self, session_id: str) -> SemanticMemoryIndex:
+        """Get the semantic index for a session, building it if needed"""
+        index = self._semantic_indexes.get(session_id)
+        if index is None:
+            index = SemanticMemoryIndex(self.vectorizer)
+            for position, message in enumerate(self.sessions[session_id].messages):
+                index.add(position, message.content)
+            self._semantic_indexes[session_id] = index
+        return index
+
     def delete_session(self, session_id: str) -> bool:
         """Delete a conversation session"""
+        self.sync()
         if session_id in self.sessions:
-            del self.sessions[session_id]
+            self._remove_session(session_id)
             self._maybe_persist()
             console.print(f"[green]✅ Deleted session: {session_id}[/green]")
             return True
@@ -161,11 +302,15 @@ class ConversationMemoryManager:
     def clear_all_sessions(self) -> None:
         """Clear all conversation sessions"""
         self.sessions.clear()
+        self._semantic_indexes.clear()
+        if self.store:
+            self.store.clear()
         self._maybe_persist()
         console.print("[green]✅ Cleared all conversation sessions[/green]")
     
     def get_session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get statistics for a session"""
+        self.sync()
         if session_id not in self.sessions:
             return None
         
@@ -184,6 +329,7 @@ class ConversationMemoryManager:
     
     def get_global_stats(self) -> Dict[str, Any]:
         """Get global memory statistics"""
+        self.sync()
         total_messages = sum(len(session.messages) for session in self.sessions.values())
         total_tokens = sum(session.total_tokens for session in self.sessions.values())
         
@@ -215,6 +361,7 @@ class ConversationMemoryManager:
             # Update session
             session.messages = system_messages + recent_messages
             session.total_tokens = sum(msg.tokens for msg in session.messages)
+            self._on_messages_replaced(session)
             
             console.print(f"[yellow]⚠ Trimmed session {session.session_id} to {len(session.messages)} messages[/yellow]")
     
@@ -233,6 +380,7 @@ class ConversationMemoryManager:
                 # No non-system messages to remove
                 break
         
+        self._on_messages_replaced(session)
         console.print(f"[yellow]⚠ Trimmed session {session.session_id} to {session.total_tokens} tokens[/yellow]")
     
     def _maybe_cleanup(self) -> None:
@@ -262,7 +410,7 @@ class ConversationMemoryManager:
         
         # Remove old sessions
         for session_id in sessions_to_remove:
-            del self.sessions[session_id]
+            self._remove_session(session_id)
         
         if sessions_to_remove:
             console.print(f"[yellow]🧹 Cleaned up {len(sessions_to_remove)} old sessions[/yellow]")
@@ -295,14 +443,119 @@ class ConversationMemoryManager:
                 
                 total_messages -= len(session.messages)
                 total_tokens -= session.total_tokens
-                del self.sessions[session_id]
+                self._remove_session(session_id)
                 removed_count += 1
             
             if removed_count > 0:
                 console.print(f"[yellow]🧹 Removed {removed_count} sessions to enforce global limits[/yellow]")
     
+    def _remove_session(self, session_id: str) -> None:
+        """Drop a session from memory, its index and the shared store"""
+        del self.sessions[session_id]
+        self._semantic_indexes.pop(session_id, None)
+        if self.store:
+            self.store.delete_session(session_id)
+    
+    def _on_messages_replaced(self, session: ConversationSession) -> None:
+        """Invalidate derived state after a session's message list was rewritten"""
+        self._semantic_indexes.pop(session.session_id, None)
+        if self.store:
+            self.store.replace_messages(
+                session.session_id,
+                [asdict(message) for message in session.messages],
+                session.total_tokens
+            )
+    
+    def close(self) -> None:
+        """Release the shared store connection, if any"""
+        if self.store:
+            self.store.close()
+            self.store = None
+    
+    def add_change_listener(self, listener: Callable[[str, str], None]) -> None:
+        """Register a callback for sessions changed by other processes"""
+        self._change_listeners.append(listener)
+    
+    def sync(self) -> List[Tuple[str, str]]:
+        """Apply changes other processes made to the shared store
+        
+        Only the sessions named in the store's change log are touched, and for
+        plain appends only the new rows are read.
+        """
+        if not self.store or not self.store.has_changes():
+            return []
+        
+        applied = []
+        try:
+            for session_id, kind in self.store.fetch_changes():
+                if kind == "clear":
+                    self.sessions.clear()
+                    self._semantic_indexes.clear()
+                elif kind == "delete":
+                    self.sessions.pop(session_id, None)
+                    self._semantic_indexes.pop(session_id, None)
+                elif kind == "message" and session_id in self.sessions:
+                    session = self.sessions[session_id]
+                    index = self._semantic_indexes.get(session_id)
+                    for message_data in self.store.fetch_new_messages(session_id):
+                        message = ConversationMessage(**message_data)
+                        session.messages.append(message)
+                        session.total_tokens += message.tokens
+                        session.last_activity = max(session.last_activity, message.timestamp)
+                        if index is not None:
+                            index.add(len(session.messages) - 1, message.content)
+                else:
+                    # New or rewritten session: reload just this one
+                    session_data = self.store.load_session(session_id)
+                    self._semantic_indexes.pop(session_id, None)
+                    if session_data is None:
+                        self.sessions.pop(session_id, None)
+                    else:
+                        self.sessions[session_id] = self._session_from_dict(session_data)
+                applied.append((session_id, kind))
+        except Exception as e:
+            console.print(f"[red]❌ Error syncing conversations: {e}[/red]")
+        
+        for session_id, kind in applied:
+            for listener in self._change_listeners:
+                try:
+                    listener(session_id, kind)
+                except Exception as e:
+                    console.print(f"[red]❌ Error in memory change listener: {e}[/red]")
+        
+        return applied
+    
+    def _session_meta(self, session: ConversationSession) -> Dict[str, Any]:
+        """Session fields stored alongside (not inside) the message rows"""
+        return {
+            "session_id": session.session_id,
+            "created_at": session.created_at,
+            "last_activity": session.last_activity,
+            "total_tokens": session.total_tokens,
+            "provider": session.provider,
+            "model": session.model
+        }
+    
+    def _session_from_dict(self, session_data: Dict[str, Any]) -> ConversationSession:
+        """Rebuild a ConversationSession from stored data"""
+        return ConversationSession(
+            session_id=session_data["session_id"],
+            messages=[
+                ConversationMessage(**msg_data)
+                for msg_data in session_data.get("messages", [])
+            ],
+            created_at=session_data["created_at"],
+            last_activity=session_data["last_activity"],
+            total_tokens=session_data["total_tokens"],
+            provider=session_data.get("provider", ""),
+            model=session_data.get("model", "")
+        )
+    
     def _maybe_persist(self) -> None:
         """Persist to disk if configured"""
+        # The shared store is written incrementally at each mutation instead
+        if self.store:
+            return
         if self.config.persist_to_disk and self.config.storage_path:
             self._save_to_disk()
     
@@ -329,6 +582,12 @@ class ConversationMemoryManager:
     def _load_from_disk(self) -> None:
         """Load sessions from disk"""
         try:
+            if self.store:
+                for session_id, session_data in self.store.load_sessions().items():
+                    self.sessions[session_id] = self._session_from_dict(session_data)
+                console.print(f"[green]✅ Loaded {len(self.sessions)} conversation sessions from shared store[/green]")
+                return
+            
             storage_file = self.storage_path / "conversations.json"
             
             if not storage_file.exists():
@@ -339,23 +598,7 @@ class ConversationMemoryManager:
             
             # Restore sessions
             for session_id, session_data in data.get("sessions", {}).items():
-                # Convert messages back to ConversationMessage objects
-                messages = [
-                    ConversationMessage(**msg_data)
-                    for msg_data in session_data.get("messages", [])
-                ]
-                
-                session = ConversationSession(
-                    session_id=session_data["session_id"],
-                    messages=messages,
-                    created_at=session_data["created_at"],
-                    last_activity=session_data["last_activity"],
-                    total_tokens=session_data["total_tokens"],
-                    provider=session_data.get("provider", ""),
-                    model=session_data.get("model", "")
-                )
-                
-                self.sessions[session_id] = session
+                self.sessions[session_id] = self._session_from_dict(session_data)
             
             self.last_cleanup = data.get("last_cleanup", time.time())
             
@@ -367,3 +610,18 @@ class ConversationMemoryManager:
 
 # Global memory manager
 memory_manager = ConversationMemoryManager()
+_storage_configured = False
+
+
+def get_memory_manager() -> ConversationMemoryManager:
+    """The global memory manager, using the configured storage from first use on"""
+    global _storage_configured
+    if not _storage_configured:
+        _storage_configured = True
+        settings = config_manager.config.memory
+        if settings.persist_to_disk:
+            memory_manager.use_storage(
+                str(config_manager.get_memory_storage_path()),
+                settings.storage_backend
+            )
+    return memory_manager
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Shared Conversation Store
+SQLite-backed conversation storage that is safe for concurrent processes
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_activity REAL NOT NULL,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    provider TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Change log entries older than this are pruned when a store is opened
+CHANGE_LOG_RETENTION_SECONDS = 24 * 3600
+
+
+class SQLiteMemoryStore:
+    """Conversation store shared by all MaaHelper processes in a workspace
+
+    Every write is a small transaction plus an entry in a change log. Other
+    processes detect new commits through ``PRAGMA data_version`` (a cheap,
+    connection-local counter) and then read only the change log entries and
+    rows they have not seen, so no process ever reloads the whole store.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 10.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=busy_timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        self._last_seq = 0
+        self._data_version: Optional[int] = None
+        # Highest message id applied per session, and ids this process wrote
+        # itself but has not yet passed while syncing
+        self._last_message_ids: Dict[str, int] = {}
+        self._own_message_ids: set = set()
+
+        with self._transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM changes WHERE created_at < ?",
+                (time.time() - CHANGE_LOG_RETENTION_SECONDS,)
+            )
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction that takes the lock up front"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn.cursor()
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def _log_change(self, cursor: sqlite3.Cursor, session_id: str, kind: str) -> None:
+        cursor.execute(
+            "INSERT INTO changes (session_id, kind, origin, created_at) VALUES (?, ?, ?, ?)",
+            (session_id, kind, self.origin, time.time())
+        )
+
+    @staticmethod
+    def _message_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "role": row["role"],
+            "content": row["content"],
+            "timestamp": row["timestamp"],
+            "tokens": row["tokens"],
+            "metadata": json.loads(row["metadata"] or "{}")
+        }
+
+    def load_sessions(self) -> Dict[str, Dict[str, Any]]:
+        """Load every session with its messages (used once at startup)"""
+        with self._lock:
+            # Read everything from one snapshot so the change log position
+            # matches the rows returned
+            self._conn.execute("BEGIN")
+            try:
+                self._last_seq = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM changes"
+                ).fetchone()[0]
+                self._data_version = self._read_data_version()
+
+                sessions = {}
+                for row in self._conn.execute("SELECT * FROM sessions"):
+                    sessions[row["session_id"]] = {**dict(row), "messages": []}
+
+                for row in self._conn.execute("SELECT * FROM messages ORDER BY id"):
+                    session = sessions.get(row["session_id"])
+                    if session is not None:
+                        session["messages"].append(self._message_from_row(row))
+                    self._last_message_ids[row["session_id"]] = row["id"]
+            finally:
+                self._conn.execute("COMMIT")
+
+            return sessions
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a single session with its messages"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            session = {**dict(row), "messages": []}
+            last_id = 0
+            for message_row in self._conn.execute(
+                "SELECT * FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ):
+                session["messages"].append(self._message_from_row(message_row))
+                last_id = message_row["id"]
+            self._last_message_ids[session_id] = last_id
+            return session
+
+    def save_session(self, session_data: Dict[str, Any]) -> None:
+        """Insert or update session metadata"""
+        with self._transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO sessions (session_id, created_at, last_activity, total_tokens, provider, model) "
+                "VALUES (:session_id, :created_at, :last_activity, :total_tokens, :provider, :model) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_activity = excluded.last_activity, "
+                "total_tokens = excluded.total_tokens, provider = excluded.provider, model = excluded.model",
+                {key: session_data[key] for key in
+                 ("session_id", "created_at", "last_activity", "total_tokens", "provider", "model")}
+            )
+            self._log_change(cursor, session_data["session_id"], "session")
+
+    def append_message(self, session_id: str, message: Dict[str, Any],
+                       last_activity: float) -> None:
+        """Append one message and bump the session's counters"""
+        with self._transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO messages (session_id, role, content, timestamp, tokens, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, message["role"], message["content"], message["timestamp"],
+                 message["tokens"], json.dumps(message.get("metadata") or {}))
+            )
+            self._own_message_ids.add(cursor.lastrowid)
+            cursor.execute(
+                "UPDATE sessions SET last_activity = ?, total_tokens = total_tokens + ? "
+                "WHERE session_id = ?",
+                (last_activity, message["tokens"], session_id)
+            )
+            self._log_change(cursor, session_id, "message")
+
+    def replace_messages(self, session_id: str, messages: List[Dict[str, Any]],
+                         total_tokens: int) -> None:
+        """Rewrite a session's messages, e.g. after trimming"""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor.executemany(
+                "INSERT INTO messages (session_id, role, content, timestamp, tokens, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(session_id, m["role"], m["content"], m["timestamp"], m["tokens"],
+                  json.dumps(m.get("metadata") or {})) for m in messages]
+            )
+            cursor.execute(
+                "UPDATE sessions SET total_tokens = ? WHERE session_id = ?",
+                (total_tokens, session_id)
+            )
+            self._last_message_ids[session_id] = cursor.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            self._log_change(cursor, session_id, "replace")
+
+    def delete_session(self, session_id: str) -> None:
+        """Delete a session and its messages"""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._last_message_ids.pop(session_id, None)
+            self._log_change(cursor, session_id, "delete")
+
+    def clear(self) -> None:
+        """Delete all sessions"""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM messages")
+            cursor.execute("DELETE FROM sessions")
+            self._last_message_ids.clear()
+            self._log_change(cursor, "*", "clear")
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def has_changes(self) -> bool:
+        """Cheaply check whether another connection has committed since last sync"""
+        with self._lock:
+            return self._read_data_version() != self._data_version
+
+    def fetch_changes(self) -> List[Tuple[str, str]]:
+        """Return (session_id, kind) changes made by other processes since last sync"""
+        with self._lock:
+            self._data_version = self._read_data_version()
+            rows = self._conn.execute(
+                "SELECT seq, session_id, kind, origin FROM changes WHERE seq > ? ORDER BY seq",
+                (self._last_seq,)
+            ).fetchall()
+            if not rows:
+                return []
+            self._last_seq = rows[-1]["seq"]
+
+            changes: List[Tuple[str, str]] = []
+            for row in rows:
+                if row["origin"] == self.origin:
+                    continue
+                change = (row["session_id"], row["kind"])
+                # Bursts of appends to one session collapse into one change
+                if changes and changes[-1] == change:
+                    continue
+                changes.append(change)
+            return changes
+
+    def fetch_new_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return messages written by other processes that have not been seen yet"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM messages WHERE session_id = ? AND id > ? ORDER BY id",
+                (session_id, self._last_message_ids.get(session_id, 0))
+            ).fetchall()
+            messages = []
+            for row in rows:
+                self._last_message_ids[session_id] = row["id"]
+                if row["id"] in self._own_message_ids:
+                    self._own_message_ids.discard(row["id"])
+                    continue
+                messages.append(self._message_from_row(row))
+            return messages
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+File Outline Service
+Compact symbol tables (classes, functions, imports, line ranges) cached by content hash
+"""
+
+import ast
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config.config_manager import config_manager
+from .workspace_index import hash_content
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction changes so stale disk entries are ignored
+OUTLINE_VERSION = 2
+
+# Small files are cheaper to re-parse than to load from disk
+MIN_PERSIST_BYTES = 16 * 1024
+
+OUTLINE_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.md': 'markdown',
+}
+
+
+@dataclass
+class Symbol:
+    """A class, function, method or heading and the lines it spans"""
+    kind: str  # "class", "function", "method", "heading"
+    name: str
+    start_line: int
+    end_line: int
+    parent: Optional[str] = None
+    is_async: bool = False
+    level: int = 0  # Heading level for Markdown
+    def_line: int = 0  # Line of the def/class keyword itself, after decorators; 0 if unknown
+    column: int = 0
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+
+@dataclass
+class ImportRef:
+    """An imported module and the names taken from it"""
+    module: str
+    names: List[str]
+    line: int
+
+
+@dataclass
+class FileOutline:
+    """Symbol table for one version of a file"""
+    language: str
+    content_hash: str
+    line_count: int
+    symbols: List[Symbol] = field(default_factory=list)
+    imports: List[ImportRef] = field(default_factory=list)
+    code_blocks: List[Tuple[int, int]] = field(default_factory=list)
+    syntax_error: Optional[Tuple[int, int, str]] = None  # (line, column, message)
+
+    @property
+    def classes(self) -> List[Symbol]:
+        return [s for s in self.symbols if s.kind == "class"]
+
+    @property
+    def functions(self) -> List[Symbol]:
+        return [s for s in self.symbols if s.kind in ("function", "method")]
+
+    @property
+    def headings(self) -> List[Symbol]:
+        return [s for s in self.symbols if s.kind == "heading"]
+
+    def find(self, name: str) -> List[Symbol]:
+        """Symbols defined with the given name"""
+        return [s for s in self.symbols if s.name == name]
+
+    def symbol_at(self, line: int) -> Optional[Symbol]:
+        """Innermost symbol whose range contains a 1-based line"""
+        best = None
+        for symbol in self.symbols:
+            if symbol.start_line <= line <= symbol.end_line:
+                if best is None or symbol.start_line >= best.start_line:
+                    best = symbol
+        return best
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FileOutline':
+        return cls(
+            language=data['language'],
+            content_hash=data['content_hash'],
+            line_count=data['line_count'],
+            symbols=[Symbol(**s) for s in data.get('symbols', [])],
+            imports=[ImportRef(**i) for i in data.get('imports', [])],
+            code_blocks=[tuple(b) for b in data.get('code_blocks', [])],
+            syntax_error=tuple(data['syntax_error']) if data.get('syntax_error') else None
+        )
+
+
+class _PythonOutlineVisitor(ast.NodeVisitor):
+    """Collects definitions and imports in one traversal"""
+
+    def __init__(self):
+        self.symbols: List[Symbol] = []
+        self.imports: List[ImportRef] = []
+        self._stack: List[Tuple[str, str]] = []  # (kind, qualname)
+
+    def _add(self, node, kind: str, is_async: bool = False) -> None:
+        parent_kind, parent = self._stack[-1] if self._stack else (None, None)
+        if kind == "function" and parent_kind == "class":
+            kind = "method"
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        symbol = Symbol(kind, node.name, start, getattr(node, 'end_lineno', None) or node.lineno,
+                        parent=parent, is_async=is_async, def_line=node.lineno, column=node.col_offset)
+        self.symbols.append(symbol)
+        self._stack.append((symbol.kind, symbol.qualname))
+        self.generic_visit(node)
+        self._stack.pop()
+
+    def visit_ClassDef(self, node):
+        self._add(node, "class")
+
+    def visit_FunctionDef(self, node):
+        self._add(node, "function")
+
+    def visit_AsyncFunctionDef(self, node):
+        self._add(node, "function", is_async=True)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append(ImportRef(alias.name, [], node.lineno))
+
+    def visit_ImportFrom(self, node):
+        module = '.' * node.level + (node.module or '')
+        self.imports.append(ImportRef(module, [alias.name for alias in node.names], node.lineno))
+
+
+PY_DEF = re.compile(r'^([ \t]*)(async[ \t]+)?(def|class)[ \t]+(\w+)')
+PY_IMPORT = re.compile(r'^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import[ \t]+(.+)|import[ \t]+([\w., \t]+))')
+
+JS_SYMBOL = re.compile(
+    r'^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:abstract[ \t]+)?(?:async[ \t]+)?'
+    r'(?:(class|interface)[ \t]+(\w+)|function\*?[ \t]*(\w+)[ \t]*\('
+    r'|(?:const|let|var)[ \t]+(\w+)[ \t]*(?::[^=]+)?=[ \t]*(?:async[ \t]+)?(?:\([^)]*\)|\w+)[ \t]*(?::[^=]+)?=>)'
+)
+JS_METHOD = re.compile(r'^[ \t]+(?:static[ \t]+|async[ \t]+|public[ \t]+|private[ \t]+|protected[ \t]+)*'
+                       r'(?!if\b|for\b|while\b|switch\b|catch\b|return\b)(\w+)[ \t]*\([^)]*\)[ \t]*(?::[^{]+)?\{')
+JS_IMPORT = re.compile(r'''^[ \t]*import[ \t]+(?:(.+?)[ \t]+from[ \t]+)?['"]([^'"]+)['"]''')
+JS_REQUIRE = re.compile(r'''require\(\s*['"]([^'"]+)['"]\s*\)''')
+
+MD_HEADING = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t#]*$')
+
+
+def _python_outline(content: str, lines: List[str]) -> Tuple[List[Symbol], List[ImportRef], Optional[Tuple[int, int, str]]]:
+    try:
+        tree = ast.parse(content)
+    except SyntaxError as e:
+        symbols, imports = _python_outline_fallback(lines)
+        return symbols, imports, (e.lineno or 1, e.offset or 0, e.msg)
+    except ValueError as e:  # e.g. null bytes
+        symbols, imports = _python_outline_fallback(lines)
+        return symbols, imports, (1, 0, str(e))
+
+    visitor = _PythonOutlineVisitor()
+    visitor.visit(tree)
+    return visitor.symbols, visitor.imports, None
+
+
+def _python_outline_fallback(lines: List[str]) -> Tuple[List[Symbol], List[ImportRef]]:
+    """Indentation-based outline for code that does not parse (e.g. partial files)"""
+    symbols: List[Symbol] = []
+    imports: List[ImportRef] = []
+    open_blocks: List[Tuple[int, Symbol]] = []  # (indent, symbol)
+
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        indent = len(line) - len(line.lstrip())
+        while open_blocks and indent <= open_blocks[-1][0]:
+            open_blocks.pop()
+
+        match = PY_DEF.match(line)
+        if match:
+            parent = open_blocks[-1][1] if open_blocks else None
+            kind = "class" if match.group(3) == "class" else (
+                "method" if parent is not None and parent.kind == "class" else "function")
+            symbol = Symbol(kind, match.group(4), number, number,
+                            parent=parent.qualname if parent else None, is_async=bool(match.group(2)),
+                            def_line=number, column=indent)
+            symbols.append(symbol)
+            open_blocks.append((indent, symbol))
+
+        for _, symbol in open_blocks:
+            symbol.end_line = number
+
+        match = PY_IMPORT.match(line)
+        if match:
+            if match.group(1):
+                names = [n.strip().split(' as ')[0] for n in match.group(2).strip('()').split(',') if n.strip()]
+                imports.append(ImportRef(match.group(1), names, number))
+            else:
+                for module in match.group(3).split(','):
+                    if module.strip():
+                        imports.append(ImportRef(module.strip().split(' as ')[0].strip(), [], number))
+
+    return symbols, imports
+
+
+def _block_end(lines: List[str], start: int) -> int:
+    """Line where the brace block opened on/after start closes, skipping strings and comments"""
+    depth = 0
+    opened = False
+    in_block_comment = False
+    for number in range(start, len(lines) + 1):
+        line = lines[number - 1]
+        i = 0
+        quote = None
+        while i < len(line):
+            char = line[i]
+            if in_block_comment:
+                if line.startswith('*/', i):
+                    in_block_comment = False
+                    i += 1
+            elif quote:
+                if char == '\\':
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif line.startswith('//', i):
+                break
+            elif line.startswith('/*', i):
+                in_block_comment = True
+                i += 1
+            elif char in '\'"`':
+                quote = char
+            elif char == '{':
+                depth += 1
+                opened = True
+            elif char == '}':
+                depth -= 1
+                if opened and depth <= 0:
+                    return number
+            i += 1
+        if not opened and number > start and line.strip().endswith(';'):
+            return number
+    return len(lines) if opened else start
+
+
+def _js_outline(lines: List[str]) -> Tuple[List[Symbol], List[ImportRef]]:
+    symbols: List[Symbol] = []
+    imports: List[ImportRef] = []
+    classes: List[Symbol] = []
+
+    for number, line in enumerate(lines, 1):
+        match = JS_IMPORT.match(line)
+        if match:
+            names = re.findall(r'\w+', match.group(1) or '')
+            imports.append(ImportRef(match.group(2), [n for n in names if n not in ('as', 'type')], number))
+            continue
+        for module in JS_REQUIRE.findall(line):
+            imports.append(ImportRef(module, [], number))
+
+        is_async = bool(re.search(r'\basync\b', line))
+        match = JS_SYMBOL.match(line)
+        if match:
+            if match.group(2):
+                symbol = Symbol("class", match.group(2), number, _block_end(lines, number))
+                classes.append(symbol)
+            else:
+                name = match.group(3) or match.group(4)
+                symbol = Symbol("function", name, number, _block_end(lines, number), is_async=is_async)
+            symbols.append(symbol)
+            continue
+
+        owner = next((c for c in reversed(classes) if c.start_line < number <= c.end_line), None)
+        if owner is not None:
+            match = JS_METHOD.match(line)
+            if match:
+                symbols.append(Symbol("method", match.group(1), number, _block_end(lines, number),
+                                      parent=owner.name, is_async=is_async))
+
+    return symbols, imports
+
+
+def _markdown_outline(lines: List[str]) -> Tuple[List[Symbol], List[Tuple[int, int]]]:
+    headings: List[Symbol] = []
+    code_blocks: List[Tuple[int, int]] = []
+    fence_start: Optional[int] = None
+
+    for number, line in enumerate(lines, 1):
+        if line.lstrip().startswith('```'):
+            if fence_start is None:
+                fence_start = number
+            else:
+                code_blocks.append((fence_start, number))
+                fence_start = None
+            continue
+        if fence_start is not None:
+            continue
+        match = MD_HEADING.match(line)
+        if match:
+            headings.append(Symbol("heading", match.group(2), number, len(lines), level=len(match.group(1))))
+
+    # A section runs until the next heading of the same or a higher level
+    for i, heading in enumerate(headings):
+        for following in headings[i + 1:]:
+            if following.level <= heading.level:
+                heading.end_line = following.start_line - 1
+                break
+        parents = [h for h in headings[:i] if h.level < heading.level and h.end_line >= heading.start_line]
+        heading.parent = parents[-1].name if parents else None
+
+    return headings, code_blocks
+
+
+def extract_outline(content: str, language: str, content_hash: Optional[str] = None) -> FileOutline:
+    """Build the outline for content in the given language (no caching)"""
+    lines = content.splitlines()
+    outline = FileOutline(
+        language=language,
+        content_hash=content_hash or hash_content(content.encode('utf-8', errors='replace')),
+        line_count=len(lines)
+    )
+
+    if language == 'python':
+        outline.symbols, outline.imports, outline.syntax_error = _python_outline(content, lines)
+    elif language in ('javascript', 'typescript'):
+        outline.symbols, outline.imports = _js_outline(lines)
+    elif language == 'markdown':
+        outline.symbols, outline.code_blocks = _markdown_outline(lines)
+
+    return outline
+
+
+class OutlineService:
+    """Parses each distinct file content once and shares the outline
+
+    Outlines are keyed by (language, content hash), kept in a bounded
+    in-memory LRU and, when a cache directory is configured, as small JSON
+    files so that unchanged files are not re-parsed across sessions.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_memory_entries: int = 512):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, FileOutline]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def language_for(path: str) -> Optional[str]:
+        return OUTLINE_LANGUAGES.get(Path(path).suffix.lower())
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / key[:2] / f"{key}.json" if self.cache_dir else None
+
+    def _remember(self, key: str, outline: FileOutline) -> None:
+        with self._lock:
+            self._memory[key] = outline
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_outline(self, content: str, language: str) -> FileOutline:
+        """Outline for content, parsing only on a cache miss"""
+        content_hash = hash_content(content.encode('utf-8', errors='replace'))
+        key = hash_content(f"{OUTLINE_VERSION}\0{language}\0{content_hash}".encode())
+
+        with self._lock:
+            outline = self._memory.get(key)
+            if outline is not None:
+                self._memory.move_to_end(key)
+                return outline
+
+        disk_path = self._disk_path(key)
+        if disk_path is not None and len(content) >= MIN_PERSIST_BYTES and disk_path.exists():
+            try:
+                outline = FileOutline.from_dict(json.loads(disk_path.read_text(encoding='utf-8')))
+                self._remember(key, outline)
+                return outline
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.debug(f"Ignoring unreadable outline cache entry {disk_path}: {e}")
+
+        outline = extract_outline(content, language, content_hash)
+        self._remember(key, outline)
+
+        if disk_path is not None and len(content) >= MIN_PERSIST_BYTES:
+            try:
+                disk_path.parent.mkdir(parents=True, exist_ok=True)
+                disk_path.write_text(json.dumps(outline.to_dict(), separators=(',', ':')), encoding='utf-8')
+            except OSError as e:
+                logger.debug(f"Could not cache outline: {e}")
+
+        return outline
+
+    def outline_file(self, file_path: str) -> Optional[FileOutline]:
+        """Outline of a file on disk, or None for unsupported or unreadable files"""
+        language = self.language_for(file_path)
+        if language is None:
+            return None
+        try:
+            content = Path(file_path).read_text(encoding='utf-8', errors='replace')
+        except OSError:
+            return None
+        return self.get_outline(content, language)
+
+
+# Global outline service, shared by the file handler, analysis, LSP and workflows; its
+# disk cache follows the configuration directory (MAAHELPER_CONFIG_DIR, default ~/.maahelper)
+outline_service = OutlineService(cache_dir=config_manager.config_dir / "cache" / "outlines")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Semantic Retrieval Memory
+Lightweight local embeddings for retrieving relevant past conversation turns
+"""
+
+import re
+import math
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Hashable
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+_WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9]*|\d+")
+_CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Very common words carry no retrieval signal and only dilute the vectors
+_STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "do", "for",
+    "from", "has", "have", "how", "i", "if", "in", "is", "it", "me", "my", "of",
+    "on", "or", "so", "that", "the", "this", "to", "was", "we", "what", "when",
+    "which", "with", "you", "your",
+})
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimensions: int) -> Tuple[int, float]:
+    """Map a feature to a (bucket, sign) pair that is stable across processes"""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimensions, (1.0 if (value >> 63) & 1 else -1.0)
+
+
+class HashingVectorizer:
+    """Hashing-trick text vectorizer producing L2-normalised sparse vectors"""
+
+    def __init__(self, dimensions: int = 1024, use_bigrams: bool = True):
+        self.dimensions = dimensions
+        self.use_bigrams = use_bigrams
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split text into lowercase word tokens, breaking up identifiers"""
+        tokens = []
+        for word in _WORD_PATTERN.findall(text):
+            parts = _CAMEL_PATTERN.findall(word)
+            if len(parts) > 1:
+                tokens.append(word.lower())
+            tokens.extend(part.lower() for part in parts)
+        return [token for token in tokens if token not in _STOP_WORDS]
+
+    def transform(self, text: str) -> Dict[int, float]:
+        """Vectorize text into a sparse {bucket: weight} mapping"""
+        tokens = self.tokenize(text)
+        features = list(tokens)
+        if self.use_bigrams:
+            features.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+        counts: Dict[str, int] = {}
+        for feature in features:
+            counts[feature] = counts.get(feature, 0) + 1
+
+        vector: Dict[int, float] = {}
+        for feature, count in counts.items():
+            bucket, sign = _hash_feature(feature, self.dimensions)
+            # Sublinear term frequency keeps long messages from dominating
+            vector[bucket] = vector.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm == 0:
+            return {}
+        return {bucket: value / norm for bucket, value in vector.items() if value}
+
+
+class SemanticMemoryIndex:
+    """Cosine-similarity index over vectorized texts
+
+    Vectors are stored as rows of a NumPy matrix when NumPy is installed so a
+    query costs one matrix-vector product; otherwise sparse dot products are
+    used, which is still cheap for conversation-sized indexes.
+    """
+
+    def __init__(self, vectorizer: Optional[HashingVectorizer] = None):
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.keys: List[Hashable] = []
+        self._sparse: List[Dict[int, float]] = []
+        self._matrix = None
+        if NUMPY_AVAILABLE:
+            self._matrix = np.zeros((64, self.vectorizer.dimensions), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index a text under the given key"""
+        vector = self.vectorizer.transform(text)
+        row = len(self.keys)
+        self.keys.append(key)
+
+        if self._matrix is not None:
+            if row >= self._matrix.shape[0]:
+                grown = np.zeros((self._matrix.shape[0] * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._matrix[row] = 0.0
+            if vector:
+                self._matrix[row, list(vector.keys())] = list(vector.values())
+        else:
+            self._sparse.append(vector)
+
+    def clear(self) -> None:
+        """Remove all indexed entries"""
+        self.keys.clear()
+        self._sparse.clear()
+        if self._matrix is not None:
+            self._matrix[:] = 0.0
+
+    def search(self, query: str, top_k: int = 5, min_score: float = 0.0,
+               exclude: Optional[set] = None) -> List[Tuple[Hashable, float]]:
+        """Return up to top_k (key, score) pairs ordered by cosine similarity"""
+        if not self.keys or top_k <= 0:
+            return []
+
+        query_vector = self.vectorizer.transform(query)
+        if not query_vector:
+            return []
+
+        count = len(self.keys)
+        if self._matrix is not None:
+            dense = np.zeros(self.vectorizer.dimensions, dtype=np.float32)
+            dense[list(query_vector.keys())] = list(query_vector.values())
+            scores = self._matrix[:count] @ dense
+            candidates = min(count, top_k + len(exclude or ()))
+            if candidates < count:
+                order = np.argpartition(-scores, candidates - 1)[:candidates]
+            else:
+                order = np.arange(count)
+            ranked = sorted(((int(i), float(scores[i])) for i in order), key=lambda item: -item[1])
+        else:
+            ranked = sorted(
+                ((i, sum(weight * vector.get(bucket, 0.0) for bucket, weight in query_vector.items()))
+                 for i, vector in enumerate(self._sparse)),
+                key=lambda item: -item[1]
+            )
+
+        results = []
+        for row, score in ranked:
+            if score < min_score or len(results) >= top_k:
+                break
+            key = self.keys[row]
+            if exclude and key in exclude:
+                continue
+            results.append((key, score))
+        return results
@@ -18,6 +18,7 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.markdown import Markdown
 
 from ..core.llm_client import UnifiedLLMClient
+from .memory_manager import ConversationMemoryManager
 
 console = Console()
 
@@ -282,7 +283,8 @@ class ModernStreamingHandler:
 class ConversationManager:
     """Manages conversation history with Rich UI streaming support"""
     
-    def __init__(self, llm_client: UnifiedLLMClient, session_id: str = "default"):
+    def __init__(self, llm_client: UnifiedLLMClient, session_id: str = "default",
+                 memory: Optional[ConversationMemoryManager] = None):
         self.llm_client = llm_client
         self.session_id = session_id
         self.conversation_history = []
@@ -290,6 +292,19 @@ class ConversationManager:
         self.message_count = 0
         self.session_start_time = datetime.now()
         
+        # With a memory manager, prompts carry the recent turns plus the older
+        # turns relevant to the current message instead of the last 10 messages
+        self.memory = memory
+
+    def _ensure_memory_session(self) -> None:
+        """Create this conversation's memory session if it does not exist yet"""
+        if self.memory.get_session_stats(self.session_id) is None:
+            self.memory.create_session(
+                self.session_id,
+                provider=self.llm_client.config.provider,
+                model=self.llm_client.config.model
+            )
+    
     def add_message(self, role: str, content: str):
         """Add message to conversation history"""
         self.conversation_history.append({
@@ -313,6 +328,11 @@ class ConversationManager:
         
         # Add user message to history
         self.add_message("user", user_input)
+        token_counter = self.streaming_handler.token_counter
+        if self.memory:
+            self._ensure_memory_session()
+            self.memory.add_message(self.session_id, "user", user_input,
+                                    tokens=token_counter.count_tokens(user_input))
         
         # Prepare messages for API
         messages = []
@@ -322,17 +342,23 @@ class ConversationManager:
             messages.append({"role": "system", "content": system_prompt})
             
         # Add conversation history
-        for msg in self.conversation_history[-10:]:  # Keep last 10 messages
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
+        if self.memory:
+            messages.extend(self.memory.get_session_context(self.session_id, query=user_input))
+        else:
+            for msg in self.conversation_history[-10:]:  # Keep last 10 messages
+                messages.append({
+                    "role": msg["role"],
+                    "content": msg["content"]
+                })
         
         # Get AI response with streaming
         ai_response = await self.streaming_handler.stream_conversation(messages)
         
         # Add AI response to history
         self.add_message("assistant", ai_response)
+        if self.memory:
+            self.memory.add_message(self.session_id, "assistant", ai_response,
+                                    tokens=token_counter.count_tokens(ai_response))
         
         return ai_response
     
@@ -340,6 +366,8 @@ class ConversationManager:
         """Clear conversation history"""
         self.conversation_history = []
         self.message_count = 0
+        if self.memory:
+            self.memory.delete_session(self.session_id)
         
         console.print(Panel.fit(
             "[yellow]✨ Conversation history cleared[/yellow]",
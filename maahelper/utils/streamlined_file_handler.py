@@ -3,15 +3,21 @@
 Streamlined File Handler with File Search
 Optimized for directory structure display and file search with AI processing
 """
+import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator
 import json
-import aiofiles
 
 from rich.console import Console
 from rich.panel import Panel
-from rich.tree import Tree
+
+from .bounded_reader import FileWindows, read_file_windows
+from .chunked_analysis import ChunkSummaryCache, MapReduceAnalyzer
+from .outline import outline_service
+from .tree_renderer import DirectoryTreeRenderer
+from .workspace_scanner import WorkspaceScanner
+from .workspace_index import WorkspaceIndex, get_workspace_index, configured_exclude_patterns
 
 console = Console()
 
@@ -69,7 +75,9 @@ class StreamlinedFileHandler:
     def __init__(self, workspace_path: str = "."):
         self.workspace_path = Path(workspace_path).resolve()
         self.max_file_size = 50 * 1024 * 1024  # 50MB limit
-        
+        self.chunk_chars = 12000  # Characters per map-reduce chunk
+        self.max_map_reduce_size = 2 * 1024 * 1024  # Larger files use head/tail/outline only
+        self._chunk_cache = None
 
     def is_supported_file(self, filename: str) -> bool:
         """Check if file type is supported"""
@@ -81,25 +89,27 @@ class StreamlinedFileHandler:
         from pathlib import Path
         return self.SUPPORTED_EXTENSIONS.get(Path(filename).suffix, 'text')
 
+    def _get_scanner(self, workspace_path: str = None, extensions: list = None) -> WorkspaceScanner:
+        """Create a scanner honoring the configured exclude patterns and .gitignore"""
+        return WorkspaceScanner(
+            workspace_path or str(self.workspace_path),
+            extensions=extensions or list(self.SUPPORTED_EXTENSIONS.keys()),
+            exclude_patterns=configured_exclude_patterns()
+        )
+
+    def get_index(self, workspace_path: str = None) -> WorkspaceIndex:
+        """Shared workspace index, refreshed unless a watcher keeps it current"""
+        return get_workspace_index(workspace_path or str(self.workspace_path)).ensure_fresh()
+
+    def iter_workspace_files(self, workspace_path: str = None, extensions: list = None) -> Iterator[str]:
+        """Stream supported file paths from a single pass over the workspace"""
+        return self._get_scanner(workspace_path, extensions).iter_files()
+
     def scan_workspace(self, workspace_path: str = None, extensions: list = None) -> list:
         """Scan workspace for supported files"""
-        if workspace_path is None:
-            workspace_path = str(self.workspace_path)
-        
-        workspace = Path(workspace_path)
-        if not workspace.exists():
-            return []
-        
-        files = []
-        search_extensions = extensions or list(self.SUPPORTED_EXTENSIONS.keys())
-        
-        for ext in search_extensions:
-            pattern = f"**/*{ext}"
-            for file_path in workspace.glob(pattern):
-                if file_path.is_file():
-                    files.append(str(file_path))
-        
-        return files
+        index = self.get_index(workspace_path)
+        entries = index.files(extensions or list(self.SUPPORTED_EXTENSIONS.keys()))
+        return [index.absolute_path(entry) for entry in entries]
 
     def analyze_file(self, file_path: str) -> dict:
         """Analyze a single file"""
@@ -122,42 +132,25 @@ class StreamlinedFileHandler:
             }
         except Exception as e:
             return {"error": str(e)}
-    def show_directory_structure(self, max_depth: int = 3, show_files: bool = False) -> str:
-        """Show directory structure as a tree"""
+    def show_directory_structure(self, max_depth: int = 3, show_files: bool = False,
+                                 max_entries: int = 50) -> str:
+        """Show directory structure as a tree, streamed line by line"""
         try:
-            tree = Tree(f"📁 [bold blue]{self.workspace_path.name}[/bold blue]")
-            
-            def add_to_tree(current_path: Path, current_tree, depth: int):
-                if depth >= max_depth:
-                    return
-                
-                try:
-                    # Get items and sort them
-                    items = list(current_path.iterdir())
-                    dirs = [item for item in items if item.is_dir() and not item.name.startswith('.')]
-                    files = [item for item in items if item.is_file() and item.suffix in self.SUPPORTED_EXTENSIONS]
-                    
-                    # Add directories first
-                    for dir_path in sorted(dirs):
-                        dir_branch = current_tree.add(f"📁 [cyan]{dir_path.name}[/cyan]")
-                        add_to_tree(dir_path, dir_branch, depth + 1)
-                    
-                    # Add files if requested
-                    if show_files:
-                        for file_path in sorted(files):
-                            file_type = self.SUPPORTED_EXTENSIONS.get(file_path.suffix, 'unknown')
-                            icon = self._get_file_icon(file_type)
-                            current_tree.add(f"{icon} [green]{file_path.name}[/green] [dim]({file_type})[/dim]")
-                            
-                except PermissionError:
-                    current_tree.add("[red]❌ Permission denied[/red]")
-                except Exception as e:
-                    current_tree.add(f"[red]❌ Error: {str(e)}[/red]")
-            
-            add_to_tree(self.workspace_path, tree, 0)
+            # Reuse the workspace index if it is already built; never walk the whole tree here
+            index = get_workspace_index(str(self.workspace_path))
+            renderer = DirectoryTreeRenderer(
+                str(self.workspace_path),
+                languages=self.SUPPORTED_EXTENSIONS,
+                icon_for=self._get_file_icon,
+                max_depth=max_depth,
+                show_files=show_files,
+                max_entries=max_entries,
+                exclude_patterns=configured_exclude_patterns(),
+                index=index if index.has_snapshot else None
+            )
             
             console.print()
-            console.print(tree)
+            renderer.render(console)
             console.print()
             
             return "Directory structure displayed above."
@@ -206,13 +199,17 @@ class StreamlinedFileHandler:
             if file_path.stat().st_size > self.max_file_size:
                 return f"❌ File too large: {filepath} (max 50MB)"
 
-            # Read and process file
-            content = await self._read_file_content(file_path)
-            if not content:
+            # Read only the windows used below; large files are never fully decoded
+            file_info = self._get_file_info(file_path)
+            windows = await self._read_file_windows(file_path, file_info['type'])
+            if windows is None or not windows.head:
                 return f"❌ Could not read file: {filepath}"
+            if not windows.is_binary:
+                file_info['lines'] = windows.line_count
+            file_info['truncated'] = windows.truncated
+            file_info['declarations'] = windows.declarations
 
             # Show file info
-            file_info = self._get_file_info(file_path)
             stat = file_path.stat()
             console.print(Panel.fit(
                 f"[bold green]📁 File: {file_path.name}[/bold green]\n"
@@ -238,13 +235,19 @@ class StreamlinedFileHandler:
 File: {file_path.name}
 Type: {file_info['type']}
 Content:
-{content[:4000]}{'...' if len(content) > 4000 else ''}"""
+{windows.prompt_excerpt()}"""
 
             # Built-in analysis based on actual content
+            content = windows.head + ('\n' + windows.tail if windows.tail else '')
             analysis_result = self._analyze_file_content(content, file_info)
 
+            # Files beyond the prompt window are analyzed chunk by chunk and merged
+            if (windows.truncated and not windows.is_binary and hasattr(llm_client, 'achat_completion')
+                    and file_info['size'] <= self.max_map_reduce_size):
+                await self._map_reduce_analysis(file_path, windows, file_info, llm_client)
+
             # Check if we have a real LLM client
-            if hasattr(llm_client, 'stream_completion'):
+            elif hasattr(llm_client, 'stream_completion'):
                 console.print("🔍 [bold cyan]AI Analysis:[/bold cyan]")
                 try:
                     # Use streaming for real-time response
@@ -272,23 +275,36 @@ Content:
             console.print(error_msg)
             return error_msg
 
-    async def _read_file_content(self, file_path: Path) -> Optional[str]:
-        """Read file content with encoding detection"""
+    async def _map_reduce_analysis(self, file_path: Path, windows: FileWindows,
+                                   file_info: Dict[str, Any], llm_client) -> None:
+        """Analyze a large file in syntactic chunks and show the merged result"""
+        from rich.markdown import Markdown
+
+        if self._chunk_cache is None:
+            self._chunk_cache = ChunkSummaryCache(self.workspace_path / ".maahelper" / "analysis_cache")
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+            None, lambda: file_path.read_bytes().decode(windows.encoding, errors='replace')
+        )
+        analyzer = MapReduceAnalyzer(llm_client, cache=self._chunk_cache, chunk_chars=self.chunk_chars)
+
+        with console.status(f"🧩 Analyzing {file_path.name} in chunks..."):
+            result = await analyzer.analyze(content, file_path.name, file_info['type'])
+
+        console.print(f"[dim]Analyzed {len(result.chunks)} chunks "
+                      f"({result.cached_chunks} unchanged, reused from cache)[/dim]")
+        for error in result.errors:
+            console.print(f"[yellow]⚠️ Chunk failed: {error}[/yellow]")
+        console.print(Panel(Markdown(result.summary), title="🔍 AI Analysis", border_style="cyan"))
+
+    async def _read_file_windows(self, file_path: Path, file_type: str) -> Optional[FileWindows]:
+        """Read the head, tail and outline of a file with encoding detection"""
         try:
-            # Try UTF-8 first
-            try:
-                async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                    return await f.read()
-            except UnicodeDecodeError:
-                # Fallback to chardet for encoding detection
-                import chardet
-                with open(file_path, 'rb') as f:
-                    raw_data = f.read()
-                    encoding = chardet.detect(raw_data)['encoding']
-                    if encoding:
-                        return raw_data.decode(encoding)
-                    else:
-                        return raw_data.decode('utf-8', errors='ignore')
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, lambda: read_file_windows(str(file_path), language=file_type)
+            )
         except Exception as e:
             console.print(f"[red]Error reading file {file_path}: {e}[/red]")
             return None
@@ -304,20 +320,11 @@ Content:
             if file_path.suffix in self.SUPPORTED_EXTENSIONS:
                 file_type = self.SUPPORTED_EXTENSIONS[file_path.suffix]
 
-            # Count lines for text files
-            lines = 0
-            if file_type in ['python', 'javascript', 'typescript', 'text', 'markdown']:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        lines = sum(1 for _ in f)
-                except:
-                    lines = 0
-
             return {
                 'type': file_type,
                 'size': file_size,
                 'size_human': self._format_file_size(file_size),
-                'lines': lines if lines > 0 else None
+                'lines': None
             }
         except Exception as e:
             return {
@@ -345,23 +352,26 @@ Content:
         analysis = []
 
         # Basic statistics
-        lines = content.count('\n') + 1
-        words = len(content.split())
-        chars = len(content)
-
+        lines = file_info.get('lines') or content.count('\n') + 1
         analysis.append(f"**File Statistics:**")
         analysis.append(f"- Lines: {lines:,}")
-        analysis.append(f"- Words: {words:,}")
-        analysis.append(f"- Characters: {chars:,}")
+        if file_info.get('truncated'):
+            # Only the head and tail windows were read, so per-word counts would mislead
+            analysis.append(f"- Analyzed: {len(content):,} characters from the start and end of the file")
+        else:
+            analysis.append(f"- Words: {len(content.split()):,}")
+            analysis.append(f"- Characters: {len(content):,}")
         analysis.append(f"- Size: {file_info['size_human']}")
 
         # Content analysis based on file type
         file_type = file_info.get('type', 'unknown')
+        # Truncated files: count declarations over the whole file, not just the windows
+        declarations = file_info.get('declarations') if file_info.get('truncated') else None
 
         if file_type == 'python':
-            analysis.extend(self._analyze_python_content(content))
+            analysis.extend(self._analyze_python_content(content, declarations))
         elif file_type in ['javascript', 'typescript']:
-            analysis.extend(self._analyze_js_content(content))
+            analysis.extend(self._analyze_js_content(content, file_type, declarations))
         elif file_type == 'json':
             analysis.extend(self._analyze_json_content(content))
         elif file_type == 'markdown':
@@ -371,46 +381,57 @@ Content:
 
         return '\n'.join(analysis)
 
-    def _analyze_python_content(self, content: str) -> List[str]:
+    def _analyze_python_content(self, content: str, declarations: Optional[Dict[str, int]] = None) -> List[str]:
         """Analyze Python file content"""
         analysis = []
-
-        # Count imports, functions, classes
-        import_count = content.count('import ') + content.count('from ')
-        function_count = content.count('def ')
-        class_count = content.count('class ')
+        outline = outline_service.get_outline(content, 'python')
 
         analysis.append(f"\n**Python Analysis:**")
-        analysis.append(f"- Imports: {import_count}")
-        analysis.append(f"- Functions: {function_count}")
-        analysis.append(f"- Classes: {class_count}")
+        if declarations is None:
+            analysis.append(f"- Imports: {len(outline.imports)}")
+            analysis.append(f"- Functions: {len(outline.functions)}")
+            analysis.append(f"- Classes: {len(outline.classes)}")
+        else:
+            analysis.append(f"- Imports: {len(outline.imports)} (in the analyzed start and end)")
+            analysis.append(f"- Functions: {declarations.get('def', 0):,} (declaration scan)")
+            analysis.append(f"- Classes: {declarations.get('class', 0):,} (declaration scan)")
 
         # Check for common patterns
-        if 'async def' in content:
+        if any(symbol.is_async for symbol in outline.functions):
             analysis.append("- Contains async functions")
         if '__main__' in content:
             analysis.append("- Has main execution block")
         if 'try:' in content:
             analysis.append("- Uses exception handling")
+        if outline.syntax_error:
+            analysis.append(f"- Does not parse (line {outline.syntax_error[0]}: {outline.syntax_error[2]})")
 
         return analysis
 
-    def _analyze_js_content(self, content: str) -> List[str]:
+    def _analyze_js_content(self, content: str, language: str = 'javascript',
+                            declarations: Optional[Dict[str, int]] = None) -> List[str]:
         """Analyze JavaScript/TypeScript content"""
         analysis = []
+        outline = outline_service.get_outline(content, language)
 
-        function_count = content.count('function ') + content.count('=>')
         const_count = content.count('const ')
         let_count = content.count('let ')
 
         analysis.append(f"\n**JavaScript/TypeScript Analysis:**")
-        analysis.append(f"- Functions: {function_count}")
-        analysis.append(f"- Constants: {const_count}")
-        analysis.append(f"- Variables: {let_count}")
+        if declarations is None:
+            analysis.append(f"- Classes: {len(outline.classes)}")
+            analysis.append(f"- Functions: {len(outline.functions)}")
+            analysis.append(f"- Constants: {const_count}")
+            analysis.append(f"- Variables: {let_count}")
+        else:
+            analysis.append(f"- Classes: {declarations.get('class', 0):,} (declaration scan)")
+            analysis.append(f"- Functions: {declarations.get('function', 0):,} (declaration scan)")
+            analysis.append(f"- Constants: {const_count} (in the analyzed start and end)")
+            analysis.append(f"- Variables: {let_count} (in the analyzed start and end)")
 
-        if 'import ' in content:
+        if outline.imports:
             analysis.append("- Uses ES6 imports")
-        if 'async ' in content:
+        if any(symbol.is_async for symbol in outline.functions):
             analysis.append("- Contains async functions")
 
         return analysis
@@ -440,15 +461,14 @@ Content:
     def _analyze_markdown_content(self, content: str) -> List[str]:
         """Analyze Markdown content"""
         analysis = []
+        outline = outline_service.get_outline(content, 'markdown')
 
-        heading_count = content.count('#')
-        link_count = content.count('[')
-        code_block_count = content.count('```')
+        link_count = content.count('](')
 
         analysis.append(f"\n**Markdown Analysis:**")
-        analysis.append(f"- Headings: {heading_count}")
+        analysis.append(f"- Headings: {len(outline.headings)}")
         analysis.append(f"- Links: {link_count}")
-        analysis.append(f"- Code blocks: {code_block_count // 2}")
+        analysis.append(f"- Code blocks: {len(outline.code_blocks)}")
 
         return analysis
 
@@ -508,28 +528,20 @@ Content:
         supported_files = []
 
         try:
-            # Search for supported files
-            for ext in self.SUPPORTED_EXTENSIONS.keys():
-                pattern = f"**/*{ext}"
-                for file_path in self.workspace_path.glob(pattern):
-                    if file_path.is_file() and len(supported_files) < max_files:
-                        try:
-                            stat = file_path.stat()
-                            file_info = {
-                                'path': str(file_path),
-                                'name': file_path.name,
-                                'type': self.SUPPORTED_EXTENSIONS.get(file_path.suffix, 'unknown'),
-                                'size': stat.st_size,
-                                'size_human': self._format_file_size(stat.st_size),
-                                'modified': datetime.fromtimestamp(stat.st_mtime),
-                                'extension': file_path.suffix
-                            }
-                            supported_files.append(file_info)
-                        except (OSError, PermissionError):
-                            continue
-
-            # Sort by modification time (newest first)
-            supported_files.sort(key=lambda x: x['modified'], reverse=True)
+            index = self.get_index()
+            # Newest first, answered from the index without touching the files
+            entries = sorted(index.files(self.SUPPORTED_EXTENSIONS.keys()),
+                             key=lambda entry: entry.mtime_ns, reverse=True)
+            for entry in entries[:max_files]:
+                supported_files.append({
+                    'path': index.absolute_path(entry),
+                    'name': entry.name,
+                    'type': entry.language or 'unknown',
+                    'size': entry.size,
+                    'size_human': self._format_file_size(entry.size),
+                    'modified': datetime.fromtimestamp(entry.mtime),
+                    'extension': entry.extension
+                })
 
         except Exception as e:
             console.print(f"[red]Error listing files: {e}[/red]")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Directory Tree Renderer
+Depth-first, line-by-line directory tree output with per-directory entry caps
+"""
+
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from rich.console import Console
+from rich.markup import escape
+
+from .workspace_index import WorkspaceIndex, file_extension
+from .workspace_scanner import IgnoreMatcher, WorkspaceScanner
+
+BRANCH, LAST_BRANCH = "├── ", "└── "
+PIPE, SPACE = "│   ", "    "
+
+
+class DirectoryTreeRenderer:
+    """Streams a directory tree one line at a time
+
+    Only directories within max_depth are listed. Each listing comes from a
+    single os.scandir call (entry types come from the directory itself), or
+    from an already built workspace index when one is supplied, and lines are
+    yielded as soon as their directory has been read.
+    """
+
+    def __init__(self, root: str, languages: Dict[str, str], icon_for: Callable[[str], str],
+                 max_depth: int = 3, show_files: bool = False, max_entries: int = 50,
+                 max_lines: int = 1000, exclude_patterns: Optional[List[str]] = None,
+                 index: Optional[WorkspaceIndex] = None):
+        self.root = os.path.abspath(root)
+        self.languages = languages
+        self.icon_for = icon_for
+        self.max_depth = max_depth
+        self.show_files = show_files
+        self.max_entries = max_entries
+        self.max_lines = max_lines
+        self.index = index
+        self.scanner = WorkspaceScanner(self.root, extensions=languages.keys(),
+                                        exclude_patterns=exclude_patterns)
+        self._index_children: Optional[Dict[str, Tuple[List[str], List[str]]]] = None
+
+    def _index_listing(self, rel: str) -> Tuple[List[str], List[str]]:
+        if self._index_children is None:
+            children: Dict[str, Tuple[List[str], List[str]]] = {}
+            for directory in self.index.directories:
+                parent, _, name = directory.rpartition('/')
+                children.setdefault(parent, ([], []))[0].append(name)
+            if self.show_files:
+                for entry in self.index.files(self.languages.keys()):
+                    parent, _, name = entry.path.rpartition('/')
+                    children.setdefault(parent, ([], []))[1].append(name)
+            self._index_children = children
+        return self._index_children.get(rel, ([], []))
+
+    def _list(self, path: str, rel: str, matcher: Optional[IgnoreMatcher]
+              ) -> Tuple[List[Tuple[str, Optional[IgnoreMatcher]]], List[str]]:
+        """Sorted (subdirectory, matcher) pairs and file names of one directory"""
+        if self.index is not None:
+            dirs, files = self._index_listing(rel)
+            subdirs = [(name, None) for name in dirs]
+        else:
+            file_entries, subdir_specs, _ = self.scanner.scan_directory(path, rel, matcher)
+            subdirs = [(os.path.basename(child_path), child_matcher)
+                       for child_path, _, child_matcher in subdir_specs]
+            files = [entry.name for entry in file_entries] if self.show_files else []
+
+        subdirs = sorted((item for item in subdirs if not item[0].startswith('.')), key=lambda item: item[0])
+        return subdirs, sorted(files)
+
+    def _file_line(self, name: str) -> str:
+        file_type = self.languages.get(file_extension(name), 'unknown')
+        return f"{self.icon_for(file_type)} [green]{escape(name)}[/green] [dim]({file_type})[/dim]"
+
+    def _walk(self, path: str, rel: str, matcher: Optional[IgnoreMatcher],
+              prefix: str, depth: int) -> Iterator[str]:
+        subdirs, files = self._list(path, rel, matcher)
+        entries: List[Tuple[str, bool, Optional[IgnoreMatcher]]] = [
+            (name, True, child_matcher) for name, child_matcher in subdirs
+        ]
+        if self.show_files:
+            entries.extend((name, False, None) for name in files)
+
+        shown = entries[:self.max_entries]
+        remaining = len(entries) - len(shown)
+
+        for i, (name, is_dir, child_matcher) in enumerate(shown):
+            last = i == len(shown) - 1 and not remaining
+            connector = LAST_BRANCH if last else BRANCH
+            if not is_dir:
+                yield f"{prefix}{connector}{self._file_line(name)}"
+                continue
+
+            yield f"{prefix}{connector}📁 [cyan]{escape(name)}[/cyan]"
+            if depth + 1 < self.max_depth:
+                child_rel = f"{rel}/{name}" if rel else name
+                yield from self._walk(os.path.join(path, name), child_rel, child_matcher,
+                                      prefix + (SPACE if last else PIPE), depth + 1)
+
+        if remaining:
+            yield f"{prefix}{LAST_BRANCH}[dim]… {remaining} more[/dim]"
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield the header and then each tree line in depth-first order"""
+        yield f"📁 [bold blue]{escape(os.path.basename(self.root) or self.root)}[/bold blue]"
+        if self.max_depth <= 0:
+            return
+
+        matcher = None if self.index is not None else self.scanner.root_matcher()
+        for count, line in enumerate(self._walk(self.root, '', matcher, '', 0), 1):
+            if count > self.max_lines:
+                yield f"[dim]… output truncated after {self.max_lines} lines[/dim]"
+                return
+            yield line
+
+    def render(self, console: Console) -> int:
+        """Print lines as they are produced, returning how many were printed"""
+        printed = 0
+        for line in self.iter_lines():
+            console.print(line, highlight=False)
+            printed += 1
+        return printed
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Workspace Index
+Persistent file index kept current by stat-diffing or watchdog events
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from ..config.config_manager import config_manager
+from .workspace_scanner import WorkspaceScanner, DEFAULT_EXCLUDE_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "workspace_index.json"
+
+
+def hash_content(data: bytes) -> str:
+    """Content hash used for index entries and downstream caches"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_extension(name: str) -> str:
+    """Extension of a file name, treating dotfiles like '.env' as their own extension"""
+    ext = os.path.splitext(name)[1]
+    return ext or (name if name.startswith('.') else '')
+
+
+@dataclass
+class IndexedFile:
+    """A single file known to the workspace index"""
+    path: str  # relative to the workspace root, '/' separated
+    size: int
+    mtime_ns: int
+    language: Optional[str] = None
+    content_hash: Optional[str] = None
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit('/', 1)[-1]
+
+    @property
+    def extension(self) -> str:
+        return file_extension(self.name)
+
+
+@dataclass
+class IndexDelta:
+    """Changes found by a refresh"""
+    added: List[str]
+    modified: List[str]
+    removed: List[str]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+class _IndexEventHandler(FileSystemEventHandler):
+    """Applies watchdog events to the index"""
+
+    def __init__(self, index: 'WorkspaceIndex'):
+        self.index = index
+
+    def on_created(self, event):
+        self.index._apply_event(event.src_path, event.is_directory)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.index._apply_event(event.src_path, False)
+
+    def on_deleted(self, event):
+        self.index._apply_event(event.src_path, event.is_directory, deleted=True)
+
+    def on_moved(self, event):
+        self.index._apply_event(event.src_path, event.is_directory, deleted=True)
+        self.index._apply_event(event.dest_path, event.is_directory)
+
+
+class WorkspaceIndex:
+    """Index of every non-ignored file in a workspace
+
+    Entries record path, size, mtime and language; content hashes are computed
+    on first request and kept until the file's size or mtime changes. The index
+    is persisted to index_path (default: .maahelper/workspace_index.json in
+    the root) and brought up to date either by refresh() (one scandir pass,
+    stat-diffed against the stored entries) or continuously by a watchdog
+    observer.
+    """
+
+    def __init__(self, root: str, languages: Optional[Dict[str, str]] = None,
+                 exclude_patterns: Optional[List[str]] = None, persist: bool = True,
+                 index_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.languages = languages or {}
+        self.exclude_patterns = DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns
+        self.persist = persist
+        self.index_path = index_path or os.path.join(self.root, ".maahelper", INDEX_FILENAME)
+
+        self.entries: Dict[str, IndexedFile] = {}
+        self.directories: Set[str] = set()
+        self.last_refresh: Optional[float] = None
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+        self._stale = True
+        self._observer: Optional[Observer] = None
+        self._owns_observer = False
+        self._watch = None
+        self._scanner = WorkspaceScanner(self.root, exclude_patterns=self.exclude_patterns)
+
+    @property
+    def is_watching(self) -> bool:
+        return self._observer is not None
+
+    @property
+    def has_snapshot(self) -> bool:
+        """Whether the index has been built in this process and can be read without a walk"""
+        return self.last_refresh is not None
+
+    def _language_for(self, name: str) -> Optional[str]:
+        return self.languages.get(file_extension(name))
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    # Persistence
+
+    def load(self) -> None:
+        """Load the persisted index, if any"""
+        with self._lock:
+            self._loaded = True
+            if not self.persist or not os.path.exists(self.index_path):
+                return
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") != INDEX_VERSION:
+                    return
+                self.entries = {
+                    path: IndexedFile(path, size, mtime_ns, self._language_for(path), content_hash)
+                    for path, (size, mtime_ns, content_hash) in data.get("files", {}).items()
+                }
+                self.directories = set(data.get("directories", []))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable workspace index {self.index_path}: {e}")
+                self.entries = {}
+                self.directories = set()
+
+    def save(self) -> None:
+        """Write the index atomically if it changed"""
+        with self._lock:
+            if not self.persist or not self._dirty:
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "files": {
+                    path: [entry.size, entry.mtime_ns, entry.content_hash]
+                    for path, entry in self.entries.items()
+                },
+                "directories": sorted(self.directories),
+            }
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save workspace index: {e}")
+
+    # Updating
+
+    def refresh(self) -> IndexDelta:
+        """Bring the index up to date with one stat-diffing pass over the workspace
+
+        The lock is held for the whole pass, so watcher updates arriving
+        meanwhile are applied to the new entries rather than lost in the swap.
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            previous = self.entries
+
+            entries: Dict[str, IndexedFile] = {}
+            directories: Set[str] = set()
+            added: List[str] = []
+            modified: List[str] = []
+
+            for entry in self._scanner.iter_entries(include_dirs=True):
+                rel = self._rel(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    directories.add(rel)
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                old = previous.get(rel)
+                if old is not None and old.size == stat.st_size and old.mtime_ns == stat.st_mtime_ns:
+                    entries[rel] = old
+                    continue
+
+                entries[rel] = IndexedFile(rel, stat.st_size, stat.st_mtime_ns, self._language_for(entry.name))
+                (modified if old is not None else added).append(rel)
+
+            removed = [path for path in previous if path not in entries]
+            delta = IndexDelta(added, modified, removed)
+
+            if delta.changed or directories != self.directories:
+                self._dirty = True
+            self.entries = entries
+            self.directories = directories
+            self._stale = False
+            self.last_refresh = time.time()
+
+        self.save()
+        return delta
+
+    def ensure_fresh(self) -> 'WorkspaceIndex':
+        """Refresh unless a watcher is already keeping the index current"""
+        if not self.is_watching or self._stale:
+            self.refresh()
+        return self
+
+    def update_file(self, path: str) -> Optional[IndexedFile]:
+        """Re-stat a single file and update its entry"""
+        rel = self._rel(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove_path(path)
+            return None
+
+        with self._lock:
+            old = self.entries.get(rel)
+            if old is not None and old.size == stat.st_size and old.mtime_ns == stat.st_mtime_ns:
+                return old
+            entry = IndexedFile(rel, stat.st_size, stat.st_mtime_ns, self._language_for(rel))
+            self.entries[rel] = entry
+            parent = rel.rpartition('/')[0]
+            while parent and parent not in self.directories:
+                self.directories.add(parent)
+                parent = parent.rpartition('/')[0]
+            self._dirty = True
+            return entry
+
+    def remove_path(self, path: str) -> None:
+        """Drop a file or a whole directory subtree from the index"""
+        rel = self._rel(path)
+        prefix = rel + '/'
+        with self._lock:
+            removed = self.entries.pop(rel, None) is not None
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+                removed = True
+            if rel in self.directories:
+                self.directories = {d for d in self.directories if d != rel and not d.startswith(prefix)}
+                removed = True
+            if removed:
+                self._dirty = True
+
+    def _apply_event(self, path: str, is_directory: bool, deleted: bool = False) -> None:
+        try:
+            if deleted:
+                self.remove_path(path)
+            elif is_directory:
+                # Files moved or copied in with a directory may not raise events of their own
+                self._stale = True
+            elif not self._scanner.is_ignored_path(path):
+                self.update_file(path)
+        except Exception as e:
+            logger.debug(f"Workspace index event for {path} failed: {e}")
+
+    # Watching
+
+    def start_watching(self, observer: Optional[Observer] = None) -> bool:
+        """Keep the index current from filesystem events instead of re-scanning
+
+        An already running observer (e.g. the real-time analysis one) can be
+        shared; it is then left running by stop_watching().
+        """
+        with self._lock:
+            if self._observer is not None:
+                return True
+            owns_observer = observer is None
+            try:
+                if owns_observer:
+                    observer = Observer()
+                    observer.daemon = True
+                self._watch = observer.schedule(_IndexEventHandler(self), self.root, recursive=True)
+                if owns_observer:
+                    observer.start()
+            except Exception as e:
+                logger.warning(f"Could not watch {self.root} for index updates: {e}")
+                return False
+            self._observer = observer
+            self._owns_observer = owns_observer
+            # Events before the observer started were missed
+            self._stale = True
+            return True
+
+    def stop_watching(self) -> None:
+        """Stop receiving events and persist the index"""
+        with self._lock:
+            observer, self._observer = self._observer, None
+        if observer is not None:
+            try:
+                if self._owns_observer:
+                    observer.stop()
+                    observer.join(timeout=5)
+                else:
+                    observer.unschedule(self._watch)
+            except Exception as e:
+                logger.debug(f"Error stopping workspace index watcher: {e}")
+        self.save()
+
+    # Queries
+
+    def files(self, extensions: Optional[Iterable[str]] = None) -> List[IndexedFile]:
+        """Indexed files, optionally filtered by extension, sorted by path"""
+        wanted = set(extensions) if extensions is not None else None
+        with self._lock:
+            entries = list(self.entries.values())
+        if wanted is not None:
+            entries = [entry for entry in entries if entry.extension in wanted]
+        entries.sort(key=lambda entry: entry.path)
+        return entries
+
+    def get(self, path: str) -> Optional[IndexedFile]:
+        """Look up an entry by absolute or workspace-relative path"""
+        rel = self._rel(path) if os.path.isabs(path) else path.replace(os.sep, '/')
+        with self._lock:
+            return self.entries.get(rel)
+
+    def absolute_path(self, entry: IndexedFile) -> str:
+        return os.path.join(self.root, *entry.path.split('/'))
+
+    def content_hash(self, path: str) -> Optional[str]:
+        """Content hash of an indexed file, computed once per size/mtime"""
+        entry = self.get(path)
+        if entry is None:
+            return None
+        if entry.content_hash is not None:
+            return entry.content_hash
+
+        try:
+            with open(self.absolute_path(entry), 'rb') as f:
+                digest = hash_content(f.read())
+        except OSError:
+            return None
+
+        with self._lock:
+            if self.entries.get(entry.path) is entry:
+                entry.content_hash = digest
+                self._dirty = True
+        return digest
+
+
+_indexes: Dict[str, WorkspaceIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def configured_exclude_patterns() -> List[str]:
+    """Default exclude patterns merged with the user's file handler configuration"""
+    exclude_patterns = list(DEFAULT_EXCLUDE_PATTERNS)
+    for pattern in config_manager.config.file_handler.exclude_patterns:
+        if pattern not in exclude_patterns:
+            exclude_patterns.append(pattern)
+    return exclude_patterns
+
+
+def default_index_path(root: str) -> str:
+    """Index file for root: in its .maahelper directory if it is a workspace, else in the user cache
+
+    Directories that are merely scanned (project paths of workflow steps,
+    subdirectories) never get a .maahelper directory of their own.
+    """
+    workspace_dir = os.path.join(root, ".maahelper")
+    if os.path.isdir(workspace_dir):
+        return os.path.join(workspace_dir, INDEX_FILENAME)
+    digest = hashlib.blake2b(root.encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(str(config_manager.config_dir), "cache", "workspace_index", f"{digest}.json")
+
+
+def get_workspace_index(root: str = ".") -> WorkspaceIndex:
+    """Shared index for a workspace, using the file handler's languages and exclude patterns"""
+    from .streamlined_file_handler import StreamlinedFileHandler
+
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = WorkspaceIndex(
+                key,
+                languages=StreamlinedFileHandler.SUPPORTED_EXTENSIONS,
+                exclude_patterns=configured_exclude_patterns(),
+                index_path=default_index_path(key)
+            )
+            _indexes[key] = index
+        return index
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Workspace Scanner
+Single-pass, ignore-aware directory walker built on os.scandir
+"""
+
+import os
+import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_EXCLUDE_PATTERNS = [
+    '__pycache__', '.git', '.hg', '.svn', '.vscode', '.idea', 'node_modules',
+    '.pytest_cache', '.mypy_cache', '.ruff_cache', '.tox', '.nox', '.venv',
+    'venv', '.maahelper', '*.egg-info'
+]
+
+
+def _translate_gitignore_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex.append('/.*')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append(f'[{body}]')
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+
+class GitIgnoreRules:
+    """Rules from a single .gitignore file, relative to the directory holding it"""
+
+    def __init__(self, base: str, lines: Iterable[str]):
+        self.base = base  # '' for the workspace root, otherwise 'a/b'
+        self.rules: List[Tuple[re.Pattern, bool, bool, bool]] = []
+
+        for raw_line in lines:
+            line = raw_line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            # A slash anywhere but the end anchors the pattern to this directory
+            anchored = '/' in line
+            line = line.lstrip('/')
+            regex = re.compile(_translate_gitignore_glob(line) + r'\Z')
+            self.rules.append((regex, negate, dir_only, anchored))
+
+    @classmethod
+    def from_file(cls, base: str, path: str) -> Optional['GitIgnoreRules']:
+        """Load rules from a .gitignore file, returning None if unreadable or empty"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                rules = cls(base, f)
+        except OSError:
+            return None
+        return rules if rules.rules else None
+
+    def match(self, rel_path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """Return True (ignored), False (re-included) or None (no rule matched)"""
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+
+        result = None
+        for regex, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path if anchored else name):
+                result = not negate
+        return result
+
+
+class IgnoreMatcher:
+    """Exclude patterns plus the stack of .gitignore files above a directory"""
+
+    def __init__(self, exclude_patterns: Optional[List[str]] = None,
+                 gitignores: Tuple[GitIgnoreRules, ...] = ()):
+        self.exclude_patterns = list(exclude_patterns or [])
+        self.gitignores = gitignores
+
+    def with_gitignore(self, rules: Optional[GitIgnoreRules]) -> 'IgnoreMatcher':
+        """Return a matcher that also applies the given .gitignore rules"""
+        if rules is None:
+            return self
+        return IgnoreMatcher(self.exclude_patterns, self.gitignores + (rules,))
+
+    def is_ignored(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """Check whether a path relative to the workspace root is ignored"""
+        for pattern in self.exclude_patterns:
+            if name == pattern or fnmatch(name, pattern):
+                return True
+
+        ignored = False
+        # Deeper .gitignore files take precedence over shallower ones
+        for rules in self.gitignores:
+            result = rules.match(rel_path, name, is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+
+
+class WorkspaceScanner:
+    """Walks a workspace once, pruning ignored directories as it goes
+
+    Directories are listed with os.scandir so file/dir checks come from the
+    directory entries themselves. With max_workers > 1 sibling directories are
+    listed concurrently on a thread pool, and results are streamed back to the
+    caller as soon as each directory has been read.
+    """
+
+    def __init__(self, root: str, extensions: Optional[Iterable[str]] = None,
+                 exclude_patterns: Optional[List[str]] = None,
+                 respect_gitignore: bool = True, max_workers: Optional[int] = None):
+        self.root = os.path.abspath(root)
+        self.extensions = set(extensions) if extensions is not None else None
+        self.exclude_patterns = DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns
+        self.respect_gitignore = respect_gitignore
+        self.max_workers = max_workers if max_workers is not None else min(8, (os.cpu_count() or 1) + 2)
+
+    def matches_extension(self, name: str) -> bool:
+        """Check a file name against the requested extensions"""
+        if self.extensions is None:
+            return True
+        ext = os.path.splitext(name)[1] or (name if name.startswith('.') else '')
+        return ext in self.extensions
+
+    def root_matcher(self) -> IgnoreMatcher:
+        """Matcher for the workspace root, including its .gitignore"""
+        matcher = IgnoreMatcher(self.exclude_patterns)
+        if self.respect_gitignore:
+            matcher = matcher.with_gitignore(
+                GitIgnoreRules.from_file('', os.path.join(self.root, '.gitignore'))
+            )
+        return matcher
+
+    def scan_directory(self, path: str, rel: str, matcher: IgnoreMatcher
+                       ) -> Tuple[List[os.DirEntry], List[Tuple[str, str, IgnoreMatcher]], List[os.DirEntry]]:
+        """List one directory, returning matching files, subdirectories to visit and their entries"""
+        files: List[os.DirEntry] = []
+        subdirs: List[Tuple[str, str, IgnoreMatcher]] = []
+        dirs: List[os.DirEntry] = []
+
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return files, subdirs, dirs
+
+        names = {entry.name for entry in entries}
+        # Virtualenvs are recognised by their marker file whatever they are called
+        if rel and 'pyvenv.cfg' in names:
+            return files, subdirs, dirs
+
+        if rel and self.respect_gitignore and '.gitignore' in names:
+            matcher = matcher.with_gitignore(
+                GitIgnoreRules.from_file(rel, os.path.join(path, '.gitignore'))
+            )
+
+        for entry in entries:
+            entry_rel = f"{rel}/{entry.name}" if rel else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not matcher.is_ignored(entry_rel, entry.name, True):
+                        subdirs.append((entry.path, entry_rel, matcher))
+                        dirs.append(entry)
+                elif entry.is_file():
+                    if self.matches_extension(entry.name) and not matcher.is_ignored(entry_rel, entry.name, False):
+                        files.append(entry)
+            except OSError:
+                continue
+
+        return files, subdirs, dirs
+
+    def iter_entries(self, include_dirs: bool = False) -> Iterator[os.DirEntry]:
+        """Yield os.DirEntry objects for every matching file (and visited directory)"""
+        if not os.path.isdir(self.root):
+            return
+
+        if self.max_workers <= 1:
+            stack = [(self.root, '', self.root_matcher())]
+            while stack:
+                files, subdirs, dirs = self.scan_directory(*stack.pop())
+                stack.extend(reversed(subdirs))
+                if include_dirs:
+                    yield from dirs
+                yield from files
+            return
+
+        results: "queue.Queue" = queue.Queue()
+        stop = threading.Event()
+
+        def scan(path: str, rel: str, matcher: IgnoreMatcher) -> None:
+            if stop.is_set():
+                results.put(([], [], []))
+                return
+            try:
+                results.put(self.scan_directory(path, rel, matcher))
+            except Exception:
+                results.put(([], [], []))
+
+        # Only this generator submits work, so the outstanding count needs no lock
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="maahelper-scan")
+        outstanding = 1
+        try:
+            pool.submit(scan, self.root, '', self.root_matcher())
+            while outstanding:
+                files, subdirs, dirs = results.get()
+                outstanding -= 1
+                for subdir in subdirs:
+                    pool.submit(scan, *subdir)
+                    outstanding += 1
+                if include_dirs:
+                    yield from dirs
+                yield from files
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+
+    def is_ignored_path(self, path: str, is_dir: bool = False) -> bool:
+        """Check a single path the way a full scan would, without walking siblings"""
+        rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+        if rel == '.' or rel.startswith('../') or rel == '..':
+            return rel != '.'
+
+        parts = rel.split('/')
+        matcher = self.root_matcher()
+        current = self.root
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            part_rel = '/'.join(parts[:i + 1])
+            if matcher.is_ignored(part_rel, part, is_dir if last else True):
+                return True
+            if last:
+                break
+            current = os.path.join(current, part)
+            if os.path.exists(os.path.join(current, 'pyvenv.cfg')):
+                return True
+            if self.respect_gitignore:
+                matcher = matcher.with_gitignore(
+                    GitIgnoreRules.from_file(part_rel, os.path.join(current, '.gitignore'))
+                )
+
+        return not is_dir and not self.matches_extension(parts[-1])
+
+    def iter_files(self) -> Iterator[str]:
+        """Yield the path of every matching file"""
+        for entry in self.iter_entries():
+            yield entry.path
@@ -11,6 +11,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, TaskID
 
+from ..utils.workspace_index import get_workspace_index
 from .prompts import vibecoding_prompts
 from .commands import vibecoding_commands
 
@@ -66,12 +67,10 @@ class VibecodingWorkflow:
         # Scan workspace for code files
         code_extensions = ['.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.cs', '.go', '.rs']
         
-        for ext in code_extensions:
-            files = list(self.workspace_path.glob(f"**/*{ext}"))
-            for file_path in files:
-                if file_path.is_file():
-                    analysis["files"].append(str(file_path.relative_to(self.workspace_path)))
-                    analysis["languages"].add(ext[1:])  # Remove the dot
+        index = get_workspace_index(str(self.workspace_path)).ensure_fresh()
+        for entry in index.files(code_extensions):
+            analysis["files"].append(str(Path(entry.path)))
+            analysis["languages"].add(entry.extension[1:])  # Remove the dot
         
         # Analyze structure
         analysis["structure"] = self._analyze_directory_structure()
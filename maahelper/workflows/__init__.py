@@ -6,6 +6,7 @@ LangGraph-based workflow system for complex, multi-step coding tasks
 from .engine import WorkflowEngine
 from .templates import WorkflowTemplates
 from .state import WorkflowState, WorkflowStateManager
+from .outputs import OutputStore, WorkflowContext
 from .nodes import WorkflowNodes
 from .commands import WorkflowCommands
 
@@ -14,6 +15,8 @@ __all__ = [
     'WorkflowTemplates',
     'WorkflowState',
     'WorkflowStateManager',
+    'OutputStore',
+    'WorkflowContext',
     'WorkflowNodes',
     'WorkflowCommands'
 ]
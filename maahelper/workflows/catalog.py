@@ -0,0 +1,156 @@
+"""
+Workflow Catalog for MaaHelper
+SQLite summary of every stored workflow, so listings never parse full state files
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = "catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    workflow_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'unknown',
+    created_at TEXT,
+    updated_at TEXT,
+    updated_ts REAL NOT NULL DEFAULT 0,
+    total_steps INTEGER NOT NULL DEFAULT 0,
+    completed_steps INTEGER NOT NULL DEFAULT 0,
+    failed_steps INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_workflows_status ON workflows (status, updated_ts);
+"""
+
+# PRAGMA user_version once existing state files have been catalogued
+CATALOG_VERSION = 1
+
+COLUMNS = ("workflow_id", "name", "status", "created_at", "updated_at", "updated_ts",
+           "total_steps", "completed_steps", "failed_steps")
+
+
+def summarize_state(workflow_id: str, state_dict: Dict[str, Any], updated_ts: Optional[float] = None) -> Dict[str, Any]:
+    """Catalog row for a JSON-ready workflow state"""
+    definition = state_dict.get('definition') or {}
+    return {
+        'workflow_id': workflow_id,
+        'name': definition.get('name', ''),
+        'status': state_dict.get('status', 'unknown'),
+        'created_at': state_dict.get('created_at'),
+        'updated_at': state_dict.get('updated_at'),
+        'updated_ts': time.time() if updated_ts is None else updated_ts,
+        'total_steps': len(definition.get('steps', [])),
+        'completed_steps': len(state_dict.get('completed_steps') or []),
+        'failed_steps': len(state_dict.get('failed_steps') or []),
+    }
+
+
+class WorkflowCatalog:
+    """One row per workflow (id, name, status, timestamps, step counts)
+
+    Rows are upserted in their own transaction whenever a state snapshot is
+    written. Connections are opened per operation, so the catalog can be
+    shared by several processes and never holds the database open.
+    """
+
+    def __init__(self, state_dir: Path, busy_timeout: float = 10.0):
+        self.state_dir = Path(state_dir)
+        self.db_path = self.state_dir / CATALOG_FILENAME
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        """A connection with the schema in place, committed (or rolled back) on exit"""
+        conn = sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    if conn.execute("PRAGMA user_version").fetchone()[0] < CATALOG_VERSION:
+                        self._backfill(conn)
+                    self._ready = True
+                yield conn
+        finally:
+            conn.close()
+
+    def _backfill(self, conn: sqlite3.Connection) -> None:
+        """Catalog state files written before the catalog existed"""
+        rows = []
+        for state_file in self.state_dir.glob("*.json"):
+            try:
+                state_dict = json.loads(state_file.read_text(encoding='utf-8'))
+                rows.append(summarize_state(state_file.stem, state_dict, state_file.stat().st_mtime))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to catalog workflow state file {state_file}: {e}")
+        conn.executemany(
+            f"INSERT OR IGNORE INTO workflows ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(COLUMNS))})",
+            [tuple(row[column] for column in COLUMNS) for row in rows]
+        )
+        conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        if rows:
+            logger.info(f"Catalogued {len(rows)} existing workflow states")
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO workflows ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                tuple(row[column] for column in COLUMNS)
+            )
+
+    def delete(self, workflow_id: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM workflows WHERE workflow_id = ?", (workflow_id,))
+
+    def entries(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rows, most recently updated first"""
+        query = "SELECT * FROM workflows"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock, self._connect() as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY updated_ts DESC", params)]
+
+    def statistics(self) -> Dict[str, Any]:
+        stats = {
+            'total_workflows': 0,
+            'by_status': {},
+            'total_completed_steps': 0,
+            'total_failed_steps': 0
+        }
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*), SUM(completed_steps), SUM(failed_steps) "
+                "FROM workflows GROUP BY status"
+            ).fetchall()
+        for status, count, completed, failed in rows:
+            stats['total_workflows'] += count
+            stats['by_status'][status] = count
+            stats['total_completed_steps'] += completed or 0
+            stats['total_failed_steps'] += failed or 0
+        return stats
+
+    def updated_before(self, cutoff_ts: float, statuses: Iterable[str]) -> List[str]:
+        """Ids of workflows in one of statuses last updated before cutoff_ts"""
+        statuses = list(statuses)
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT workflow_id FROM workflows WHERE updated_ts < ? "
+                f"AND status IN ({', '.join('?' * len(statuses))})",
+                (cutoff_ts, *statuses)
+            ).fetchall()
+        return [row[0] for row in rows]
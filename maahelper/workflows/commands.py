@@ -5,7 +5,7 @@ Commands for creating, managing, and monitoring project-wide workflows
 
 import asyncio
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 
 from rich.console import Console
@@ -14,6 +14,7 @@ from rich.table import Table
 from rich.prompt import Prompt, Confirm
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+from ..config.config_manager import config_manager
 from ..core.llm_client import UnifiedLLMClient
 from .engine import WorkflowEngine
 from .templates import WorkflowTemplates
@@ -25,13 +26,20 @@ class WorkflowCommands:
     """CLI commands for workflow management"""
     
     def __init__(self, llm_client: Optional[UnifiedLLMClient] = None, 
-                 workspace_path: str = "."):
+                 workspace_path: str = ".",
+                 worker_processes: Optional[int] = None):
         self.llm_client = llm_client
         self.workspace_path = workspace_path
-        self.engine = WorkflowEngine(llm_client, workspace_path)
+        if worker_processes is None:
+            worker_processes = config_manager.config.performance.workflow_worker_processes
+        self.engine = WorkflowEngine(llm_client, workspace_path, worker_processes=worker_processes)
         self.templates = WorkflowTemplates()
         self.state_manager = WorkflowStateManager(workspace_path)
     
+    def close(self) -> None:
+        """Stop the engine's worker processes, if any"""
+        self.engine.close()
+    
     async def list_templates(self, category: Optional[str] = None) -> str:
         """List available workflow templates"""
         templates = self.templates.list_templates(category)
@@ -121,12 +129,13 @@ class WorkflowCommands:
             return f"❌ Failed to create custom workflow: {e}"
     
     async def execute_workflow(self, workflow_id: str, 
-                             context: Optional[Dict[str, Any]] = None) -> str:
-        """Execute a workflow"""
+                             context: Optional[Dict[str, Any]] = None,
+                             force: Union[bool, List[str]] = False) -> str:
+        """Execute a workflow; force re-runs memoized steps (all, or the given step ids)"""
         try:
             console.print(f"[blue]🚀 Starting workflow execution: {workflow_id}[/blue]")
             
-            success = await self.engine.execute_workflow(workflow_id, context)
+            success = await self.engine.execute_workflow(workflow_id, context, force)
             
             if success:
                 return f"✅ Workflow {workflow_id} completed successfully!"
@@ -6,24 +6,37 @@ LangGraph-based workflow orchestration for complex coding tasks
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Any, Callable
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Any, Callable, Set, Tuple, Union
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from datetime import datetime
 import uuid
 
 from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
 from rich.progress import Progress
 from rich.table import Table
 
 from ..core.llm_client import UnifiedLLMClient
 from .state import WorkflowState, WorkflowStateManager
+from .outputs import WorkflowContext
+from .memo import InputRecorder, StepMemo
 from .nodes import WorkflowNodes
+from .process import OutputSink, output_sink
+from .workers import WorkerPool
 
 console = Console()
 logger = logging.getLogger(__name__)
 
+# Steps of one workflow that may run at the same time
+DEFAULT_MAX_CONCURRENT_STEPS = 4
+
+
+class WorkflowCycleError(ValueError):
+    """Raised when workflow dependencies cannot be ordered"""
+
 @dataclass
 class WorkflowStep:
     """Represents a single step in a workflow"""
@@ -55,11 +68,22 @@ class WorkflowEngine:
     """
 
     def __init__(self, llm_client: Optional[UnifiedLLMClient] = None,
-                 workspace_path: str = "."):
+                 workspace_path: str = ".",
+                 max_concurrent_steps: int = DEFAULT_MAX_CONCURRENT_STEPS,
+                 memoize: bool = True,
+                 worker_processes: int = 0):
         self.llm_client = llm_client
         self.workspace_path = Path(workspace_path)
+        self.max_concurrent_steps = max(1, max_concurrent_steps)
         self.state_manager = WorkflowStateManager(workspace_path)
-        self.nodes = WorkflowNodes(llm_client)
+        # Large step outputs live here; the context only holds references
+        self.outputs = self.state_manager.outputs
+        # Outputs of unchanged memoizable steps are reused across runs
+        self.memo = StepMemo(self.state_manager.state_dir / "memo", self.outputs) if memoize else None
+        # With worker_processes, CPU-bound node types (see workers.PROCESS_NODES)
+        # run in that many local processes while LLM and I/O nodes stay in-loop
+        self.workers = WorkerPool(worker_processes, self.outputs.blob_dir) if worker_processes > 0 else None
+        self.nodes = WorkflowNodes(llm_client, workers=self.workers)
 
         # Active workflows
         self.active_workflows: Dict[str, WorkflowDefinition] = {}
@@ -72,7 +96,9 @@ class WorkflowEngine:
             'workflow_failed': [],
             'step_started': [],
             'step_completed': [],
-            'step_failed': []
+            'step_failed': [],
+            # Output lines of commands run by a step: {'step_id', 'stream', 'line'}
+            'step_output': []
         }
 
     async def create_workflow(self, name: str, description: str,
@@ -106,6 +132,9 @@ class WorkflowEngine:
             }
         )
 
+        # Reject unknown or cyclic dependencies before anything is saved
+        self._build_dependency_graph(workflow)
+
         self.active_workflows[workflow_id] = workflow
 
         # Save workflow state
@@ -127,13 +156,30 @@ class WorkflowEngine:
         return workflow_id
 
     async def execute_workflow(self, workflow_id: str,
-                             initial_context: Optional[Dict[str, Any]] = None) -> bool:
-        """Execute a workflow with dependency resolution"""
+                             initial_context: Optional[Dict[str, Any]] = None,
+                             force: Union[bool, Iterable[str]] = False,
+                             resume: bool = False) -> bool:
+        """Execute a workflow with dependency resolution
+
+        force re-runs the given step ids (or every step, if True) instead of
+        reusing memoized outputs. With resume, steps already marked completed
+        keep their outputs and only the remaining ones run.
+        """
         if workflow_id not in self.active_workflows:
             console.print(f"[red]❌ Workflow {workflow_id} not found[/red]")
             return False
 
         workflow = self.active_workflows[workflow_id]
+        step_ids = {step.id for step in workflow.steps}
+        forced = step_ids if force is True else set(force or ())
+        if forced - step_ids:
+            console.print(f"[yellow]⚠️ Unknown step(s) for --force: {', '.join(sorted(forced - step_ids))}[/yellow]")
+
+        try:
+            self._build_dependency_graph(workflow)
+        except WorkflowCycleError as e:
+            console.print(f"[red]❌ Invalid workflow '{workflow.name}': {e}[/red]")
+            return False
 
         console.print(Panel(
             f"[bold blue]🚀 Starting Workflow Execution[/bold blue]\n\n"
@@ -153,12 +199,31 @@ class WorkflowEngine:
             await self._fire_event('workflow_started', workflow_id, workflow)
 
             # Initialize workflow context
-            context = initial_context or {}
+            context = WorkflowContext(self.outputs, initial_context)
             context['workspace_path'] = str(self.workspace_path)
             context['workflow_id'] = workflow_id
 
+            done = set()
+            for step in workflow.steps:
+                if resume and step.status == "completed":
+                    done.add(step.id)
+                else:
+                    step.status, step.error = "pending", None
+
+            # Full state once; step changes are then appended as deltas
+            await self.state_manager.save_workflow_state(workflow_id, {
+                'definition': asdict(workflow),
+                'status': 'running',
+                'completed_steps': [step.id for step in workflow.steps if step.id in done],
+                'failed_steps': [],
+                'context': context.raw()
+            })
+
             # Execute steps in dependency order
-            success = await self._execute_workflow_steps(workflow, context, progress)
+            success = await self._execute_workflow_steps(workflow, context, progress, forced, done)
+            await self.state_manager.save_workflow_state(workflow_id, {
+                'status': 'completed' if success else 'failed'
+            })
 
             if success:
                 await self._fire_event('workflow_completed', workflow_id, workflow)
@@ -180,106 +245,177 @@ class WorkflowEngine:
             if workflow_id in self.workflow_progress:
                 del self.workflow_progress[workflow_id]
 
+    def _build_dependency_graph(self, workflow: WorkflowDefinition) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+        """In-degree and dependents of every step; raises WorkflowCycleError for unknown or cyclic dependencies"""
+        in_degree = {step.id: 0 for step in workflow.steps}
+        dependents: Dict[str, List[str]] = {step.id: [] for step in workflow.steps}
+        for step_id, dependencies in workflow.dependencies.items():
+            if step_id not in in_degree:
+                raise WorkflowCycleError(f"dependencies given for unknown step '{step_id}'")
+            for dep_id in dict.fromkeys(dependencies):
+                if dep_id not in in_degree:
+                    raise WorkflowCycleError(f"step '{step_id}' depends on unknown step '{dep_id}'")
+                in_degree[step_id] += 1
+                dependents[dep_id].append(step_id)
+
+        # Kahn's algorithm: whatever cannot be ordered lies on or behind a cycle
+        remaining = dict(in_degree)
+        queue = deque(step_id for step_id, degree in remaining.items() if degree == 0)
+        while queue:
+            for dependent in dependents[queue.popleft()]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+        blocked = {step_id for step_id, degree in remaining.items() if degree > 0}
+        if blocked:
+            raise WorkflowCycleError(f"dependency cycle: {' → '.join(self._find_cycle(workflow, blocked))}")
+        return in_degree, dependents
+
+    @staticmethod
+    def _find_cycle(workflow: WorkflowDefinition, blocked: set) -> List[str]:
+        """One cycle among steps that could not be ordered, first step repeated at the end"""
+        # Every blocked step has a blocked dependency, so following them must revisit a step
+        path: List[str] = []
+        step_id = next(step.id for step in workflow.steps if step.id in blocked)
+        while step_id not in path:
+            path.append(step_id)
+            step_id = next(dep_id for dep_id in workflow.dependencies[step_id] if dep_id in blocked)
+        cycle = path[path.index(step_id):] + [step_id]
+        return cycle[::-1]
+
     async def _execute_workflow_steps(self, workflow: WorkflowDefinition,
-                                    context: Dict[str, Any], progress: Progress) -> bool:
-        """Execute workflow steps in dependency order"""
-        # Create dependency graph
-        completed_steps = set()
+                                    context: WorkflowContext, progress: Progress,
+                                    forced: Optional[Set[str]] = None,
+                                    done: Optional[Set[str]] = None) -> bool:
+        """Execute workflow steps in dependency order
+
+        Each step starts as soon as its own dependencies have completed, with
+        at most max_concurrent_steps running at once. Steps downstream of a
+        failure are never started. Steps in done (completed by an earlier,
+        interrupted run) are not run again.
+        """
+        in_degree, dependents = self._build_dependency_graph(workflow)
+        steps = {step.id: step for step in workflow.steps}
+        completed_steps = set(done or ())
         failed_steps = set()
+        for step_id in completed_steps:
+            for dependent in dependents[step_id]:
+                in_degree[dependent] -= 1
+        # The frontier: pending steps whose dependencies have all completed
+        ready = deque(step.id for step in workflow.steps
+                      if in_degree[step.id] == 0 and step.id not in completed_steps)
+        running: Dict[asyncio.Future, WorkflowStep] = {}
 
         # Add progress tasks
         step_tasks = {}
         with progress:
             for step in workflow.steps:
-                task_id = progress.add_task(f"[cyan]{step.name}[/cyan]", total=1)
+                task_id = progress.add_task(f"[cyan]{step.name}[/cyan]", total=1,
+                                            completed=1 if step.id in completed_steps else 0)
                 step_tasks[step.id] = task_id
 
             progress.start()
 
-            # Execute steps
-            while len(completed_steps) + len(failed_steps) < len(workflow.steps):
-                # Find steps ready to execute
-                ready_steps = []
-                for step in workflow.steps:
-                    if (step.id not in completed_steps and
-                        step.id not in failed_steps and
-                        step.status == "pending"):
-
-                        # Check if all dependencies are completed
-                        dependencies = workflow.dependencies.get(step.id, [])
-                        if all(dep_id in completed_steps for dep_id in dependencies):
-                            ready_steps.append(step)
-
-                if not ready_steps:
-                    # Check if we're stuck due to failed dependencies
-                    remaining_steps = [s for s in workflow.steps
-                                     if s.id not in completed_steps and s.id not in failed_steps]
-                    if remaining_steps:
-                        console.print("[red]❌ Workflow stuck - dependency deadlock detected[/red]")
-                        return False
-                    break
-
-                # Execute ready steps (can be done in parallel)
-                tasks = []
-                for step in ready_steps:
-                    task = self._execute_step(step, context, workflow.id, step_tasks[step.id], progress)
-                    tasks.append(task)
-
-                # Wait for all ready steps to complete
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Process results
-                for i, result in enumerate(results):
-                    step = ready_steps[i]
-                    if isinstance(result, Exception):
-                        step.status = "failed"
-                        step.error = str(result)
-                        failed_steps.add(step.id)
-                        console.print(f"[red]❌ Step '{step.name}' failed: {result}[/red]")
-                    elif result:
-                        step.status = "completed"
-                        completed_steps.add(step.id)
-                        progress.update(step_tasks[step.id], completed=1)
-                    else:
-                        step.status = "failed"
-                        failed_steps.add(step.id)
-                        console.print(f"[red]❌ Step '{step.name}' failed[/red]")
-
-                # Update workflow state
-                await self.state_manager.save_workflow_state(workflow.id, {
-                    'definition': asdict(workflow),
-                    'status': 'running',
-                    'completed_steps': list(completed_steps),
-                    'failed_steps': list(failed_steps),
-                    'context': context
-                })
+            try:
+                while ready or running:
+                    while ready and len(running) < self.max_concurrent_steps:
+                        step = steps[ready.popleft()]
+                        task = asyncio.ensure_future(
+                            self._execute_step(step, context, workflow.id, step_tasks[step.id], progress,
+                                               force=step.id in (forced or ()))
+                        )
+                        running[task] = step
+                        await self.state_manager.append_delta(workflow.id, {
+                            'step': {'id': step.id, 'status': 'running', 'started_at': datetime.now()}
+                        })
+
+                    finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        step = running.pop(task)
+                        error = task.exception()
+                        if error is None and task.result():
+                            step.status = "completed"
+                            completed_steps.add(step.id)
+                            # Merged here, in completion order, so the state log replays identically
+                            context.update(step.outputs)
+                            progress.update(step_tasks[step.id], completed=1,
+                                            description=f"[cyan]{step.name}[/cyan]")
+                            for dependent in dependents[step.id]:
+                                in_degree[dependent] -= 1
+                                if in_degree[dependent] == 0:
+                                    ready.append(dependent)
+                        else:
+                            step.status = "failed"
+                            if error is not None:
+                                step.error = str(error)
+                            failed_steps.add(step.id)
+                            console.print(f"[red]❌ Step '{step.name}' failed{': ' + step.error if step.error else ''}[/red]")
+
+                        # Only this step's change and new outputs are persisted
+                        delta = {'step': {
+                            'id': step.id,
+                            'status': step.status,
+                            'error': step.error,
+                            'completed_at': step.completed_at
+                        }}
+                        if step.status == "completed":
+                            delta['step']['outputs'] = step.outputs
+                            delta['context'] = step.outputs
+                        await self.state_manager.append_delta(workflow.id, delta)
+            finally:
+                for task in running:
+                    task.cancel()
+
+        skipped = len(workflow.steps) - len(completed_steps) - len(failed_steps)
+        if skipped:
+            console.print(f"[yellow]⚠️ {skipped} step(s) skipped because a dependency failed[/yellow]")
 
         # Check if all steps completed successfully
         return len(failed_steps) == 0 and len(completed_steps) == len(workflow.steps)
 
-    async def _execute_step(self, step: WorkflowStep, context: Dict[str, Any],
-                          workflow_id: str, task_id: int, progress: Progress) -> bool:
-        """Execute a single workflow step"""
+    async def _execute_step(self, step: WorkflowStep, context: WorkflowContext,
+                          workflow_id: str, task_id: int, progress: Progress,
+                          force: bool = False) -> bool:
+        """Execute a single workflow step, or reuse its memoized outputs"""
         try:
             step.status = "running"
             step.started_at = datetime.now()
+            # Each step runs in its own task, so this only affects commands this step starts
+            output_sink.set(self._step_output_sink(workflow_id, step, task_id, progress))
 
             await self._fire_event('step_started', workflow_id, step)
 
-            # Prepare step inputs with context
-            step_inputs = {**context, **step.inputs}
+            memoize = self.memo is not None and self.memo.is_memoizable(step.node_type)
+            if memoize:
+                # Records which inputs the node reads, for the memo entry
+                step_inputs = InputRecorder(dict(step.inputs), context)
+                identity = self.memo.identity(
+                    self.active_workflows[workflow_id].name, step.id, step.node_type, step.inputs
+                )
+                cached = None if force else await self.memo.lookup(identity, step.node_type, step_inputs)
+                if cached is not None:
+                    step.outputs = cached
+                    step.status = "completed"
+                    step.completed_at = datetime.now()
+                    console.print(f"[dim]⏭️ Step '{step.name}' unchanged, reusing cached outputs[/dim]")
+                    await self._fire_event('step_completed', workflow_id, step)
+                    return True
+                files = await self.memo.file_fingerprints(step.node_type, step_inputs)
+            else:
+                # Step inputs over the context; stored outputs are only loaded if the node reads them
+                step_inputs = context.step_inputs(step.inputs)
 
             # Execute the step using the appropriate node
             result = await self.nodes.execute_node(step.node_type, step_inputs)
 
             if result:
-                step.outputs = result
+                # Large values are kept once in the output store and referenced
+                step.outputs = self.outputs.pack_values(result)
+                if memoize:
+                    await self.memo.record(identity, step_inputs.reads, files, step.outputs)
                 step.status = "completed"
                 step.completed_at = datetime.now()
 
-                # Update context with step outputs
-                context.update(result)
-
                 await self._fire_event('step_completed', workflow_id, step)
                 return True
             else:
@@ -296,6 +432,15 @@ class WorkflowEngine:
             logger.error(f"Step execution error: {e}")
             return False
 
+    def _step_output_sink(self, workflow_id: str, step: WorkflowStep,
+                          task_id: int, progress: Progress) -> OutputSink:
+        """Show a step's latest output line in its progress row and forward every line to step_output handlers"""
+        async def sink(stream: str, line: str) -> None:
+            if line.strip():
+                progress.update(task_id, description=f"[cyan]{step.name}[/cyan] [dim]{escape(line.strip()[:80])}[/dim]")
+            await self._fire_event('step_output', workflow_id, {'step_id': step.id, 'stream': stream, 'line': line})
+        return sink
+
     async def pause_workflow(self, workflow_id: str) -> bool:
         """Pause a running workflow"""
         if workflow_id not in self.active_workflows:
@@ -312,22 +457,30 @@ class WorkflowEngine:
         return True
 
     async def resume_workflow(self, workflow_id: str) -> bool:
-        """Resume a paused workflow"""
-        if workflow_id not in self.active_workflows:
-            # Try to load from state
-            state = await self.state_manager.load_workflow_state(workflow_id)
-            if state:
-                workflow_data = state['definition']
-                workflow = self._hydrate_workflow_definition(workflow_data)
-                self.active_workflows[workflow_id] = workflow
-            else:
-                return False
+        """Resume a paused or interrupted workflow from its persisted state
+
+        Completed steps keep their recorded outputs and the saved context is
+        restored (large values stay references into the output store); only
+        steps that had not completed are run.
+        """
+        # Outputs stay OutputRefs, so resuming does not load every stored result
+        state = await self.state_manager.load_workflow_state(workflow_id, resolve_outputs=False)
+        if state and state.get('definition'):
+            workflow = self._hydrate_workflow_definition(state['definition'])
+            self.active_workflows[workflow_id] = workflow
+            context = state.get('context') or {}
+        elif workflow_id in self.active_workflows:
+            workflow = self.active_workflows[workflow_id]
+            context = None
+        else:
+            return False
 
-        workflow = self.active_workflows[workflow_id]
-        console.print(f"[green]▶️ Resuming workflow '{workflow.name}'[/green]")
+        done = sum(1 for step in workflow.steps if step.status == "completed")
+        console.print(f"[green]▶️ Resuming workflow '{workflow.name}' "
+                      f"({done}/{len(workflow.steps)} steps already completed)[/green]")
 
         # Continue execution from where it left off
-        return await self.execute_workflow(workflow_id)
+        return await self.execute_workflow(workflow_id, initial_context=context, resume=True)
 
     async def cancel_workflow(self, workflow_id: str) -> bool:
         """Cancel a workflow"""
@@ -374,6 +527,11 @@ class WorkflowEngine:
         """List all active workflows"""
         return [self.get_workflow_status(wf_id) for wf_id in self.active_workflows.keys()]
 
+    def close(self) -> None:
+        """Stop worker processes, if any"""
+        if self.workers is not None:
+            self.workers.shutdown()
+
     def add_event_handler(self, event_type: str, handler: Callable):
         """Add an event handler"""
         if event_type in self.event_handlers:
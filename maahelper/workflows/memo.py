@@ -0,0 +1,193 @@
+"""
+Workflow Step Memoization for MaaHelper
+Build-system style reuse of step outputs when a step's inputs and files are unchanged
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import ChainMap
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ..utils.workspace_index import get_workspace_index, hash_content
+from .outputs import OutputRef, OutputStore, WorkflowContext
+
+logger = logging.getLogger(__name__)
+
+# Bump when node implementations change in ways that invalidate cached outputs
+MEMO_VERSION = 1
+
+# Node types whose outputs depend only on the inputs they read and the files
+# named by PATH_INPUTS; nodes with side effects (writes, git, commands) always run
+MEMOIZABLE_NODES = frozenset({
+    'analyze_file', 'code_review', 'bug_analysis', 'performance_analysis',
+    'generate_code', 'refactor_code', 'generate_tests', 'generate_docs',
+    'read_file', 'scan_project', 'ai_chat', 'ai_analyze', 'ai_generate',
+})
+
+# Inputs naming files (fingerprinted by content) or directories (by file listing),
+# with the default the node uses when the input is absent
+PATH_INPUTS = {
+    'analyze_file': {'file_path': None},
+    'read_file': {'file_path': None},
+    'scan_project': {'project_path': '.'},
+}
+
+_MISSING = "missing"
+
+
+def _fingerprint(value: Any) -> str:
+    """Stable digest of a raw input value; stored outputs are identified by their hash"""
+    if isinstance(value, OutputRef):
+        return f"blob:{value.digest}"
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hash_content(encoded.encode('utf-8'))
+
+
+class InputRecorder(ChainMap):
+    """Step inputs that remember a fingerprint of every key the node looks up"""
+
+    def __init__(self, *maps):
+        super().__init__(*maps)
+        self.reads: Dict[str, str] = {}
+
+    def raw(self, key: str) -> Any:
+        """The value for key without resolving stored outputs; KeyError if absent"""
+        for mapping in self.maps:
+            if key in mapping:
+                return mapping.raw_value(key) if isinstance(mapping, WorkflowContext) else mapping[key]
+        raise KeyError(key)
+
+    def fingerprint(self, key: str) -> str:
+        try:
+            return _fingerprint(self.raw(key))
+        except KeyError:
+            return _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        self.reads[key] = self.fingerprint(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key: object) -> bool:
+        found = super().__contains__(key)
+        if not found:
+            self.reads.setdefault(key, _MISSING)
+        return found
+
+
+class StepMemo:
+    """Outputs of successful memoizable steps, reused while their trace still matches
+
+    A step is identified by its workflow name, id, node type and declared
+    inputs. Its entry records fingerprints of every input the node actually
+    read and of the files named in PATH_INPUTS; a later run of the same step
+    reuses the outputs only if all of them are unchanged.
+    """
+
+    def __init__(self, memo_dir: Path, outputs: OutputStore):
+        self.memo_dir = Path(memo_dir)
+        self.outputs = outputs
+
+    @staticmethod
+    def is_memoizable(node_type: str) -> bool:
+        return node_type in MEMOIZABLE_NODES
+
+    @staticmethod
+    def identity(workflow_name: str, step_id: str, node_type: str, inputs: Dict[str, Any]) -> str:
+        return _fingerprint([MEMO_VERSION, workflow_name, step_id, node_type, inputs])
+
+    def _entry_file(self, identity: str) -> Path:
+        return self.memo_dir / f"{identity}.json"
+
+    @staticmethod
+    def _path_fingerprint(path_value: Any) -> str:
+        if not isinstance(path_value, str):
+            return _MISSING
+        path = Path(path_value)
+        try:
+            if path.is_file():
+                return hash_content(path.read_bytes())
+            if path.is_dir():
+                index = get_workspace_index(str(path)).ensure_fresh()
+                return _fingerprint([entry.path for entry in index.files()])
+        except OSError as e:
+            logger.debug(f"Could not fingerprint {path}: {e}")
+        return _MISSING
+
+    async def file_fingerprints(self, node_type: str, inputs: InputRecorder) -> Dict[str, str]:
+        """Fingerprints of the files and directories a node is about to read, by input key"""
+        values = {}
+        for key, default in PATH_INPUTS.get(node_type, {}).items():
+            try:
+                values[key] = inputs.raw(key)
+            except KeyError:
+                values[key] = default
+        if not values:
+            return {}
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: {key: self._path_fingerprint(value) for key, value in values.items()}
+        )
+
+    def _read_entry(self, identity: str) -> Optional[Dict[str, Any]]:
+        entry_file = self._entry_file(identity)
+        try:
+            return json.loads(entry_file.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable memo entry {entry_file}: {e}")
+            return None
+
+    def _blobs_exist(self, outputs: Dict[str, Any]) -> bool:
+        return all((self.outputs.blob_dir / value.digest).exists()
+                   for value in outputs.values() if isinstance(value, OutputRef))
+
+    def _write_entry(self, identity: str, encoded: str) -> None:
+        self.memo_dir.mkdir(parents=True, exist_ok=True)
+        entry_file = self._entry_file(identity)
+        temp_file = entry_file.with_name(f"{identity}.{os.getpid()}.tmp")
+        temp_file.write_text(encoded, encoding='utf-8')
+        os.replace(temp_file, entry_file)
+
+    async def lookup(self, identity: str, node_type: str, inputs: InputRecorder) -> Optional[Dict[str, Any]]:
+        """Cached outputs if every recorded input and file is unchanged"""
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self._read_entry, identity)
+        if entry is None:
+            return None
+
+        if any(inputs.fingerprint(key) != fingerprint for key, fingerprint in entry['reads'].items()):
+            return None
+        if entry['files'] and await self.file_fingerprints(node_type, inputs) != entry['files']:
+            return None
+        outputs = {key: OutputRef.from_json(value) or value for key, value in entry['outputs'].items()}
+        if not await loop.run_in_executor(None, self._blobs_exist, outputs):
+            return None
+        return outputs
+
+    async def record(self, identity: str, reads: Dict[str, str], files: Dict[str, str],
+                     outputs: Dict[str, Any]) -> None:
+        """Remember a successful run (outputs already packed by the output store)"""
+        entry = {
+            'reads': reads,
+            'files': files,
+            'outputs': {
+                key: value.to_json() if isinstance(value, OutputRef) else value
+                for key, value in outputs.items()
+            },
+        }
+        try:
+            encoded = json.dumps(entry, separators=(',', ':'))
+        except (TypeError, ValueError):
+            # Outputs that cannot be persisted are simply not memoized
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self._write_entry, identity, encoded)
+
+    def invalidate(self, identities: Iterable[str]) -> None:
+        for identity in identities:
+            entry_file = self._entry_file(identity)
+            if entry_file.exists():
+                entry_file.unlink()
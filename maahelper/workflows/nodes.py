@@ -5,9 +5,9 @@ Individual node implementations for workflow execution
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Callable
+from collections import ChainMap
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Callable
 from pathlib import Path
-import subprocess
 import json
 
 from rich.console import Console
@@ -15,19 +15,32 @@ from rich.console import Console
 from ..core.llm_client import UnifiedLLMClient
 from ..vibecoding.commands import VibecodingCommands
 from ..utils.streamlined_file_handler import file_handler
+from ..utils.outline import outline_service
+from ..utils.workspace_index import get_workspace_index
+from .process import DEFAULT_COMMAND_TIMEOUT, DEFAULT_OUTPUT_LIMIT, CommandResult, run_command, split_command
+
+if TYPE_CHECKING:
+    from .workers import WorkerPool
 
 console = Console()
 logger = logging.getLogger(__name__)
 
+# Items a map node processes at once unless its max_concurrency input says otherwise
+DEFAULT_MAP_CONCURRENCY = 4
+# Seconds before a git command is stopped unless the node's timeout input says otherwise
+GIT_TIMEOUT = 5 * 60
+
 class WorkflowNodes:
     """
     Collection of workflow nodes for different types of tasks
     Each node represents a specific operation that can be performed in a workflow
     """
     
-    def __init__(self, llm_client: Optional[UnifiedLLMClient] = None):
+    def __init__(self, llm_client: Optional[UnifiedLLMClient] = None, workers: Optional["WorkerPool"] = None):
         self.llm_client = llm_client
         self.vibecoding = VibecodingCommands(llm_client) if llm_client else None
+        # CPU-bound node types run in these worker processes when given
+        self.workers = workers
         
         # Register available nodes
         self.nodes: Dict[str, Callable] = {
@@ -69,7 +82,8 @@ class WorkflowNodes:
             'sleep': self.sleep_node,
             'log_message': self.log_message_node,
             'conditional': self.conditional_node,
-            'parallel': self.parallel_node
+            'parallel': self.parallel_node,
+            'map': self.map_node
         }
     
     async def execute_node(self, node_type: str, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -79,8 +93,12 @@ class WorkflowNodes:
             return None
         
         try:
-            console.print(f"[cyan]🔄 Executing node: {node_type}[/cyan]")
-            result = await self.nodes[node_type](inputs)
+            if self.workers is not None and self.workers.handles(node_type):
+                console.print(f"[cyan]🔄 Executing node: {node_type} (worker process)[/cyan]")
+                result = await self.workers.run(node_type, inputs)
+            else:
+                console.print(f"[cyan]🔄 Executing node: {node_type}[/cyan]")
+                result = await self.nodes[node_type](inputs)
             console.print(f"[green]✅ Node {node_type} completed[/green]")
             return result
         except Exception as e:
@@ -104,13 +122,16 @@ class WorkflowNodes:
             raise FileNotFoundError(f"File not found: {file_path}")
         
         content = file_path_obj.read_text(encoding='utf-8')
+        language = outline_service.language_for(str(file_path_obj))
+        outline = outline_service.get_outline(content, language) if language else None
         
         return {
             'file_path': str(file_path_obj),
             'content': content,
             'size': len(content),
             'lines': len(content.split('\n')),
-            'language': self._detect_language(file_path_obj.suffix)
+            'language': self._detect_language(file_path_obj.suffix),
+            'outline': outline.to_dict() if outline else None
         }
     
     async def code_review_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
@@ -438,6 +459,69 @@ class WorkflowNodes:
             'operations_count': len(operations)
         }
     
+    async def map_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a chain of operations for every item of a list, with bounded concurrency
+
+        Inputs: items (a list) or items_from (the key holding one, e.g. 'files'
+        from scan_project); item_key, the input name each item is bound to
+        (default 'item'); root_from, an optional key whose value is joined in
+        front of each item as a path; operations, node specs run in order per
+        item, each seeing the outputs of the previous ones; keep, optional
+        output keys retained per item; max_concurrency; output_key, an extra
+        key under which the ordered results are also returned.
+        """
+        items = inputs.get('items')
+        if items is None:
+            items = inputs.get(inputs.get('items_from', 'items'))
+        if not isinstance(items, list):
+            raise ValueError("items (or the key named by items_from) must be a list")
+        
+        operations = inputs.get('operations') or []
+        if not operations or any(not operation.get('node_type') for operation in operations):
+            raise ValueError("operations must be a non-empty list of {'node_type', 'inputs'}")
+        
+        item_key = inputs.get('item_key', 'item')
+        root = inputs.get(inputs['root_from']) if inputs.get('root_from') else None
+        keep = inputs.get('keep')
+        limit = max(1, int(inputs.get('max_concurrency', DEFAULT_MAP_CONCURRENCY)))
+        
+        async def run_item(item: Any) -> Dict[str, Any]:
+            outputs = {item_key: str(Path(root) / item) if root is not None else item}
+            for operation in operations:
+                # Operation inputs, then this item's outputs so far, then the map's own inputs
+                operation_inputs = ChainMap(dict(operation.get('inputs', {})), outputs, inputs)
+                result = await self.execute_node(operation['node_type'], operation_inputs)
+                if not result:
+                    raise RuntimeError(f"{operation['node_type']} failed for {item}")
+                outputs.update(result)
+            return {key: outputs[key] for key in keep if key in outputs} if keep else outputs
+        
+        # A fixed set of workers pulls items in order, so huge lists do not create a task each
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        next_index = iter(range(len(items)))
+        
+        async def worker():
+            for index in next_index:
+                try:
+                    results[index] = await run_item(items[index])
+                except Exception as e:
+                    results[index] = {item_key: items[index], 'error': str(e)}
+        
+        await asyncio.gather(*(worker() for _ in range(min(limit, len(items)))))
+        
+        failed_count = sum(1 for result in results if 'error' in result)
+        if items and failed_count == len(items):
+            raise RuntimeError(f"all {failed_count} items failed, e.g. {results[0]['error']}")
+        
+        output = {
+            'results': results,
+            'item_count': len(items),
+            'failed_count': failed_count
+        }
+        if inputs.get('output_key'):
+            output[inputs['output_key']] = results
+        return output
+    
     # AI Operation Nodes
     async def ai_chat_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Perform AI chat completion"""
@@ -519,23 +603,29 @@ class WorkflowNodes:
         }
     
     # Git Operation Nodes (simplified implementations)
+    async def _git(self, inputs: Dict[str, Any], *args: str) -> CommandResult:
+        """Run a git command in the repo_path input (default: current directory), raising on failure"""
+        result = await run_command(['git', *args], cwd=inputs.get('repo_path'),
+                                   timeout=inputs.get('timeout', GIT_TIMEOUT))
+        if not result.success:
+            reason = "timed out" if result.timed_out else (result.stderr.strip() or f"exit code {result.return_code}")
+            raise RuntimeError(f"git {args[0]} failed: {reason}")
+        return result
+
     async def git_commit_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Create a git commit"""
         message = inputs.get('message', 'Automated commit from MaaHelper workflow')
         add_all = inputs.get('add_all', True)
 
-        try:
-            if add_all:
-                subprocess.run(['git', 'add', '.'], check=True)
+        if add_all:
+            await self._git(inputs, 'add', '.')
 
-            subprocess.run(['git', 'commit', '-m', message], check=True)
+        await self._git(inputs, 'commit', '-m', message)
 
-            return {
-                'commit_message': message,
-                'committed': True
-            }
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Git commit failed: {e}")
+        return {
+            'commit_message': message,
+            'committed': True
+        }
 
     async def git_branch_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Create or switch to a git branch"""
@@ -545,19 +635,16 @@ class WorkflowNodes:
         if not branch_name:
             raise ValueError("branch_name is required")
 
-        try:
-            if create_new:
-                subprocess.run(['git', 'checkout', '-b', branch_name], check=True)
-            else:
-                subprocess.run(['git', 'checkout', branch_name], check=True)
+        if create_new:
+            await self._git(inputs, 'checkout', '-b', branch_name)
+        else:
+            await self._git(inputs, 'checkout', branch_name)
 
-            return {
-                'branch_name': branch_name,
-                'created': create_new,
-                'switched': True
-            }
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Git branch operation failed: {e}")
+        return {
+            'branch_name': branch_name,
+            'created': create_new,
+            'switched': True
+        }
 
     async def git_merge_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Merge a git branch"""
@@ -567,36 +654,37 @@ class WorkflowNodes:
         if not source_branch:
             raise ValueError("source_branch is required")
 
-        try:
-            # Switch to target branch
-            subprocess.run(['git', 'checkout', target_branch], check=True)
+        # Switch to target branch
+        await self._git(inputs, 'checkout', target_branch)
 
-            # Merge source branch
-            subprocess.run(['git', 'merge', source_branch], check=True)
+        # Merge source branch
+        await self._git(inputs, 'merge', source_branch)
 
-            return {
-                'source_branch': source_branch,
-                'target_branch': target_branch,
-                'merged': True
-            }
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Git merge failed: {e}")
+        return {
+            'source_branch': source_branch,
+            'target_branch': target_branch,
+            'merged': True
+        }
     
     async def scan_project_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Scan project structure"""
         project_path = inputs.get('project_path', '.')
         include_hidden = inputs.get('include_hidden', False)
+        extensions = inputs.get('extensions')
 
         project_path_obj = Path(project_path)
         if not project_path_obj.exists():
             raise FileNotFoundError(f"Project path not found: {project_path}")
 
+        # Answered from the shared index; VCS and dependency directories are never listed
+        index = get_workspace_index(str(project_path_obj))
+        await asyncio.get_running_loop().run_in_executor(None, index.ensure_fresh)
+
         files = []
-        for file_path in project_path_obj.rglob('*'):
-            if file_path.is_file():
-                if not include_hidden and any(part.startswith('.') for part in file_path.parts):
-                    continue
-                files.append(str(file_path.relative_to(project_path_obj)))
+        for entry in index.files(extensions):
+            if not include_hidden and any(part.startswith('.') for part in entry.path.split('/')):
+                continue
+            files.append(str(Path(entry.path)))
 
         return {
             'project_path': str(project_path_obj),
@@ -604,84 +692,52 @@ class WorkflowNodes:
             'file_count': len(files)
         }
 
-    async def run_tests_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """Run project tests"""
-        test_command = inputs.get('test_command', 'python -m pytest')
-        test_path = inputs.get('test_path', 'tests/')
-
+    async def _run_project_command(self, inputs: Dict[str, Any], command_key: str,
+                                   command: Any) -> Dict[str, Any]:
+        """Run a test, build or deploy command; output streams to the step as it arrives"""
         try:
-            result = subprocess.run(
-                test_command.split() + [test_path] if test_path else test_command.split(),
-                capture_output=True,
-                text=True,
-                check=False
+            result = await run_command(
+                command,
+                cwd=inputs.get('cwd'),
+                timeout=inputs.get('timeout', DEFAULT_COMMAND_TIMEOUT),
+                output_limit=inputs.get('max_output', DEFAULT_OUTPUT_LIMIT)
             )
 
             return {
-                'test_command': test_command,
-                'return_code': result.returncode,
+                command_key: command,
+                'return_code': result.return_code,
                 'stdout': result.stdout,
                 'stderr': result.stderr,
-                'success': result.returncode == 0
+                'timed_out': result.timed_out,
+                'output_truncated': result.truncated,
+                'success': result.success
             }
-        except Exception as e:
+        except (OSError, ValueError) as e:
             return {
-                'test_command': test_command,
+                command_key: command,
                 'error': str(e),
                 'success': False
             }
 
+    async def run_tests_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run project tests"""
+        test_command = inputs.get('test_command', 'python -m pytest')
+        test_path = inputs.get('test_path', 'tests/')
+
+        command = split_command(test_command) + ([test_path] if test_path else [])
+        result = await self._run_project_command(inputs, 'test_command', command)
+        result['test_command'] = test_command
+        return result
+
     async def build_project_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Build the project"""
         build_command = inputs.get('build_command', 'python setup.py build')
-
-        try:
-            result = subprocess.run(
-                build_command.split(),
-                capture_output=True,
-                text=True,
-                check=False
-            )
-
-            return {
-                'build_command': build_command,
-                'return_code': result.returncode,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'success': result.returncode == 0
-            }
-        except Exception as e:
-            return {
-                'build_command': build_command,
-                'error': str(e),
-                'success': False
-            }
+        return await self._run_project_command(inputs, 'build_command', build_command)
 
     async def deploy_project_node(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Deploy the project"""
         deploy_command = inputs.get('deploy_command', 'echo "No deploy command specified"')
-
-        try:
-            result = subprocess.run(
-                deploy_command.split(),
-                capture_output=True,
-                text=True,
-                check=False
-            )
-
-            return {
-                'deploy_command': deploy_command,
-                'return_code': result.returncode,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
-                'success': result.returncode == 0
-            }
-        except Exception as e:
-            return {
-                'deploy_command': deploy_command,
-                'error': str(e),
-                'success': False
-            }
+        return await self._run_project_command(inputs, 'deploy_command', deploy_command)
     
     def _detect_language(self, file_extension: str) -> str:
         """Detect programming language from file extension"""
@@ -0,0 +1,184 @@
+"""
+Workflow Output Store for MaaHelper
+Content-addressed storage for large step outputs, referenced lazily from the workflow context
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import ChainMap, OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from ..utils.workspace_index import hash_content
+
+logger = logging.getLogger(__name__)
+
+# Values at least this large (as compact JSON) are stored once by content hash
+BLOB_THRESHOLD = 16 * 1024
+BLOB_REF = "__blob__"
+# Decoded values kept in memory before the least recently used are dropped
+DEFAULT_MEMORY_LIMIT = 64 * 1024 * 1024
+
+
+class OutputRef:
+    """Reference to a value in an OutputStore; cheap to copy and to persist"""
+
+    __slots__ = ("digest", "size")
+
+    def __init__(self, digest: str, size: int = 0):
+        self.digest = digest
+        self.size = size
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, OutputRef) and other.digest == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"OutputRef({self.digest[:12]}, {self.size} bytes)"
+
+    def to_json(self) -> Dict[str, str]:
+        return {BLOB_REF: self.digest}
+
+    @staticmethod
+    def from_json(value: Any) -> Optional["OutputRef"]:
+        """The reference a persisted value stands for, or None for ordinary values"""
+        if isinstance(value, dict) and len(value) == 1 and BLOB_REF in value:
+            return OutputRef(value[BLOB_REF])
+        return None
+
+
+class OutputStore:
+    """Content-addressed JSON values, cached in memory and written through to disk
+
+    Identical outputs (e.g. the same file read by several steps) are stored
+    once. Values returned by get() are shared, so callers must not mutate them.
+    Safe to use from executor threads as well as the event loop.
+    """
+
+    def __init__(self, blob_dir: Path, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.blob_dir = Path(blob_dir)
+        self.memory_limit = memory_limit
+        self._memory: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, value: Any) -> OutputRef:
+        """Store a JSON-serializable value and return its reference"""
+        encoded = json.dumps(value, separators=(',', ':'))
+        return self._put_encoded(value, encoded)
+
+    def _put_encoded(self, value: Any, encoded: str) -> OutputRef:
+        digest = hash_content(encoded.encode('utf-8'))
+        blob_file = self.blob_dir / digest
+        if digest not in self._memory and not blob_file.exists():
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = blob_file.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temp_file.write_text(encoded, encoding='utf-8')
+            os.replace(temp_file, blob_file)
+        self._remember(digest, value, len(encoded))
+        return OutputRef(digest, len(encoded))
+
+    def get(self, ref: OutputRef) -> Any:
+        with self._lock:
+            entry = self._memory.get(ref.digest)
+            if entry is not None:
+                self._memory.move_to_end(ref.digest)
+                return entry[0]
+
+        encoded = (self.blob_dir / ref.digest).read_text(encoding='utf-8')
+        value = json.loads(encoded)
+        self._remember(ref.digest, value, len(encoded))
+        return value
+
+    def _remember(self, digest: str, value: Any, size: int) -> None:
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return
+            if size > self.memory_limit:
+                return
+            self._memory[digest] = (value, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_limit:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted
+
+    def pack(self, value: Any) -> Any:
+        """A reference for large values, the value itself otherwise"""
+        if not isinstance(value, (str, list, dict)):
+            return value
+        try:
+            encoded = json.dumps(value, separators=(',', ':'))
+        except (TypeError, ValueError):
+            # Not JSON-serializable; keep it inline
+            return value
+        if len(encoded) < BLOB_THRESHOLD:
+            return value
+        return self._put_encoded(value, encoded)
+
+    def pack_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: self.pack(value) for key, value in values.items()}
+
+    def resolve(self, value: Any) -> Any:
+        return self.get(value) if isinstance(value, OutputRef) else value
+
+    def resolve_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: self.resolve(value) for key, value in values.items()}
+
+
+class WorkflowContext(MutableMapping):
+    """Shared workflow context holding large values as OutputRefs
+
+    Values are packed on assignment and resolved only when a key is read,
+    so handing the context to a step or persisting it copies references
+    rather than file contents and LLM responses.
+    """
+
+    def __init__(self, store: OutputStore, initial: Optional[Dict[str, Any]] = None):
+        self.store = store
+        self._data: Dict[str, Any] = {}
+        if initial:
+            self.update(initial)
+
+    @classmethod
+    def from_raw(cls, store: OutputStore, raw: Dict[str, Any]) -> "WorkflowContext":
+        """A context over values that are already packed, e.g. another context's raw()"""
+        context = cls(store)
+        context._data = dict(raw)
+        return context
+
+    def __getitem__(self, key: str) -> Any:
+        return self.store.resolve(self._data[key])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = self.store.pack(value)
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        # Mapping's default would resolve the value
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def raw_value(self, key: str) -> Any:
+        """The stored value for key, an OutputRef if it is large"""
+        return self._data[key]
+
+    def raw(self) -> Dict[str, Any]:
+        """Values with references left unresolved"""
+        return dict(self._data)
+
+    def step_inputs(self, inputs: Dict[str, Any]) -> ChainMap:
+        """A step's own inputs layered over the context, resolved lazily per key"""
+        return ChainMap(dict(inputs), self)
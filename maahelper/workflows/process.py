@@ -0,0 +1,177 @@
+"""
+Subprocess Execution for MaaHelper
+Non-blocking commands for workflow nodes, with streamed output, timeouts and output caps
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import shlex
+import signal
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds a command may run before it is killed, unless a node's timeout input says otherwise
+DEFAULT_COMMAND_TIMEOUT = 30 * 60
+# Characters of stdout and of stderr kept per command; older output is dropped first
+DEFAULT_OUTPUT_LIMIT = 1024 * 1024
+# Seconds between terminating a command and killing it
+KILL_GRACE_PERIOD = 2.0
+
+_CHUNK_SIZE = 64 * 1024
+
+OutputSink = Callable[[str, str], Awaitable[None]]
+
+# Receives (stream, line) for every output line of commands run by the current
+# step; the engine sets it per step task, so parallel steps report separately
+output_sink: "ContextVar[Optional[OutputSink]]" = ContextVar('output_sink', default=None)
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a finished, timed-out or killed command"""
+    return_code: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    truncated: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.return_code == 0 and not self.timed_out
+
+
+class _OutputBuffer:
+    """The most recent output of one stream, at most limit characters"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.lines: Deque[str] = deque()
+        self.size = 0
+        self.truncated = False
+
+    def append(self, line: str) -> None:
+        self.lines.append(line)
+        self.size += len(line)
+        while self.size > self.limit and self.lines:
+            self.size -= len(self.lines.popleft())
+            self.truncated = True
+
+    def text(self) -> str:
+        return "".join(self.lines)
+
+
+def split_command(command: Union[str, Sequence[str]]) -> List[str]:
+    """Arguments for a command given as a shell-style string or a list"""
+    if isinstance(command, str):
+        return shlex.split(command, posix=os.name != 'nt')
+    return list(command)
+
+
+async def _pump(stream: asyncio.StreamReader, name: str, buffer: _OutputBuffer,
+                sink: Optional[OutputSink]) -> None:
+    """Read a stream to EOF in chunks, so arbitrarily long lines never overrun the reader"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ""
+    while True:
+        chunk = await stream.read(_CHUNK_SIZE)
+        pending += decoder.decode(chunk, final=not chunk)
+        *complete, pending = pending.split("\n")
+        lines = [line + "\n" for line in complete]
+        if len(pending) > buffer.limit:
+            # Only the tail of an overlong line fits the buffer; flush it now so pending stays bounded
+            lines.append(pending[-buffer.limit:])
+            pending = ""
+            buffer.truncated = True
+        elif not chunk and pending:
+            lines.append(pending)
+        for line in lines:
+            buffer.append(line)
+            if sink:
+                await sink(name, line.rstrip("\r\n"))
+        if not chunk:
+            break
+
+
+def _signal_process(process: asyncio.subprocess.Process, sig: int) -> None:
+    """Signal the command and anything it started (its own process group on POSIX)"""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _stop(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    _signal_process(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        _signal_process(process, signal.SIGKILL if os.name == 'posix' else signal.SIGTERM)
+        await process.wait()
+
+
+async def run_command(command: Union[str, Sequence[str]], cwd: Optional[str] = None,
+                      timeout: Optional[float] = DEFAULT_COMMAND_TIMEOUT,
+                      output_limit: int = DEFAULT_OUTPUT_LIMIT,
+                      sink: Optional[OutputSink] = None) -> CommandResult:
+    """Run a command without blocking the event loop
+
+    stdout and stderr are streamed line by line to sink (default: the current
+    step's output_sink) and the last output_limit characters of each are kept.
+    A command still running after timeout seconds is stopped and reported
+    as timed out; cancelling the caller stops it too. Raises OSError if the
+    command cannot be started.
+    """
+    args = split_command(command)
+    if not args:
+        raise ValueError("command is empty")
+    sink = sink or output_sink.get()
+
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=cwd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=os.name == 'posix'
+    )
+    stdout, stderr = _OutputBuffer(output_limit), _OutputBuffer(output_limit)
+    pumps = asyncio.gather(
+        _pump(process.stdout, 'stdout', stdout, sink),
+        _pump(process.stderr, 'stderr', stderr, sink)
+    )
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), timeout)
+        await process.wait()
+    except asyncio.TimeoutError:
+        timed_out = True
+        logger.warning(f"Command timed out after {timeout}s: {' '.join(args)}")
+    finally:
+        # Covers timeouts and cancellation of the calling step alike
+        await asyncio.shield(_stop(process))
+        try:
+            # Output written before the command stopped is still collected
+            await asyncio.wait_for(pumps, KILL_GRACE_PERIOD)
+        except (asyncio.TimeoutError, asyncio.CancelledError, Exception):
+            pass
+
+    return CommandResult(
+        return_code=process.returncode,
+        stdout=stdout.text(),
+        stderr=stderr.text(),
+        timed_out=timed_out,
+        truncated=stdout.truncated or stderr.truncated
+    )
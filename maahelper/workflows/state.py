@@ -6,14 +6,36 @@ Handles persistent state for long-running workflows with checkpoints and resume
 import json
 import asyncio
 import logging
+import os
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from datetime import datetime
-import aiofiles
+
+from .catalog import WorkflowCatalog, summarize_state
+from .outputs import OutputRef, OutputStore
 
 logger = logging.getLogger(__name__)
 
+# Seconds between coalesced snapshots while deltas are being appended
+SNAPSHOT_INTERVAL = 2.0
+
+# Statuses of workflows that will not run again and may be cleaned up
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def _to_json(obj: Any) -> Any:
+    """Convert datetime objects to ISO strings (recursively)"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, OutputRef):
+        return obj.to_json()
+    if isinstance(obj, dict):
+        return {k: _to_json(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_json(v) for v in obj]
+    return obj
+
 @dataclass
 class WorkflowState:
     """Represents the state of a workflow at a point in time"""
@@ -47,20 +69,49 @@ class WorkflowStateManager:
     Manages persistent state for workflows with checkpoints and resume capabilities
     """
     
-    def __init__(self, workspace_path: str = "."):
+    def __init__(self, workspace_path: str = ".", snapshot_interval: float = SNAPSHOT_INTERVAL):
         self.workspace_path = Path(workspace_path)
         self.state_dir = self.workspace_path / ".maahelper" / "workflows"
         self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.blob_dir = self.state_dir / "blobs"
+        # Context values and step outputs of BLOB_THRESHOLD bytes or more are
+        # stored here once by content hash and referenced from state files
+        self.outputs = OutputStore(self.blob_dir)
+        # Summary rows for listings and statistics, updated with every snapshot
+        self.catalog = WorkflowCatalog(self.state_dir)
+        self.snapshot_interval = snapshot_interval
         
         # In-memory cache for active workflow states
         self.state_cache: Dict[str, WorkflowState] = {}
         
-        # Lock for concurrent access
-        self._lock = asyncio.Lock()
+        # One lock per workflow, so workflows never wait on each other's persistence
+        self._locks: Dict[str, asyncio.Lock] = {}
+        
+        # Pending coalesced snapshot per workflow
+        self._snapshot_tasks: Dict[str, asyncio.Task] = {}
+    
+    def _state_file(self, workflow_id: str) -> Path:
+        return self.state_dir / f"{workflow_id}.json"
+    
+    def _log_file(self, workflow_id: str) -> Path:
+        """Append-only deltas since the last snapshot, one JSON object per line"""
+        return self.state_dir / f"{workflow_id}.log"
+    
+    def _workflow_lock(self, workflow_id: str) -> asyncio.Lock:
+        lock = self._locks.get(workflow_id)
+        if lock is None:
+            lock = self._locks[workflow_id] = asyncio.Lock()
+        return lock
+    
+    @staticmethod
+    async def _run_io(func, *args) -> Any:
+        """Run serialization and file I/O in a thread, off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
     
     async def save_workflow_state(self, workflow_id: str, state_data: Dict[str, Any]) -> bool:
         """Save workflow state to persistent storage"""
-        async with self._lock:
+        async with self._workflow_lock(workflow_id):
             try:
                 # Create or update workflow state
                 if workflow_id in self.state_cache:
@@ -78,25 +129,7 @@ class WorkflowStateManager:
                     )
                     self.state_cache[workflow_id] = state
                 
-                # Save to file
-                state_file = self.state_dir / f"{workflow_id}.json"
-                state_dict = asdict(state)
-
-                # Convert datetime objects to ISO strings (recursively)
-                def _serialize(obj):
-                    from datetime import datetime as _dt
-                    if isinstance(obj, _dt):
-                        return obj.isoformat()
-                    if isinstance(obj, dict):
-                        return {k: _serialize(v) for k, v in obj.items()}
-                    if isinstance(obj, list):
-                        return [_serialize(v) for v in obj]
-                    return obj
-
-                state_serializable = _serialize(state_dict)
-
-                async with aiofiles.open(state_file, 'w') as f:
-                    await f.write(json.dumps(state_serializable, indent=2))
+                await self._snapshot_now(workflow_id, state)
 
                 logger.info(f"Saved workflow state for {workflow_id}")
                 return True
@@ -105,52 +138,212 @@ class WorkflowStateManager:
                 logger.error(f"Failed to save workflow state for {workflow_id}: {e}")
                 return False
     
-    async def load_workflow_state(self, workflow_id: str) -> Optional[Dict[str, Any]]:
-        """Load workflow state from persistent storage"""
-        async with self._lock:
+    async def append_delta(self, workflow_id: str, delta: Dict[str, Any]) -> bool:
+        """Record a state change without rewriting the whole state
+
+        A delta may carry a new workflow 'status', a 'step' dict (its 'id'
+        plus changed fields such as status, error, outputs and timestamps)
+        and 'context' values to merge. It is applied to the cached state and
+        appended to the workflow's log; a snapshot folding the log back into
+        the state file follows within snapshot_interval seconds.
+        """
+        async with self._workflow_lock(workflow_id):
             try:
-                # Check cache first
-                if workflow_id in self.state_cache:
-                    return asdict(self.state_cache[workflow_id])
-                
-                # Load from file
-                state_file = self.state_dir / f"{workflow_id}.json"
-                if not state_file.exists():
-                    return None
-                
-                async with aiofiles.open(state_file, 'r') as f:
-                    content = await f.read()
-                    state_dict = json.loads(content)
+                state = await self._get_state(workflow_id)
+                if state is None:
+                    state = WorkflowState(workflow_id=workflow_id, status=delta.get('status', 'running'))
+                    self.state_cache[workflow_id] = state
+                self._apply_delta(state, delta)
+                await self._run_io(self._append_record, workflow_id, delta)
                 
-                # Convert ISO strings back to datetime objects
-                if state_dict.get('created_at'):
-                    state_dict['created_at'] = datetime.fromisoformat(state_dict['created_at'])
-                if state_dict.get('updated_at'):
-                    state_dict['updated_at'] = datetime.fromisoformat(state_dict['updated_at'])
+                if workflow_id not in self._snapshot_tasks:
+                    self._snapshot_tasks[workflow_id] = asyncio.ensure_future(self._snapshot_later(workflow_id))
+                return True
                 
-                # Create state object and cache it
-                state = WorkflowState(**state_dict)
-                self.state_cache[workflow_id] = state
+            except Exception as e:
+                logger.error(f"Failed to append workflow delta for {workflow_id}: {e}")
+                return False
+    
+    def _append_record(self, workflow_id: str, delta: Dict[str, Any]) -> None:
+        record = _to_json(delta)
+        if 'step' in record and 'outputs' in record['step']:
+            record['step']['outputs'] = self._externalize(record['step']['outputs'])
+        if 'context' in record:
+            record['context'] = self._externalize(record['context'])
+        with open(self._log_file(workflow_id), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    
+    @staticmethod
+    def _apply_delta(state: WorkflowState, delta: Dict[str, Any]) -> None:
+        """Apply one delta; applying it twice has the same effect as once"""
+        if 'status' in delta:
+            state.status = delta['status']
+        step = delta.get('step')
+        if step:
+            step_id = step['id']
+            for step_data in (state.definition or {}).get('steps', []):
+                if step_data.get('id') == step_id:
+                    step_data.update({key: value for key, value in step.items() if key != 'id'})
+            status = step.get('status')
+            if status:
+                state.current_step = step_id if status == "running" else state.current_step
+                if status == "completed" and step_id not in state.completed_steps:
+                    state.completed_steps.append(step_id)
+                if status == "failed" and step_id not in state.failed_steps:
+                    state.failed_steps.append(step_id)
+        if delta.get('context'):
+            state.context.update(delta['context'])
+        state.updated_at = datetime.now()
+    
+    async def _snapshot_later(self, workflow_id: str) -> None:
+        await asyncio.sleep(self.snapshot_interval)
+        async with self._workflow_lock(workflow_id):
+            self._snapshot_tasks.pop(workflow_id, None)
+            state = self.state_cache.get(workflow_id)
+            if state is not None:
+                try:
+                    await self._write_snapshot(workflow_id, state)
+                except Exception as e:
+                    # The log still holds every delta; the next snapshot retries
+                    logger.error(f"Failed to snapshot workflow state for {workflow_id}: {e}")
+    
+    async def flush_workflow_state(self, workflow_id: str) -> None:
+        """Write any pending snapshot now"""
+        async with self._workflow_lock(workflow_id):
+            pending = self._snapshot_tasks.pop(workflow_id, None)
+            if pending:
+                pending.cancel()
+                state = self.state_cache.get(workflow_id)
+                if state is not None:
+                    await self._write_snapshot(workflow_id, state)
+    
+    async def _snapshot_now(self, workflow_id: str, state: WorkflowState) -> None:
+        """Write a full snapshot, superseding any pending one (caller holds the workflow lock)"""
+        pending = self._snapshot_tasks.pop(workflow_id, None)
+        if pending:
+            pending.cancel()
+        await self._write_snapshot(workflow_id, state)
+    
+    async def _write_snapshot(self, workflow_id: str, state: WorkflowState) -> None:
+        # The workflow lock is held, so the state cannot change while a thread serializes it
+        await self._run_io(self._write_snapshot_sync, workflow_id, state)
+    
+    def _write_snapshot_sync(self, workflow_id: str, state: WorkflowState) -> None:
+        """Write the full state compactly, large values as blob references, and empty the log"""
+        state_dict = _to_json(asdict(state))
+        state_dict['context'] = self._externalize(state_dict['context'])
+        for step_data in (state_dict.get('definition') or {}).get('steps', []):
+            if step_data.get('outputs'):
+                step_data['outputs'] = self._externalize(step_data['outputs'])
+
+        # Readers see either the previous snapshot or this one, never a partial file
+        state_file = self._state_file(workflow_id)
+        temp_file = state_file.with_name(f"{workflow_id}.{os.getpid()}.tmp")
+        temp_file.write_text(json.dumps(state_dict, separators=(',', ':')), encoding='utf-8')
+        os.replace(temp_file, state_file)
+        try:
+            self.catalog.upsert(summarize_state(workflow_id, state_dict))
+        except Exception as e:
+            # The state file is authoritative; the row is refreshed by the next snapshot
+            logger.error(f"Failed to update workflow catalog for {workflow_id}: {e}")
+        # Deltas are idempotent, so a crash before this leaves a replayable log
+        log_file = self._log_file(workflow_id)
+        if log_file.exists():
+            log_file.unlink()
+    
+    def _externalize(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Large top-level values as persisted blob references"""
+        packed = {}
+        for key, value in values.items():
+            value = self.outputs.pack(value)
+            packed[key] = value.to_json() if isinstance(value, OutputRef) else value
+        return packed
+    
+    @staticmethod
+    def _internalize(values: Dict[str, Any]) -> Dict[str, Any]:
+        """Persisted blob references back to (lazily resolved) OutputRefs"""
+        return {key: OutputRef.from_json(value) or value for key, value in values.items()}
+    
+    async def _get_state(self, workflow_id: str) -> Optional[WorkflowState]:
+        """Cached state, or the snapshot with its log replayed (caller holds the workflow lock)"""
+        if workflow_id in self.state_cache:
+            return self.state_cache[workflow_id]
+        
+        state = await self._run_io(self._read_state, workflow_id)
+        if state is not None:
+            self.state_cache[workflow_id] = state
+        return state
+    
+    def _read_state(self, workflow_id: str) -> Optional[WorkflowState]:
+        state_file = self._state_file(workflow_id)
+        log_file = self._log_file(workflow_id)
+        if not state_file.exists() and not log_file.exists():
+            return None
+        
+        state_dict = {'workflow_id': workflow_id, 'status': 'running'}
+        if state_file.exists():
+            state_dict = json.loads(state_file.read_text(encoding='utf-8'))
+        
+        # Convert ISO strings back to datetime objects
+        if state_dict.get('created_at'):
+            state_dict['created_at'] = datetime.fromisoformat(state_dict['created_at'])
+        if state_dict.get('updated_at'):
+            state_dict['updated_at'] = datetime.fromisoformat(state_dict['updated_at'])
+        
+        state = WorkflowState(**state_dict)
+        
+        if log_file.exists():
+            for line in log_file.read_text(encoding='utf-8').splitlines():
+                try:
+                    delta = json.loads(line)
+                except json.JSONDecodeError:
+                    # A write interrupted by a crash; later deltas were never written
+                    logger.warning(f"Ignoring truncated delta in {log_file}")
+                    break
+                self._apply_delta(state, delta)
+        
+        state.context = self._internalize(state.context)
+        for step_data in (state.definition or {}).get('steps', []):
+            if step_data.get('outputs'):
+                step_data['outputs'] = self._internalize(step_data['outputs'])
+        return state
+    
+    async def load_workflow_state(self, workflow_id: str, resolve_outputs: bool = True) -> Optional[Dict[str, Any]]:
+        """Load workflow state from persistent storage
+
+        With resolve_outputs=False, large context values and step outputs
+        stay OutputRefs into self.outputs.
+        """
+        async with self._workflow_lock(workflow_id):
+            try:
+                state = await self._get_state(workflow_id)
+                if state is None:
+                    return None
                 
                 logger.info(f"Loaded workflow state for {workflow_id}")
-                return asdict(state)
+                return await self._run_io(self._state_to_dict, state, resolve_outputs)
                 
             except Exception as e:
                 logger.error(f"Failed to load workflow state for {workflow_id}: {e}")
                 return None
     
+    def _state_to_dict(self, state: WorkflowState, resolve_outputs: bool) -> Dict[str, Any]:
+        state_dict = asdict(state)
+        if resolve_outputs:
+            state_dict['context'] = self.outputs.resolve_values(state_dict['context'])
+            for step_data in (state_dict.get('definition') or {}).get('steps', []):
+                if step_data.get('outputs'):
+                    step_data['outputs'] = self.outputs.resolve_values(step_data['outputs'])
+        return state_dict
+    
     async def create_checkpoint(self, workflow_id: str, checkpoint_name: str, 
                               checkpoint_data: Dict[str, Any]) -> bool:
         """Create a checkpoint for a workflow"""
-        async with self._lock:
+        async with self._workflow_lock(workflow_id):
             try:
-                state = self.state_cache.get(workflow_id)
+                state = await self._get_state(workflow_id)
                 if not state:
-                    # Try to load from file
-                    state_data = await self.load_workflow_state(workflow_id)
-                    if not state_data:
-                        return False
-                    state = self.state_cache[workflow_id]
+                    return False
                 
                 # Add checkpoint
                 checkpoint = {
@@ -163,7 +356,8 @@ class WorkflowStateManager:
                 state.updated_at = datetime.now()
                 
                 # Save updated state
-                return await self.save_workflow_state(workflow_id, asdict(state))
+                await self._snapshot_now(workflow_id, state)
+                return True
                 
             except Exception as e:
                 logger.error(f"Failed to create checkpoint for {workflow_id}: {e}")
@@ -172,15 +366,14 @@ class WorkflowStateManager:
     async def restore_from_checkpoint(self, workflow_id: str, 
                                     checkpoint_name: str) -> Optional[Dict[str, Any]]:
         """Restore workflow state from a specific checkpoint"""
-        async with self._lock:
+        async with self._workflow_lock(workflow_id):
             try:
-                state_data = await self.load_workflow_state(workflow_id)
-                if not state_data:
+                state = await self._get_state(workflow_id)
+                if not state:
                     return None
                 
                 # Find the checkpoint
-                checkpoints = state_data.get('checkpoints', [])
-                for checkpoint in checkpoints:
+                for checkpoint in state.checkpoints:
                     if checkpoint['name'] == checkpoint_name:
                         logger.info(f"Restored workflow {workflow_id} from checkpoint {checkpoint_name}")
                         return checkpoint['data']
@@ -214,16 +407,16 @@ class WorkflowStateManager:
     
     async def delete_workflow_state(self, workflow_id: str) -> bool:
         """Delete workflow state and all associated data"""
-        async with self._lock:
+        async with self._workflow_lock(workflow_id):
             try:
                 # Remove from cache
                 if workflow_id in self.state_cache:
                     del self.state_cache[workflow_id]
+                pending = self._snapshot_tasks.pop(workflow_id, None)
+                if pending:
+                    pending.cancel()
                 
-                # Remove file
-                state_file = self.state_dir / f"{workflow_id}.json"
-                if state_file.exists():
-                    state_file.unlink()
+                await self._run_io(self._delete_files, workflow_id)
                 
                 logger.info(f"Deleted workflow state for {workflow_id}")
                 return True
@@ -232,63 +425,44 @@ class WorkflowStateManager:
                 logger.error(f"Failed to delete workflow state for {workflow_id}: {e}")
                 return False
     
-    async def list_all_workflows(self) -> List[Dict[str, Any]]:
-        """List all workflows with their basic information"""
+    def _delete_files(self, workflow_id: str) -> None:
+        # Blobs may be shared with other workflows and are kept
+        for state_file in (self._state_file(workflow_id), self._log_file(workflow_id)):
+            if state_file.exists():
+                state_file.unlink()
+        self.catalog.delete(workflow_id)
+    
+    async def list_all_workflows(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List all workflows with their basic information, most recent first"""
         try:
-            workflows = []
-            
-            # Scan state directory for workflow files
-            for state_file in self.state_dir.glob("*.json"):
-                workflow_id = state_file.stem
-                
-                try:
-                    async with aiofiles.open(state_file, 'r') as f:
-                        content = await f.read()
-                        state_dict = json.loads(content)
-                    
-                    workflows.append({
-                        'id': workflow_id,
-                        'status': state_dict.get('status', 'unknown'),
-                        'created_at': state_dict.get('created_at'),
-                        'updated_at': state_dict.get('updated_at'),
-                        'completed_steps': len(state_dict.get('completed_steps', [])),
-                        'failed_steps': len(state_dict.get('failed_steps', []))
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to read workflow state file {state_file}: {e}")
-                    continue
-            
-            return workflows
+            rows = await self._run_io(self.catalog.entries, status)
+            return [
+                {
+                    'id': row['workflow_id'],
+                    'name': row['name'],
+                    'status': row['status'],
+                    'created_at': row['created_at'],
+                    'updated_at': row['updated_at'],
+                    'total_steps': row['total_steps'],
+                    'completed_steps': row['completed_steps'],
+                    'failed_steps': row['failed_steps']
+                }
+                for row in rows
+            ]
             
         except Exception as e:
             logger.error(f"Failed to list workflows: {e}")
             return []
     
     async def cleanup_old_workflows(self, days_old: int = 30) -> int:
-        """Clean up workflow states older than specified days"""
+        """Clean up finished workflow states not updated for the specified days"""
         try:
-            cutoff_date = datetime.now().timestamp() - (days_old * 24 * 60 * 60)
+            cutoff = datetime.now().timestamp() - (days_old * 24 * 60 * 60)
             cleaned_count = 0
             
-            for state_file in self.state_dir.glob("*.json"):
-                try:
-                    # Check file modification time
-                    if state_file.stat().st_mtime < cutoff_date:
-                        # Load state to check if it's completed or failed
-                        async with aiofiles.open(state_file, 'r') as f:
-                            content = await f.read()
-                            state_dict = json.loads(content)
-                        
-                        status = state_dict.get('status', '')
-                        if status in ['completed', 'failed', 'cancelled']:
-                            workflow_id = state_file.stem
-                            await self.delete_workflow_state(workflow_id)
-                            cleaned_count += 1
-                            
-                except Exception as e:
-                    logger.warning(f"Failed to process workflow state file {state_file}: {e}")
-                    continue
+            for workflow_id in await self._run_io(self.catalog.updated_before, cutoff, FINISHED_STATUSES):
+                if await self.delete_workflow_state(workflow_id):
+                    cleaned_count += 1
             
             logger.info(f"Cleaned up {cleaned_count} old workflow states")
             return cleaned_count
@@ -300,22 +474,7 @@ class WorkflowStateManager:
     async def get_workflow_statistics(self) -> Dict[str, Any]:
         """Get statistics about all workflows"""
         try:
-            workflows = await self.list_all_workflows()
-            
-            stats = {
-                'total_workflows': len(workflows),
-                'by_status': {},
-                'total_completed_steps': 0,
-                'total_failed_steps': 0
-            }
-            
-            for workflow in workflows:
-                status = workflow['status']
-                stats['by_status'][status] = stats['by_status'].get(status, 0) + 1
-                stats['total_completed_steps'] += workflow['completed_steps']
-                stats['total_failed_steps'] += workflow['failed_steps']
-            
-            return stats
+            return await self._run_io(self.catalog.statistics)
             
         except Exception as e:
             logger.error(f"Failed to get workflow statistics: {e}")
@@ -85,29 +85,39 @@ class WorkflowTemplates:
                     "name": "Scan Project Structure",
                     "description": "Analyze project structure and identify all code files",
                     "node_type": "scan_project",
-                    "inputs": {"include_hidden": False}
+                    "inputs": {
+                        "include_hidden": False,
+                        "extensions": [".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".rs",
+                                       ".c", ".cpp", ".h", ".hpp", ".cs", ".php", ".rb"]
+                    }
                 },
                 {
                     "id": "analyze_files",
                     "name": "Analyze Code Files",
-                    "description": "Perform detailed analysis of each code file",
-                    "node_type": "parallel",
+                    "description": "Review, bug-check and profile every code file in parallel",
+                    "node_type": "map",
                     "inputs": {
+                        "items_from": "files",
+                        "root_from": "project_path",
+                        "item_key": "file_path",
                         "operations": [
+                            {"node_type": "analyze_file", "inputs": {}},
                             {"node_type": "code_review", "inputs": {}},
                             {"node_type": "bug_analysis", "inputs": {}},
                             {"node_type": "performance_analysis", "inputs": {}}
-                        ]
+                        ],
+                        "keep": ["file_path", "language", "review_result", "bug_analysis", "performance_analysis"],
+                        "max_concurrency": 4,
+                        "output_key": "data"
                     }
                 },
                 {
                     "id": "generate_report",
                     "name": "Generate Quality Report",
-                    "description": "Compile comprehensive quality report",
-                    "node_type": "ai_generate",
+                    "description": "Compile comprehensive quality report from the per-file analyses",
+                    "node_type": "ai_analyze",
                     "inputs": {
-                        "content_type": "quality_report",
-                        "prompt": "Generate comprehensive code quality report"
+                        "analysis_type": "code quality report"
                     }
                 },
                 {
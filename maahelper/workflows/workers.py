@@ -0,0 +1,245 @@
+"""
+Workflow Worker Pool for MaaHelper
+Runs CPU-bound workflow nodes in local worker processes, streaming their events back
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import itertools
+from collections import ChainMap
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .memo import InputRecorder
+from .outputs import OutputStore, WorkflowContext
+from .process import OutputSink, output_sink
+
+logger = logging.getLogger(__name__)
+
+# Nodes that spend their time computing (parsing, outlining, indexing) rather
+# than waiting on LLMs, files or subprocesses; everything else runs in-loop
+PROCESS_NODES = frozenset({'analyze_file', 'scan_project'})
+
+# Seconds the result reader waits before checking for workers that died
+_POLL_INTERVAL = 0.5
+
+
+def _portable_layers(inputs: Mapping[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Node inputs as picklable layers; context values travel as output store references"""
+    if isinstance(inputs, WorkflowContext):
+        return [('context', inputs.raw())]
+    if isinstance(inputs, ChainMap):
+        return [layer for mapping in inputs.maps for layer in _portable_layers(mapping)]
+    return [('dict', dict(inputs))]
+
+
+def _worker_main(tasks, results, blob_dir: str) -> None:
+    """Worker process loop: run node tasks until told to stop"""
+    # Ctrl+C is handled by the coordinator, which stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from .nodes import WorkflowNodes
+
+    nodes = WorkflowNodes()
+    store = OutputStore(Path(blob_dir))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, node_type, layers, record = task
+        results.put(('started', task_id, multiprocessing.current_process().pid))
+        try:
+            outputs, reads = asyncio.run(_run_task(nodes, store, results, task_id, node_type, layers, record))
+            results.put(('result', task_id, True, (outputs, reads)))
+        except Exception as e:
+            results.put(('result', task_id, False, f"{type(e).__name__}: {e}"))
+
+
+async def _run_task(nodes, store: OutputStore, results, task_id: int, node_type: str,
+                    layers: List[Tuple[str, Dict[str, Any]]], record: bool) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    maps = [WorkflowContext.from_raw(store, data) if kind == 'context' else data for kind, data in layers]
+    inputs = InputRecorder(*maps) if record else ChainMap(*maps)
+
+    async def forward(stream: str, line: str) -> None:
+        results.put(('event', task_id, stream, line))
+
+    output_sink.set(forward)
+    result = await nodes.nodes[node_type](inputs)
+    if not result:
+        raise RuntimeError(f"{node_type} returned no result")
+    # Large outputs go straight to the shared blob store; only references travel back
+    return store.pack_values(result), (inputs.reads if record else {})
+
+
+class WorkerPool:
+    """N local worker processes fed from one task queue
+
+    Workers report back on a result queue: when they start a task, every
+    output line the node produces, and the final outputs or error. A reader
+    thread hands each message to the coordinator task awaiting it. Workers
+    that die are replaced and their task fails; cancelling a task stops the
+    worker running it.
+    """
+
+    def __init__(self, processes: int, blob_dir: Path, placement: Iterable[str] = PROCESS_NODES):
+        self.size = max(1, processes)
+        self.blob_dir = Path(blob_dir)
+        self.placement = frozenset(placement)
+        self._context = multiprocessing.get_context('spawn')
+        self._tasks = None
+        self._results = None
+        self._processes: List[multiprocessing.Process] = []
+        self._reader: Optional[threading.Thread] = None
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        # task id -> (loop, queue) of the coordinator task awaiting it
+        self._waiting: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = {}
+        # worker pid -> task id it is running
+        self._assigned: Dict[int, int] = {}
+        self._cancelled: set = set()
+        self._closed = False
+
+    def handles(self, node_type: str) -> bool:
+        return node_type in self.placement
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._reader is not None:
+                return
+            self._tasks = self._context.Queue()
+            self._results = self._context.Queue()
+            for _ in range(self.size):
+                self._spawn()
+            self._reader = threading.Thread(target=self._read_results, name="workflow-worker-results", daemon=True)
+            self._reader.start()
+
+    def _spawn(self) -> None:
+        process = self._context.Process(
+            target=_worker_main, args=(self._tasks, self._results, str(self.blob_dir)), daemon=True
+        )
+        process.start()
+        self._processes.append(process)
+
+    async def run(self, node_type: str, inputs: Mapping[str, Any],
+                  sink: Optional[OutputSink] = None) -> Dict[str, Any]:
+        """Run a node in a worker process and return its outputs
+
+        If inputs is an InputRecorder, the keys the node read in the worker
+        are added to its reads. Output lines go to sink (default: the current
+        step's output_sink).
+        """
+        if self._closed:
+            raise RuntimeError("worker pool is shut down")
+        self._start()
+        sink = sink or output_sink.get()
+        record = isinstance(inputs, InputRecorder)
+        task_id = next(self._task_ids)
+        messages: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._waiting[task_id] = (asyncio.get_running_loop(), messages)
+        self._tasks.put((task_id, node_type, _portable_layers(inputs), record))
+
+        try:
+            while True:
+                message = await messages.get()
+                if message[0] == 'event':
+                    if sink:
+                        await sink(message[2], message[3])
+                    continue
+                _, _, ok, payload = message
+                if not ok:
+                    raise RuntimeError(payload)
+                outputs, reads = payload
+                if record:
+                    inputs.reads.update(reads)
+                return outputs
+        except asyncio.CancelledError:
+            self._cancel(task_id)
+            raise
+        finally:
+            with self._lock:
+                self._waiting.pop(task_id, None)
+
+    def _cancel(self, task_id: int) -> None:
+        with self._lock:
+            pid = next((pid for pid, assigned in self._assigned.items() if assigned == task_id), None)
+            if pid is None:
+                # Not picked up yet; the worker is stopped as soon as it starts it
+                self._cancelled.add(task_id)
+                return
+        self._terminate(pid)
+
+    def _terminate(self, pid: int) -> None:
+        for process in self._processes:
+            if process.pid == pid and process.is_alive():
+                process.terminate()
+
+    def _deliver(self, task_id: int, message: tuple) -> None:
+        with self._lock:
+            waiting = self._waiting.get(task_id)
+        if waiting:
+            loop, messages = waiting
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+
+    def _read_results(self) -> None:
+        while not self._closed:
+            # Checked every round: a busy result queue must not hide a worker that died
+            self._replace_dead_workers()
+            try:
+                message = self._results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            kind, task_id = message[0], message[1]
+            if kind == 'started' and not any(process.pid == message[2] for process in self._processes):
+                # The worker died, and was replaced, before this message was read
+                self._deliver(task_id, ('result', task_id, False, "worker process exited"))
+                continue
+            if kind == 'started':
+                with self._lock:
+                    self._assigned[message[2]] = task_id
+                    cancelled = task_id in self._cancelled
+                    self._cancelled.discard(task_id)
+                if cancelled:
+                    self._terminate(message[2])
+                continue
+            if kind == 'result':
+                with self._lock:
+                    for pid, assigned in list(self._assigned.items()):
+                        if assigned == task_id:
+                            del self._assigned[pid]
+            self._deliver(task_id, message)
+
+    def _replace_dead_workers(self) -> None:
+        for process in list(self._processes):
+            if process.is_alive() or self._closed:
+                continue
+            self._processes.remove(process)
+            with self._lock:
+                task_id = self._assigned.pop(process.pid, None)
+            if task_id is not None:
+                logger.warning(f"Worker {process.pid} exited with code {process.exitcode} while running task {task_id}")
+                self._deliver(task_id, ('result', task_id, False, f"worker process exited with code {process.exitcode}"))
+            self._spawn()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the workers and the result reader"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._reader is None:
+            return
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._reader.join(timeout)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Code Analyzer Benchmark
+Compares the original one-pass-per-rule CodeAnalyzer with the single-pass rule
+engine on a synthetic Python file (default: 100k lines) and checks both agree
+"""
+
+import argparse
+import ast
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maahelper.features.realtime_analysis import CodeAnalyzer, CodeIssue
+
+SECURITY_PATTERNS = [r'eval\s*\(', r'exec\s*\(', r'input\s*\(.*\)', r'shell=True', r'pickle\.loads?']
+
+
+def build_source(total_lines: int) -> str:
+    """Generate Python source with a sprinkling of every rule's trigger"""
+    clean = [
+        "    value = compute(item)",
+        "    if value is not None and value.ready:",
+        "        results.append(transform(value, options=options))",
+        "    # Normalise the intermediate representation",
+        "    total = sum(entry.size for entry in results)",
+        "",
+    ]
+    triggers = [
+        "    value = compute(item)  ",
+        "    result_str += str(value)",
+        "    if value:",
+        "        data = pickle.loads(blob)",
+        "",
+        "",
+        "    # " + "long comment " * 8,
+        "    for name in global_names:",
+        "                    if deeply_nested and value:",
+        "    subprocess.run(command, shell=True)",
+    ]
+    lines = ["import pickle", "import subprocess", ""]
+    function = 0
+    while len(lines) < total_lines:
+        lines.append(f"def function_{function}(item, blob, command):")
+        # Every fourth function is long enough to trigger long_function
+        repeats = 6 if function % 4 == 0 else 2
+        for _ in range(repeats):
+            lines.extend(clean * 4)
+        lines.extend(triggers)
+        lines.extend(["    return eval(result_str)", ""])
+        function += 1
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_analyze(content: str) -> list:
+    """The original rules: a separate pass (and parse) per rule family"""
+    issues = []
+
+    def report(line_number: int, rule_id: str) -> None:
+        issues.append(CodeIssue("benchmark.py", line_number, 0, "info", "legacy", rule_id, rule_id=rule_id))
+
+    lines = content.split('\n')
+
+    try:
+        ast.parse(content)
+    except SyntaxError as e:
+        report(e.lineno or 1, "syntax_error")
+
+    for i, line in enumerate(lines, 1):
+        if len(line) > 88:
+            report(i, "line_too_long")
+        if line.endswith(' ') or line.endswith('\t'):
+            report(i, "trailing_whitespace")
+        if i > 1 and not line.strip() and not lines[i-2].strip():
+            report(i, "multiple_blank_lines")
+
+    for i, line in enumerate(lines, 1):
+        if '+=' in line and 'str' in line.lower():
+            report(i, "inefficient_string_concat")
+        if re.search(r'for\s+\w+\s+in.*global', line):
+            report(i, "global_in_loop")
+
+    for i, line in enumerate(lines, 1):
+        for pattern in SECURITY_PATTERNS:
+            if re.search(pattern, line):
+                report(i, f"security_{pattern[:10]}")
+
+    try:
+        for node in ast.walk(ast.parse(content)):
+            if isinstance(node, ast.FunctionDef) and node.end_lineno - node.lineno + 1 > 50:
+                report(node.lineno, "long_function")
+    except SyntaxError:
+        pass
+
+    for i, line in enumerate(lines, 1):
+        indent_level = len(line) - len(line.lstrip())
+        if indent_level > 16 and any(keyword in line for keyword in ['if', 'for', 'while', 'try']):
+            report(i, "high_nesting")
+
+    # Metrics were computed with three more passes over the lines
+    len([line for line in lines if line.strip() and not line.strip().startswith('#')])
+    len([line for line in lines if line.strip().startswith('#')])
+    len([line for line in lines if not line.strip()])
+    return issues
+
+
+def timed(label: str, func, repeat: int):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<32} {best:8.3f}s  ({len(result):,} issues)")
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100_000, help="approximate lines in the generated file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    content = build_source(args.lines)
+    analyzer = CodeAnalyzer()
+    print(f"Analyzing a synthetic {len(content.splitlines()):,}-line Python file ...")
+
+    print("Results:")
+    legacy, legacy_issues = timed("legacy pass per rule", lambda: legacy_analyze(content), args.repeat)
+
+    def analyze() -> list:
+        # Measure a cold analysis, not a hit in the per-file result cache
+        analyzer.cache.clear()
+        return analyzer.analyze_content(content, Path("benchmark.py")).issues
+
+    engine, result = timed("single-pass rule engine", analyze, args.repeat)
+
+    if [(issue.line_number, issue.rule_id) for issue in result] != \
+            [(issue.line_number, issue.rule_id) for issue in legacy_issues]:
+        print("Mismatch: the rule engine reported different issues than the legacy rules")
+        sys.exit(1)
+    print(f"Issues identical; speedup: {legacy / engine:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
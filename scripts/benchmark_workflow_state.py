@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Workflow State Benchmark
+Runs many workflows concurrently (default: 20) and reports wall time, the worst
+event-loop stall caused by state persistence, and whether every state reloads intact
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rich import get_console
+from rich.progress import Progress
+
+from maahelper.workflows import engine as engine_module, nodes as nodes_module
+from maahelper.workflows.engine import WorkflowEngine
+from maahelper.workflows.state import SNAPSHOT_INTERVAL, WorkflowStateManager
+
+
+def use_single_lock(manager: WorkflowStateManager) -> None:
+    """The previous behaviour: one lock for all workflows, serialization on the event loop"""
+    shared = asyncio.Lock()
+
+    async def inline(func, *args):
+        return func(*args)
+
+    manager._workflow_lock = lambda workflow_id: shared
+    manager._run_io = inline
+
+
+async def watch_loop(interval: float, stalls: list, stop: asyncio.Event) -> None:
+    """Record how late each tick fires; a late tick means the loop was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def run(workspace: str, workflows: int, steps: int, keys: int, snapshot_interval: float,
+              single_lock: bool) -> None:
+    engine = WorkflowEngine(None, workspace, memoize=False)
+    engine.state_manager.snapshot_interval = snapshot_interval
+    if single_lock:
+        use_single_lock(engine.state_manager)
+
+    async def work(inputs):
+        # Stands in for an LLM call: mostly waiting, then many small results that
+        # stay inline in the context (below the blob threshold) and grow every snapshot
+        await asyncio.sleep(0.01)
+        step = inputs.get("step")
+        return {f"finding_{step}_{k}": {"file": f"src/module_{k}.py", "line": k, "message": "m" * 200}
+                for k in range(keys)}
+
+    engine.nodes.nodes["work"] = work
+    step_specs = [
+        {"id": f"s{i}", "name": f"s{i}", "description": "benchmark step", "node_type": "work",
+         "inputs": {"step": i}}
+        for i in range(steps)
+    ]
+    # A chain per workflow, so every step persists a delta before the next starts
+    dependencies = {f"s{i}": [f"s{i - 1}"] for i in range(1, steps)}
+    workflow_ids = [
+        await engine.create_workflow(f"bench-{n}", "State benchmark", step_specs, dependencies)
+        for n in range(workflows)
+    ]
+
+    stalls: list = []
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(watch_loop(0.005, stalls, stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.execute_workflow(workflow_id) for workflow_id in workflow_ids))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await watcher
+
+    # A fresh manager reads everything back from disk
+    reloaded = WorkflowStateManager(workspace)
+    intact = 0
+    for workflow_id in workflow_ids:
+        state = await reloaded.load_workflow_state(workflow_id)
+        if state and state["status"] == "completed" and len(state["completed_steps"]) == steps:
+            intact += 1
+
+    label = "single lock, on loop" if single_lock else "per-workflow locks, executor"
+    print(f"  {label:<30} {elapsed:8.3f}s  "
+          f"max loop stall {max(stalls, default=0) * 1000:7.1f}ms  "
+          f"{sum(results)}/{workflows} succeeded, {intact}/{workflows} intact on reload")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workflows", type=int, default=20, help="workflows to run at once")
+    parser.add_argument("--steps", type=int, default=10, help="steps per workflow")
+    parser.add_argument("--keys", type=int, default=50, help="output values per step")
+    parser.add_argument("--snapshot-interval", type=float, default=SNAPSHOT_INTERVAL,
+                        help="seconds between coalesced snapshots")
+    parser.add_argument("--compare", action="store_true", help="also run with the previous single global lock")
+    args = parser.parse_args()
+
+    # Keep workflow panels and progress bars out of the measurements; rendering
+    # 20 live progress displays would otherwise dominate the loop stalls
+    engine_module.console.quiet = True
+    nodes_module.console.quiet = True
+    get_console().quiet = True
+    engine_module.Progress = lambda: Progress(disable=True)
+
+    print(f"Running {args.workflows} workflows x {args.steps} steps ({args.keys} outputs per step):")
+    modes = [False, True] if args.compare else [False]
+    for single_lock in modes:
+        with tempfile.TemporaryDirectory() as workspace:
+            asyncio.run(run(workspace, args.workflows, args.steps, args.keys,
+                            args.snapshot_interval, single_lock))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Workspace Scan Benchmark
+Compares the legacy per-extension glob scan with the single-pass WorkspaceScanner
+on a synthetic tree (default: 100k files, half of them inside node_modules/.venv)
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maahelper.utils.streamlined_file_handler import StreamlinedFileHandler
+from maahelper.utils.workspace_scanner import WorkspaceScanner
+
+
+def build_tree(root: Path, total_files: int, files_per_dir: int = 50) -> None:
+    """Create a synthetic project: source packages plus dependency directories"""
+    extensions = ['.py', '.js', '.ts', '.md', '.json', '.txt', '.bin', '.png']
+    source_files = total_files // 2
+    dependency_files = total_files - source_files
+
+    def fill(base: Path, count: int) -> None:
+        for i in range(count):
+            directory = base / f"pkg{i // (files_per_dir * 10)}" / f"mod{i // files_per_dir}"
+            if i % files_per_dir == 0:
+                directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"file{i}{extensions[i % len(extensions)]}").write_bytes(b"x")
+
+    fill(root / "src", source_files)
+    fill(root / "node_modules", dependency_files // 2)
+    fill(root / ".venv" / "lib", dependency_files - dependency_files // 2)
+    (root / ".gitignore").write_text("*.txt\n")
+
+
+def legacy_scan(root: Path) -> int:
+    """The original scan: one recursive glob per supported extension"""
+    count = 0
+    for ext in StreamlinedFileHandler.SUPPORTED_EXTENSIONS:
+        for path in root.glob(f"**/*{ext}"):
+            if path.is_file():
+                count += 1
+    return count
+
+
+def timed(label: str, func) -> float:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed:8.3f}s  ({count:,} files)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=100_000, help="number of files to create")
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the slow glob baseline")
+    args = parser.parse_args()
+
+    extensions = list(StreamlinedFileHandler.SUPPORTED_EXTENSIONS)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        print(f"Building synthetic tree with {args.files:,} files in {root} ...")
+        build_tree(root, args.files)
+
+        print("Results:")
+        if not args.skip_legacy:
+            legacy = timed("legacy glob per extension", lambda: legacy_scan(root))
+        sequential = timed(
+            "scanner, 1 worker",
+            lambda: sum(1 for _ in WorkspaceScanner(str(root), extensions, max_workers=1).iter_files())
+        )
+        parallel = timed(
+            f"scanner, {os.cpu_count()} workers",
+            lambda: sum(1 for _ in WorkspaceScanner(str(root), extensions,
+                                                    max_workers=os.cpu_count()).iter_files())
+        )
+        if not args.skip_legacy:
+            print(f"Speedup vs legacy: {legacy / min(sequential, parallel):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -259,6 +259,458 @@ def another_function():
             pytest.fail(f"File filtering failed: {e}")
 
 
+@pytest.mark.skipif(not FILE_HANDLER_AVAILABLE, reason="File handler not available")
+class TestWorkspaceScanner:
+    """Test the ignore-aware workspace scanner"""
+
+    @pytest.fixture
+    def ignored_workspace(self):
+        """Workspace with dependency, VCS and gitignored directories"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workspace = Path(temp_dir)
+            (workspace / "app.py").write_text("print('app')")
+            (workspace / "debug.log").write_text("log")
+            (workspace / "keep.log").write_text("log")
+            (workspace / ".gitignore").write_text("*.log\n!keep.log\n/generated/\n")
+
+            for ignored in ["node_modules/pkg", ".git/objects", "generated", "env_dir"]:
+                (workspace / ignored).mkdir(parents=True)
+                (workspace / ignored / "ignored.js").write_text("x")
+            # Virtualenvs are detected by marker file, whatever their name
+            (workspace / "env_dir" / "pyvenv.cfg").write_text("home = /usr")
+
+            nested = workspace / "pkg" / "sub"
+            nested.mkdir(parents=True)
+            (nested / "module.py").write_text("x = 1")
+            (workspace / "pkg" / ".gitignore").write_text("sub/secret.py\n")
+            (nested / "secret.py").write_text("x = 2")
+
+            yield workspace
+
+    def test_scan_prunes_ignored_paths(self, ignored_workspace):
+        """Test that excluded, gitignored and virtualenv directories are skipped"""
+        files = {Path(f).relative_to(ignored_workspace).as_posix()
+                 for f in file_handler.scan_workspace(str(ignored_workspace))}
+
+        assert files == {"app.py", "keep.log", "pkg/sub/module.py"}
+
+    def test_parallel_and_sequential_scans_agree(self, ignored_workspace):
+        """Test that the thread pool does not change the results"""
+        from maahelper.utils.workspace_scanner import WorkspaceScanner
+
+        sequential = WorkspaceScanner(str(ignored_workspace), max_workers=1)
+        parallel = WorkspaceScanner(str(ignored_workspace), max_workers=4)
+        assert sorted(sequential.iter_files()) == sorted(parallel.iter_files())
+
+    def test_scan_is_a_generator(self, ignored_workspace):
+        """Test that results can be consumed lazily and abandoned early"""
+        iterator = file_handler.iter_workspace_files(str(ignored_workspace))
+        first = next(iterator)
+        iterator.close()
+        assert Path(first).exists()
+
+
+class TestWorkspaceIndex:
+    """Test the persistent workspace index"""
+
+    @pytest.fixture
+    def workspace(self):
+        """Small workspace with a dependency directory"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workspace = Path(temp_dir)
+            (workspace / "src").mkdir()
+            (workspace / "src" / "main.py").write_text("print('main')")
+            (workspace / "README.md").write_text("# Readme")
+            (workspace / "node_modules" / "dep").mkdir(parents=True)
+            (workspace / "node_modules" / "dep" / "index.js").write_text("x")
+            yield workspace
+
+    def _index(self, workspace):
+        from maahelper.utils.workspace_index import WorkspaceIndex
+        return WorkspaceIndex(str(workspace), languages=StreamlinedFileHandler.SUPPORTED_EXTENSIONS)
+
+    def test_refresh_records_metadata(self, workspace):
+        """Test that entries carry size, language and a lazy content hash"""
+        index = self._index(workspace)
+        delta = index.refresh()
+
+        assert sorted(delta.added) == ["README.md", "src/main.py"]
+        assert index.directories == {"src"}
+        entry = index.get("src/main.py")
+        assert entry.language == "python"
+        assert entry.size == len("print('main')")
+        assert entry.content_hash is None
+        assert index.content_hash("src/main.py") == index.get("src/main.py").content_hash
+
+    def test_refresh_is_incremental_and_persistent(self, workspace):
+        """Test that a reloaded index only reports what changed on disk"""
+        index = self._index(workspace)
+        index.refresh()
+        digest = index.content_hash("src/main.py")
+        index.save()
+        assert (workspace / ".maahelper" / "workspace_index.json").exists()
+
+        (workspace / "src" / "main.py").write_text("print('changed main')")
+        (workspace / "src" / "util.py").write_text("x = 1")
+        (workspace / "README.md").rename(workspace / "GUIDE.md")
+
+        reloaded = self._index(workspace)
+        delta = reloaded.refresh()
+        assert sorted(delta.added) == ["GUIDE.md", "src/util.py"]
+        assert delta.modified == ["src/main.py"]
+        assert delta.removed == ["README.md"]
+        assert reloaded.content_hash("src/main.py") != digest
+
+        unchanged = self._index(workspace)
+        unchanged.refresh()
+        (workspace / "src" / "util.py").unlink()
+        assert unchanged.refresh().removed == ["src/util.py"]
+
+    def test_watch_events_update_entries(self, workspace):
+        """Test that watchdog events are applied without a rescan"""
+        index = self._index(workspace)
+        index.refresh()
+
+        new_file = workspace / "src" / "new.py"
+        new_file.write_text("y = 2")
+        index._apply_event(str(new_file), False)
+        index._apply_event(str(workspace / "node_modules" / "dep" / "other.js"), False)
+        assert index.get("src/new.py").language == "python"
+        assert index.get("node_modules/dep/other.js") is None
+
+        index._apply_event(str(workspace / "src"), True, deleted=True)
+        assert [entry.path for entry in index.files()] == ["README.md"]
+
+    def test_rescans_see_files_created_between_calls(self, workspace, tmp_path, monkeypatch):
+        """Test that without a watcher every scan re-checks the workspace"""
+        from maahelper.config.config_manager import config_manager
+        monkeypatch.setattr(config_manager, "config_dir", tmp_path / "config")
+
+        handler = StreamlinedFileHandler(str(workspace))
+        assert {f["name"] for f in handler.list_supported_files()} == {"main.py", "README.md"}
+        (workspace / "src" / "late.py").write_text("z = 3")
+        assert "late.py" in {f["name"] for f in handler.list_supported_files()}
+
+    def test_consumers_answer_from_index(self, workspace, tmp_path, monkeypatch):
+        """Test that listing files goes through the shared index, kept outside scanned roots"""
+        from maahelper.config.config_manager import config_manager
+        monkeypatch.setattr(config_manager, "config_dir", tmp_path / "config")
+
+        handler = StreamlinedFileHandler(str(workspace))
+        files = handler.list_supported_files()
+
+        assert {f["name"] for f in files} == {"main.py", "README.md"}
+        assert not (workspace / ".maahelper").exists()
+        assert list((tmp_path / "config" / "cache" / "workspace_index").glob("*.json"))
+
+    def test_workspace_keeps_index_in_its_maahelper_dir(self, workspace):
+        """Test that a workspace with a .maahelper directory stores its index there"""
+        from maahelper.utils.workspace_index import default_index_path
+
+        (workspace / ".maahelper").mkdir()
+        assert default_index_path(str(workspace)) == str(workspace / ".maahelper" / "workspace_index.json")
+
+
+class TestBoundedReader:
+    """Test memory-mapped head/tail/outline reads"""
+
+    def test_small_file_is_read_whole(self, tmp_path):
+        """Test that files within the window are returned unchanged"""
+        from maahelper.utils.bounded_reader import read_file_windows
+
+        path = tmp_path / "small.py"
+        path.write_text("def main():\n    return 1\n")
+        windows = read_file_windows(str(path), language="python")
+
+        assert windows.head == "def main():\n    return 1\n"
+        assert windows.line_count == 2
+        assert not windows.truncated
+        assert windows.prompt_excerpt() == windows.head
+
+    def test_large_file_windows(self, tmp_path):
+        """Test head, tail, outline and line count on a multi-megabyte file"""
+        from maahelper.utils.bounded_reader import read_file_windows
+
+        path = tmp_path / "large.py"
+        with open(path, "w") as f:
+            for i in range(50000):
+                f.write(f"def function_{i}():\n    return {i}\n\n")
+        windows = read_file_windows(str(path), head_chars=100, tail_chars=50,
+                                    language="python", max_outline=3)
+
+        assert windows.truncated
+        assert windows.line_count == 150000
+        assert len(windows.head) == 100
+        assert windows.tail.endswith("return 49999\n\n")
+        assert windows.outline == [(1, "def function_0():"), (4, "def function_1():"),
+                                   (7, "def function_2():")]
+        assert windows.declarations == {"def": 50000}
+        assert "Outline" in windows.prompt_excerpt()
+
+    def test_truncated_file_counts_cover_whole_file(self, tmp_path):
+        """Test that function and class counts of a truncated file are not taken from its windows"""
+        from maahelper.utils.bounded_reader import read_file_windows
+
+        path = tmp_path / "many.py"
+        with open(path, "w") as f:
+            f.write("class Registry:\n    pass\n\n")
+            for i in range(2000):
+                f.write(f"def function_{i}():\n    return {i}\n\n")
+        windows = read_file_windows(str(path), language="python")
+        handler = StreamlinedFileHandler(str(tmp_path))
+        file_info = {"type": "python", "size_human": "1 KB", "lines": windows.line_count,
+                     "truncated": windows.truncated, "declarations": windows.declarations}
+
+        analysis = handler._analyze_file_content(windows.head + windows.tail, file_info)
+        assert "- Functions: 2,000 (declaration scan)" in analysis
+        assert "- Classes: 1 (declaration scan)" in analysis
+
+    def test_non_utf8_encoding_detected_from_sample(self, tmp_path):
+        """Test the encoding fallback for non UTF-8 text"""
+        from maahelper.utils.bounded_reader import read_file_windows
+
+        path = tmp_path / "legacy.txt"
+        path.write_bytes("café crème brûlée\n".encode("latin-1") * 3)
+        windows = read_file_windows(str(path))
+
+        assert not windows.is_binary
+        assert windows.line_count == 3
+        assert "\ufffd" not in windows.head
+
+    @pytest.mark.asyncio
+    async def test_file_search_without_llm(self, tmp_path):
+        """Test the file-search command with the built-in analysis"""
+        path = tmp_path / "app.log"
+        path.write_text("line\n" * 10000)
+        handler = StreamlinedFileHandler(str(tmp_path))
+
+        result = await handler.file_search_command("app.log", Mock(spec=[]))
+        assert result.startswith("✅")
+
+
+class _CountingClient:
+    """Async client stub that records prompts"""
+
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+
+    async def achat_completion(self, messages, **kwargs):
+        import asyncio
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.prompts.append(messages[-1]["content"])
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return f"summary {len(self.prompts)}"
+
+
+class TestChunkedAnalysis:
+    """Test map-reduce analysis of large files"""
+
+    @staticmethod
+    def _python_source(count, body="return 1"):
+        return "".join(f"def function_{i}():\n    # padding {'x' * 60}\n    {body}\n\n\n"
+                       for i in range(count))
+
+    def test_python_chunks_follow_definitions(self):
+        """Test that chunks start and end on top-level definitions"""
+        from maahelper.utils.chunked_analysis import split_into_chunks
+
+        source = self._python_source(40)
+        chunks = split_into_chunks(source, "python", max_chars=1000)
+
+        assert len(chunks) > 1
+        assert "".join(chunk.text for chunk in chunks) == source
+        for chunk in chunks:
+            assert chunk.text.lstrip().startswith("def function_")
+            assert len(chunk.text) <= 1000
+
+    def test_markdown_and_fallback_chunks(self):
+        """Test heading-based and fixed-window splitting"""
+        from maahelper.utils.chunked_analysis import split_into_chunks
+
+        markdown = "".join(f"# Section {i}\n\n{'text ' * 40}\n\n" for i in range(10))
+        sections = split_into_chunks(markdown, "markdown", max_chars=300)
+        assert all(chunk.text.startswith("# Section") for chunk in sections)
+
+        text = "log line\n" * 1000
+        windows = split_into_chunks(text, "log", max_chars=900)
+        assert "".join(chunk.text for chunk in windows) == text
+        assert all(len(chunk.text) <= 900 for chunk in windows)
+
+    @pytest.mark.asyncio
+    async def test_map_reduce_reuses_unchanged_chunks(self):
+        """Test concurrency limit and that edits only re-run changed chunks"""
+        from maahelper.utils.chunked_analysis import MapReduceAnalyzer
+
+        client = _CountingClient()
+        analyzer = MapReduceAnalyzer(client, max_concurrency=2, chunk_chars=1000)
+        source = self._python_source(40)
+
+        first = await analyzer.analyze(source, "big.py", "python")
+        assert first.cached_chunks == 0
+        assert first.summary
+        assert client.max_active <= 2
+        map_calls = len(first.chunks)
+
+        edited = source.replace("def function_39():\n", "def function_39():\n    value = 2\n")
+        calls_before = len(client.prompts)
+        second = await analyzer.analyze(edited, "big.py", "python")
+
+        assert second.cached_chunks == len(second.chunks) - 1
+        # One changed chunk plus the merge step(s)
+        assert len(client.prompts) - calls_before < map_calls
+
+    @pytest.mark.asyncio
+    async def test_reduce_without_progress_ends_in_truncated_merge(self):
+        """Test that merges which fail or do not shrink the summaries still end in one final merge"""
+        from maahelper.utils.chunked_analysis import MapReduceAnalyzer
+
+        class _UnhelpfulClient(_CountingClient):
+            def __init__(self, fail_merges):
+                super().__init__()
+                self.fail_merges = fail_merges
+
+            async def achat_completion(self, messages, **kwargs):
+                await super().achat_completion(messages, **kwargs)
+                if messages[-1]["content"].startswith("Merge these"):
+                    if self.fail_merges:
+                        raise RuntimeError("rate limited")
+                    return "longer " * 400
+                return "detail " * 130
+
+        for fail_merges in (False, True):
+            client = _UnhelpfulClient(fail_merges)
+            analyzer = MapReduceAnalyzer(client, max_concurrency=2, chunk_chars=1000)
+            result = await analyzer.analyze(self._python_source(40), "big.py", "python")
+
+            merges = [prompt for prompt in client.prompts if prompt.startswith("Merge these")]
+            final = client.prompts[-1]
+            assert final.startswith("Below are summaries")
+            assert len(final) < 1500
+            assert result.summary == ("detail " * 130).strip()
+            assert len(merges) == len(analyzer._group(result.chunk_summaries))
+            assert any("rate limited" in error for error in result.errors) == fail_merges
+
+
+class TestDirectoryTreeRenderer:
+    """Test the streaming directory tree"""
+
+    @pytest.fixture
+    def tree_workspace(self, tmp_path):
+        """Workspace with a wide directory and a deep one"""
+        for i in range(8):
+            (tmp_path / "wide" / f"dir{i}").mkdir(parents=True)
+        (tmp_path / "deep" / "a" / "b" / "c").mkdir(parents=True)
+        (tmp_path / "deep" / "a" / "b" / "c" / "hidden.py").write_text("x")
+        (tmp_path / "deep" / "top.py").write_text("x")
+        (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+        return tmp_path
+
+    def _renderer(self, root, **kwargs):
+        from maahelper.utils.tree_renderer import DirectoryTreeRenderer
+        return DirectoryTreeRenderer(str(root), StreamlinedFileHandler.SUPPORTED_EXTENSIONS,
+                                     lambda file_type: "-", **kwargs)
+
+    def test_depth_and_entry_caps(self, tree_workspace):
+        """Test per-directory caps and that directories below max_depth are not shown"""
+        lines = list(self._renderer(tree_workspace, max_depth=2, show_files=True,
+                                    max_entries=3).iter_lines())
+        text = "\n".join(lines)
+
+        assert "… 5 more" in text
+        assert "top.py" in text
+        assert "hidden.py" not in text and "[cyan]b[/cyan]" not in text
+        assert "node_modules" not in text
+
+    def test_index_and_scandir_render_the_same(self, tree_workspace):
+        """Test that a built index gives the same tree as scanning"""
+        from maahelper.utils.workspace_index import WorkspaceIndex
+
+        index = WorkspaceIndex(str(tree_workspace), languages=StreamlinedFileHandler.SUPPORTED_EXTENSIONS)
+        index.refresh()
+
+        scanned = list(self._renderer(tree_workspace, max_depth=5, show_files=True).iter_lines())
+        indexed = list(self._renderer(tree_workspace, max_depth=5, show_files=True,
+                                      index=index).iter_lines())
+        assert scanned == indexed
+
+
+class TestOutlineService:
+    """Test the shared structural outline cache"""
+
+    PYTHON_SOURCE = (
+        "import os\n"
+        "from typing import List as L\n"
+        "\n"
+        "@decorator\n"
+        "class Service:\n"
+        "    async def start(self):\n"
+        "        pass\n"
+        "\n"
+        "def helper():\n"
+        "    return os.getcwd()\n"
+    )
+
+    def test_python_symbols_and_imports(self):
+        """Test classes, methods, functions and imports with line ranges"""
+        from maahelper.utils.outline import extract_outline
+
+        outline = extract_outline(self.PYTHON_SOURCE, "python")
+        assert [(s.kind, s.qualname, s.start_line, s.end_line) for s in outline.symbols] == [
+            ("class", "Service", 4, 7),
+            ("method", "Service.start", 6, 7),
+            ("function", "helper", 9, 10),
+        ]
+        assert [(i.module, i.names) for i in outline.imports] == [("os", []), ("typing", ["List"])]
+        assert outline.symbol_at(7).name == "start"
+        assert outline.syntax_error is None
+        # Decorators extend the range; the def/class line and column are kept separately
+        assert (outline.classes[0].def_line, outline.functions[0].def_line, outline.functions[0].column) == (5, 6, 4)
+
+    def test_unparsable_python_falls_back(self):
+        """Test that partial files still get an outline and a syntax error"""
+        from maahelper.utils.outline import extract_outline
+
+        outline = extract_outline(self.PYTHON_SOURCE + "def broken(:\n", "python")
+        assert outline.syntax_error[0] == 11
+        assert [s.name for s in outline.functions] == ["start", "helper", "broken"]
+
+    def test_markdown_and_javascript(self):
+        """Test heading sections, code blocks and JS definitions"""
+        from maahelper.utils.outline import extract_outline
+
+        markdown = extract_outline("# Guide\n## Install\n```\n# not a heading\n```\n# API\n", "markdown")
+        assert [(h.name, h.level, h.end_line) for h in markdown.headings] == [
+            ("Guide", 1, 5), ("Install", 2, 5), ("API", 1, 6)
+        ]
+        assert markdown.code_blocks == [(3, 5)]
+
+        script = extract_outline(
+            "import { a } from 'lib';\nexport class Store {\n  async load() {\n    return '}';\n  }\n}\n"
+            "const add = (x, y) => x + y;\n", "javascript"
+        )
+        assert [(s.kind, s.qualname, s.end_line) for s in script.symbols] == [
+            ("class", "Store", 6), ("method", "Store.load", 5), ("function", "add", 7)
+        ]
+        assert script.imports[0].module == "lib"
+
+    def test_outlines_are_cached_by_content(self, tmp_path):
+        """Test memory and disk caching keyed by content hash"""
+        from maahelper.utils.outline import OutlineService
+
+        source = self.PYTHON_SOURCE * 200  # Large enough to be persisted
+        service = OutlineService(cache_dir=tmp_path)
+        first = service.get_outline(source, "python")
+        assert service.get_outline(source, "python") is first
+        assert list(tmp_path.rglob("*.json"))
+
+        reloaded = OutlineService(cache_dir=tmp_path).get_outline(source, "python")
+        assert reloaded == first
+
+
 class TestFileHandlerErrorHandling:
     """Test file handler error handling"""
     
@@ -199,6 +199,15 @@ class TestLSPHandlers:
         range_info = handler._get_word_range("def hello_world():", 4, "hello_world")
         assert "start" in range_info
         assert "end" in range_info
+
+    def test_hover_symbol_context_from_outline(self, mock_server, mock_llm_client):
+        """Test that hover context includes the symbol definition"""
+        handler = HoverHandler(mock_server, mock_llm_client)
+        text = "class Calculator:\n    def add(self, a, b):\n        return a + b\n\nCalculator().add(1, 2)\n"
+
+        context = handler._symbol_context(text, "add", 4, "file:///calc.py")
+        assert "method 'Calculator.add' (lines 2-3)" in context
+        assert handler._symbol_context(text, "add", 4, "file:///notes.txt") == ""
     
     def test_code_action_handler(self, mock_server, mock_llm_client):
         """Test code action handler"""
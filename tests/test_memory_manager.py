@@ -0,0 +1,257 @@
+"""
+Tests for MaaHelper Conversation Memory
+"""
+
+import multiprocessing
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from maahelper.config.config_manager import MemoryStorageConfig, config_manager
+from maahelper.utils import memory_manager as memory_module
+from maahelper.utils.memory_manager import ConversationMemoryManager, MemoryConfig
+from maahelper.utils.semantic_memory import HashingVectorizer, SemanticMemoryIndex
+from maahelper.utils.streaming import ConversationManager, TokenCounter
+
+
+class TestSemanticMemoryIndex:
+    """Test the hashing vectorizer and cosine index"""
+
+    def test_vectorizer_is_deterministic(self):
+        """Test that vectors are stable and normalised"""
+        vectorizer = HashingVectorizer(dimensions=256)
+        first = vectorizer.transform("parseConfigFile reads the yaml config")
+        second = vectorizer.transform("parseConfigFile reads the yaml config")
+
+        assert first == second
+        assert abs(sum(v * v for v in first.values()) - 1.0) < 1e-6
+
+    def test_vectorizer_splits_identifiers(self):
+        """Test that camelCase and snake_case identifiers are split"""
+        tokens = HashingVectorizer().tokenize("parseConfigFile load_user_data")
+        assert "config" in tokens
+        assert "user" in tokens
+
+    def test_search_ranks_relevant_text_first(self):
+        """Test cosine top-k ordering"""
+        index = SemanticMemoryIndex(HashingVectorizer(dimensions=512))
+        index.add("db", "How do I configure the PostgreSQL database connection pool?")
+        index.add("css", "Center a div horizontally with flexbox")
+        index.add("git", "Undo the last git commit but keep changes")
+
+        results = index.search("database connection pool size", top_k=2)
+        assert results[0][0] == "db"
+
+        results = index.search("database connection", top_k=2, exclude={"db"})
+        assert all(key != "db" for key, _ in results)
+
+
+class TestConversationMemoryRetrieval:
+    """Test retrieval-based session context"""
+
+    @pytest.fixture
+    def manager(self):
+        """Memory manager without disk persistence"""
+        manager = ConversationMemoryManager(MemoryConfig(
+            persist_to_disk=False,
+            retrieval_recent_messages=2,
+            retrieval_min_score=0.1
+        ))
+        manager.create_session("s1")
+        return manager
+
+    def test_context_without_query_is_unchanged(self, manager):
+        """Test that plain context still returns recent history"""
+        for i in range(5):
+            manager.add_message("s1", "user", f"message {i}", tokens=10)
+
+        context = manager.get_session_context("s1", max_tokens=30)
+        assert [m["content"] for m in context] == ["message 2", "message 3", "message 4"]
+
+    def test_relevant_older_turn_is_injected(self, manager):
+        """Test that an old relevant turn is retrieved with its answer"""
+        manager.add_message("s1", "system", "You are helpful", tokens=5)
+        manager.add_message("s1", "user", "How do I read a CSV file with pandas?", tokens=10)
+        manager.add_message("s1", "assistant", "Use pandas.read_csv('data.csv').", tokens=10)
+        for i in range(6):
+            manager.add_message("s1", "user", f"Tell me a joke number {i}", tokens=10)
+            manager.add_message("s1", "assistant", f"Joke {i}", tokens=10)
+
+        context = manager.get_session_context("s1", query="pandas csv file columns")
+        contents = [m["content"] for m in context]
+
+        assert contents[0] == "You are helpful"
+        assert "How do I read a CSV file with pandas?" in contents
+        assert "Use pandas.read_csv('data.csv')." in contents
+        # Only the recent window plus the retrieved turn are sent
+        assert "Tell me a joke number 0" not in contents
+        assert contents[-1] == "Joke 5"
+
+    def test_retrieval_respects_token_budget(self, manager):
+        """Test that retrieved turns never exceed max_tokens"""
+        manager.add_message("s1", "user", "pandas csv question", tokens=100)
+        manager.add_message("s1", "assistant", "pandas csv answer", tokens=100)
+        manager.add_message("s1", "user", "recent one", tokens=10)
+        manager.add_message("s1", "assistant", "recent two", tokens=10)
+
+        context = manager.get_session_context("s1", max_tokens=50, query="pandas csv")
+        assert [m["content"] for m in context] == ["recent one", "recent two"]
+
+    def test_index_follows_trimming(self, manager):
+        """Test that the index is rebuilt after messages are trimmed"""
+        manager.config.max_messages_per_session = 5
+        manager.add_message("s1", "user", "kubernetes deployment yaml", tokens=1)
+        assert manager.search_session("s1", "kubernetes")
+
+        for i in range(10):
+            manager.add_message("s1", "user", f"filler {i}", tokens=1)
+
+        assert manager.search_session("s1", "kubernetes") == []
+        assert manager.search_session("s1", "filler")
+
+    @pytest.mark.asyncio
+    async def test_chat_retrieves_turns_for_current_message(self, manager, monkeypatch):
+        """Test that the CLI conversation sends turns relevant to the user's message"""
+        # Word-based token counts; no tiktoken encoding download
+        monkeypatch.setattr(TokenCounter, "_initialize_encoder", lambda self: None)
+        client = SimpleNamespace(config=SimpleNamespace(provider="openai", model="gpt-4o-mini"))
+        conversation = ConversationManager(client, "chat", memory=manager)
+        sent = []
+
+        async def stream_conversation(messages):
+            sent.append(messages)
+            return f"answer {len(sent)}"
+
+        conversation.streaming_handler.stream_conversation = stream_conversation
+        await conversation.chat("How do I read a CSV file with pandas?")
+        for i in range(4):
+            await conversation.chat(f"Tell me a joke number {i}")
+        await conversation.chat("Which pandas function reads csv files?", system_prompt="You are helpful")
+
+        contents = [m["content"] for m in sent[-1]]
+        assert contents[0] == "You are helpful"
+        assert "How do I read a CSV file with pandas?" in contents
+        assert "Tell me a joke number 0" not in contents
+        assert contents[-1] == "Which pandas function reads csv files?"
+        assert len(manager.get_session_messages("chat")) == 12
+
+    def test_status_messages_stay_off_stdout(self, manager, capsys):
+        """Test that session messages never reach stdout, which carries the LSP's JSON-RPC stream"""
+        manager.create_session("lsp_hover")
+        manager.add_message("lsp_hover", "user", "Explain 'main'", tokens=3)
+        manager.delete_session("lsp_hover")
+
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "lsp_hover" in captured.err
+
+
+def _write_messages(storage_path, session_id, count):
+    """Append messages from a separate process"""
+    manager = ConversationMemoryManager(MemoryConfig(
+        storage_path=storage_path, storage_backend="sqlite"
+    ))
+    for i in range(count):
+        manager.add_message(session_id, "user", f"{session_id} message {i}", tokens=1)
+    manager.close()
+
+
+class TestSharedMemoryStore:
+    """Test the SQLite storage backend shared between processes"""
+
+    @pytest.fixture
+    def storage_path(self):
+        """Temporary storage directory"""
+        self.managers = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+            # Release database handles before the directory is removed
+            for manager in self.managers:
+                manager.close()
+
+    def _manager(self, storage_path):
+        manager = ConversationMemoryManager(MemoryConfig(
+            storage_path=storage_path, storage_backend="sqlite"
+        ))
+        self.managers.append(manager)
+        return manager
+
+    def test_sessions_are_visible_across_managers(self, storage_path):
+        """Test that a second manager sees sessions and appends incrementally"""
+        first = self._manager(storage_path)
+        second = self._manager(storage_path)
+        changes = []
+        second.add_change_listener(lambda session_id, kind: changes.append((session_id, kind)))
+
+        first.create_session("cli")
+        first.add_message("cli", "user", "hello from the CLI", tokens=3)
+
+        messages = second.get_session_messages("cli")
+        assert [m.content for m in messages] == ["hello from the CLI"]
+        assert ("cli", "session") in changes
+
+        second.add_message("cli", "assistant", "hello from the LSP", tokens=4)
+        first.add_message("cli", "user", "and again", tokens=2)
+
+        assert [m.content for m in first.get_session_messages("cli")] == [
+            "hello from the CLI", "hello from the LSP", "and again"
+        ]
+        assert first.get_session_stats("cli")["total_tokens"] == 9
+
+    def test_delete_is_propagated(self, storage_path):
+        """Test that deleting a session in one manager removes it in the other"""
+        first = self._manager(storage_path)
+        second = self._manager(storage_path)
+
+        first.create_session("temp")
+        assert second.get_session_stats("temp") is not None
+
+        second.delete_session("temp")
+        assert first.get_session_stats("temp") is None
+
+    def test_concurrent_processes_do_not_lose_messages(self, storage_path):
+        """Test that writers in separate processes never overwrite each other"""
+        self._manager(storage_path).create_session("shared")
+
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=_write_messages, args=(storage_path, "shared", 25))
+            for _ in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+            assert worker.exitcode == 0
+
+        reloaded = self._manager(storage_path)
+        assert len(reloaded.get_session_messages("shared")) == 75
+
+    def test_global_manager_uses_configured_storage(self, storage_path, monkeypatch):
+        """Test that get_memory_manager applies the memory section of the app config"""
+        monkeypatch.setattr(config_manager.config, "memory",
+                            MemoryStorageConfig(persist_to_disk=True, storage_backend="sqlite",
+                                                storage_path=storage_path))
+        monkeypatch.setattr(memory_module, "memory_manager", ConversationMemoryManager())
+        monkeypatch.setattr(memory_module, "_storage_configured", False)
+
+        manager = memory_module.get_memory_manager()
+        self.managers.append(manager)
+        manager.create_session("cli")
+
+        assert manager.store is not None
+        assert memory_module.get_memory_manager() is manager
+        assert self._manager(storage_path).get_session_stats("cli") is not None
+
+    def test_global_manager_keeps_memory_in_process_by_default(self, monkeypatch):
+        """Test that conversations are only written to disk when persistence is enabled"""
+        monkeypatch.setattr(config_manager.config, "memory", MemoryStorageConfig())
+        monkeypatch.setattr(memory_module, "memory_manager", ConversationMemoryManager())
+        monkeypatch.setattr(memory_module, "_storage_configured", False)
+
+        manager = memory_module.get_memory_manager()
+        manager.create_session("cli")
+
+        assert manager.store is None
+        assert manager.config.storage_backend == MemoryStorageConfig().storage_backend == "json"
@@ -0,0 +1,551 @@
+"""
+Tests for MaaHelper Real-time Code Analysis
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+
+from maahelper.features.realtime_analysis import CodeAnalyzer, RuleEngine
+
+SAMPLE = (
+    "import pickle\n"
+    "\n"
+    "\n"
+    "\n"
+    "def load(blob):  \n"
+    "    text = ''\n"
+    "    text += str(blob)\n"
+    "    for name in global_names: pass\n"
+    "    value = eval(input('value: '))\n"
+    "    return (\n"
+    "                    pickle.loads(blob) if value else None)\n"
+    "    # " + "x" * 90 + "\n"
+)
+
+
+class TestRuleEngine:
+    """Test the single-pass rule engine"""
+
+    def test_rules_and_order(self):
+        """Test that every rule fires and issues are grouped by rule family"""
+        result = CodeAnalyzer([]).analyze_content(SAMPLE, Path("sample.py"))
+        found = [(issue.line_number, issue.rule_id) for issue in result.issues]
+
+        assert found == [
+            (3, "multiple_blank_lines"),
+            (4, "multiple_blank_lines"),
+            (5, "trailing_whitespace"),
+            (12, "line_too_long"),
+            (7, "inefficient_string_concat"),
+            (8, "global_in_loop"),
+            (9, "security_eval\\s*\\("),
+            (9, "security_input\\s*\\("),
+            (11, "security_pickle\\.lo"),
+            (11, "high_nesting"),
+        ]
+
+    def test_matches_per_line_semantics(self):
+        """Test that candidate lines from the combined pattern match per-line checks"""
+        engine = RuleEngine()
+        content = "eval (x)\nexec\n(y)\nfor a in\nglobal_list\nshell=True"
+        assert engine._candidate_lines(content) == {1, 6}
+
+    def test_syntax_error_and_metrics(self):
+        """Test syntax errors and line metrics from the same pass"""
+        result = CodeAnalyzer([]).analyze_content("def broken(:\n    pass\n# note\n\n", Path("bad.py"))
+
+        assert result.issues[0].rule_id == "syntax_error"
+        assert result.issues[0].severity == "error"
+        assert result.metrics["errors"] == 1
+        assert result.metrics["comment_lines"] == 1
+        assert result.metrics["blank_lines"] == 2
+        assert result.metrics["total_lines"] == 5
+
+    def test_long_function(self):
+        """Test the AST rule for long functions"""
+        body = "".join(f"        x{i} = {i}\n" for i in range(60))
+        content = f"def short():\n    pass\n\n\nclass A:\n    @property\n    def long(self):\n{body}"
+        issues = CodeAnalyzer([]).analyze_content(content, Path("long.py")).issues
+
+        long_functions = [issue for issue in issues if issue.rule_id == "long_function"]
+        assert len(long_functions) == 1
+        # Reported at the def line, not the decorator, and sized from there
+        assert (long_functions[0].line_number, long_functions[0].column) == (7, 4)
+        assert "'long' is too long (61 lines)" in long_functions[0].message
+
+    def test_python_rules_share_the_outline_parse(self, monkeypatch):
+        """Test that syntax and function rules come from the cached outline"""
+        from maahelper.utils import outline
+
+        parses = []
+        original = outline.extract_outline
+        monkeypatch.setattr(outline, "extract_outline", lambda *args: parses.append(args) or original(*args))
+        content = "def once():\n    return 'outline shared %d'\n" % id(parses)
+        CodeAnalyzer([]).analyze_content(content, Path("once.py"))
+        outline.outline_service.get_outline(content, "python")
+
+        assert len(parses) == 1
+
+    def test_non_python_skips_ast_rules(self):
+        """Test that line rules still run for other languages"""
+        issues = CodeAnalyzer([]).analyze_content("const x = eval(y);  \n", Path("app.js")).issues
+        assert {issue.rule_id for issue in issues} == {"trailing_whitespace", "security_eval\\s*\\("}
+
+    @pytest.mark.asyncio
+    async def test_analyze_file(self, tmp_path):
+        """Test analyzing a file on disk"""
+        path = tmp_path / "module.py"
+        path.write_text(SAMPLE)
+        result = await CodeAnalyzer([]).analyze_file(path)
+        assert result.file_path == str(path)
+        assert result.metrics["total_issues"] == len(result.issues) == 10
+
+
+class TestIncrementalAnalysis:
+    """Test the per-file result cache and incremental line rules"""
+
+    def test_unchanged_content_is_not_reanalyzed(self, monkeypatch):
+        """Test that re-analyzing identical content hits the cache"""
+        analyzer = CodeAnalyzer([])
+        first = analyzer.analyze_content(SAMPLE, Path("sample.py"))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("rules re-ran for unchanged content")
+
+        monkeypatch.setattr(analyzer.engine, "check_lines", fail)
+        monkeypatch.setattr(analyzer.engine, "check_ast", fail)
+        second = analyzer.analyze_content(SAMPLE, Path("sample.py"))
+        assert second.issues == first.issues
+
+    def test_rule_set_version_invalidates(self, monkeypatch):
+        """Test that cached results are not reused across rule set versions"""
+        from maahelper.features import realtime_analysis
+
+        analyzer = CodeAnalyzer([])
+        analyzer.analyze_content(SAMPLE, Path("sample.py"))
+        monkeypatch.setattr(realtime_analysis, "RULE_SET_VERSION", realtime_analysis.RULE_SET_VERSION + 1)
+        assert analyzer.cache.get("sample.py", analyzer.rule_set_version) is None
+
+    def test_incremental_matches_full_analysis(self):
+        """Test that edits to a large file shift carried-over issues correctly"""
+        from maahelper.features.realtime_analysis import INCREMENTAL_MIN_LINES
+
+        lines = []
+        for i in range(INCREMENTAL_MIN_LINES // 2):
+            lines.extend([f"def f{i}(data):  ", "    text += str(data)", "", ""])
+        analyzer = CodeAnalyzer([])
+        analyzer.analyze_content('\n'.join(lines), Path("big.py"))
+
+        lines[10:12] = ["    value = eval(data)", "", "", "    pass"]
+        del lines[400:403]
+        lines[700] = "    " + "x" * 100
+        content = '\n'.join(lines)
+
+        calls = []
+        original = analyzer.engine.check_lines
+        analyzer.engine.check_lines = lambda *args: calls.append(args[2:]) or original(*args)
+        incremental = analyzer.analyze_content(content, Path("big.py"))
+        full = CodeAnalyzer([]).analyze_content(content, Path("big.py"))
+
+        assert calls and all(end - start < 10 for start, end in calls)
+        assert [(i.line_number, i.rule_id, i.column) for i in incremental.issues] == \
+            [(i.line_number, i.rule_id, i.column) for i in full.issues]
+        assert incremental.metrics == full.metrics
+
+
+class TestWorkspaceAnalysis:
+    """Test chunked, streamed workspace analysis"""
+
+    @pytest.mark.asyncio
+    async def test_process_pool_streams_every_file(self, tmp_path):
+        """Test that all files are analyzed on the process pool and recorded"""
+        from maahelper.features.realtime_analysis import MIN_PARALLEL_FILES, RealTimeAnalysisEngine
+
+        files = []
+        for i in range(MIN_PARALLEL_FILES + 3):
+            path = tmp_path / f"module_{i}.py"
+            path.write_text(f"value_{i} = eval(data)  \n")
+            files.append(path)
+
+        engine = RealTimeAnalysisEngine(str(tmp_path))
+        streamed = [result async for result in engine.iter_workspace_analysis(files, max_workers=2, chunk_size=4)]
+
+        assert sorted(result.file_path for result in streamed) == sorted(str(path) for path in files)
+        assert all("trailing_whitespace" in {issue.rule_id for issue in result.issues} for result in streamed)
+        assert set(engine.results) == {str(path) for path in files}
+
+    @pytest.mark.asyncio
+    async def test_analyze_workspace_small(self, tmp_path):
+        """Test that small workspaces are analyzed without a process pool"""
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        (tmp_path / "app.py").write_text("import os\n")
+        (tmp_path / "ui.tsx").write_text("const x = 1;  \n")
+        (tmp_path / "notes.txt").write_text("ignored\n")
+
+        engine = RealTimeAnalysisEngine(str(tmp_path))
+        results = await engine.analyze_workspace(show_progress=False)
+
+        assert sorted(Path(path).name for path in results) == ["app.py", "ui.tsx"]
+        assert engine.get_summary()["files_analyzed"] == 2
+
+
+class TestAnalysisExport:
+    """Test streaming NDJSON/SARIF export"""
+
+    @staticmethod
+    def _workspace(tmp_path):
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "app.py").write_text("value = eval(data)  \n")
+        (tmp_path / "clean.py").write_text("import os\n")
+        return tmp_path
+
+    @pytest.mark.asyncio
+    async def test_ndjson_one_line_per_file(self, tmp_path):
+        """Test that every file becomes one JSON line and nothing is retained"""
+        import io
+        import json
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        engine = RealTimeAnalysisEngine(str(self._workspace(tmp_path)))
+        stream = io.StringIO()
+        summary = await engine.export_workspace(stream, "ndjson", show_progress=False)
+
+        records = {record["file"]: record for record in map(json.loads, stream.getvalue().splitlines())}
+        assert set(records) == {"pkg/app.py", "clean.py"}
+        assert "trailing_whitespace" in {issue["rule_id"] for issue in records["pkg/app.py"]["issues"]}
+        assert records["pkg/app.py"]["issues"][0]["file_path"] == "pkg/app.py"
+        assert summary["files_analyzed"] == 2
+        assert summary["total_issues"] == sum(len(record["issues"]) for record in records.values())
+        assert len(engine.results) == 0
+
+    @pytest.mark.asyncio
+    async def test_stdout_export_carries_only_results(self, tmp_path, capsys):
+        """Test that analysis errors are reported on stderr, not inside the exported stream"""
+        import json
+        from maahelper.features.analysis_export import run_export
+
+        workspace = self._workspace(tmp_path)
+        (workspace / "broken.py").write_bytes(b"name = '\xff\xfe'\n")
+        await run_export(str(workspace), "ndjson", "-", max_workers=1)
+
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert {record["file"] for record in records} == {"pkg/app.py", "clean.py", "broken.py"}
+        assert "Error analyzing" in captured.err
+
+    @pytest.mark.asyncio
+    async def test_sarif_document(self, tmp_path):
+        """Test that the streamed SARIF log is one valid document"""
+        import io
+        import json
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        engine = RealTimeAnalysisEngine(str(self._workspace(tmp_path)))
+        stream = io.StringIO()
+        await engine.export_workspace(stream, "sarif", show_progress=False)
+
+        sarif = json.loads(stream.getvalue())
+        assert sarif["version"] == "2.1.0"
+        run = sarif["runs"][0]
+        assert run["tool"]["driver"]["name"] == "maahelper"
+        rule_ids = {rule["id"] for rule in run["tool"]["driver"]["rules"]}
+        assert {result["ruleId"] for result in run["results"]} == rule_ids
+        locations = [result["locations"][0]["physicalLocation"] for result in run["results"]]
+        assert {"uri": "pkg/app.py", "uriBaseId": "%SRCROOT%"} in [loc["artifactLocation"] for loc in locations]
+        assert all(loc["region"]["startLine"] == 1 for loc in locations)
+        assert run["originalUriBaseIds"]["%SRCROOT%"]["uri"].startswith("file://")
+
+    @pytest.mark.asyncio
+    async def test_changed_since(self, tmp_path):
+        """Test that only files changed since a git ref are analyzed"""
+        import shutil
+        import subprocess
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        if shutil.which("git") is None:
+            pytest.skip("git not installed")
+        workspace = self._workspace(tmp_path)
+
+        def git(*args):
+            subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                           cwd=workspace, check=True, capture_output=True)
+
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "initial")
+        (workspace / "clean.py").write_text("import sys\n")
+        (workspace / "new.py").write_text("x = 1\n")
+
+        engine = RealTimeAnalysisEngine(str(workspace))
+        results = await engine.analyze_workspace(show_progress=False, changed_since="HEAD")
+
+        assert sorted(Path(path).name for path in results) == ["clean.py", "new.py"]
+
+
+class TestFileWatcher:
+    """Test the coalescing analysis scheduler"""
+
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced_and_bounded(self, tmp_path):
+        """Test that repeated events analyze each file once with bounded batches"""
+        from maahelper.features.realtime_analysis import FileWatcher
+
+        paths = []
+        for i in range(40):
+            path = tmp_path / f"module_{i}.py"
+            path.write_text("x = 1\n")
+            paths.append(str(path))
+        (tmp_path / "notes.txt").write_text("not code\n")
+
+        analyzer = CodeAnalyzer([])
+        results = []
+        in_flight, peak = [0], [0]
+        original = analyzer.analyze_paths
+        lock = threading.Lock()
+
+        def counting_analyze(batch):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                return original(batch)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        analyzer.analyze_paths = counting_analyze
+        watcher = FileWatcher(analyzer, results.append, asyncio.get_running_loop(), max_in_flight=2, batch_size=8)
+        watcher.debounce_time = 0.05
+
+        def fire():
+            for _ in range(5):
+                for path in paths:
+                    watcher.on_modified(FileModifiedEvent(path))
+            watcher.on_modified(FileModifiedEvent(str(tmp_path / "notes.txt")))
+
+        await asyncio.get_running_loop().run_in_executor(None, fire)
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if len(results) >= len(paths) and watcher._scheduler.done():
+                break
+
+        assert sorted(result.file_path for result in results) == sorted(paths)
+        assert 1 <= peak[0] <= 2
+        assert not watcher.pending_files
+
+    @pytest.mark.asyncio
+    async def test_create_move_delete(self, tmp_path):
+        """Test that created and moved-in files are analyzed and removed ones forgotten"""
+        from maahelper.features.realtime_analysis import FileWatcher
+
+        results, removed = [], []
+        watcher = FileWatcher(CodeAnalyzer([]), results.append, asyncio.get_running_loop(),
+                              removed_callback=removed.append)
+        watcher.debounce_time = 0.01
+
+        created = tmp_path / "new.py"
+        created.write_text("y = 2\n")
+        moved = tmp_path / "renamed.py"
+        moved.write_text("z = 3\n")
+
+        watcher.on_created(FileCreatedEvent(str(created)))
+        watcher.on_moved(FileMovedEvent(str(tmp_path / "old.py"), str(moved)))
+        watcher.on_deleted(FileDeletedEvent(str(tmp_path / "gone.py")))
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if len(results) == 2:
+                break
+
+        assert sorted(Path(result.file_path).name for result in results) == ["new.py", "renamed.py"]
+        assert [Path(path).name for path in removed] == ["old.py", "gone.py"]
+
+
+class TestAnalyzerPlugins:
+    """Test external linter backends"""
+
+    class FakeLinter:
+        """Batched plugin that records its calls"""
+        name = "fake"
+        version = "1.0"
+        extensions = frozenset({'.py'})
+        replaces = frozenset({"inefficient_string_concat"})
+        batched = True
+
+        def __init__(self):
+            self.batches = []
+
+        def check(self, file_path, content):
+            return self.check_files([file_path])[file_path]
+
+        def check_files(self, paths):
+            from maahelper.features.realtime_analysis import CodeIssue
+
+            self.batches.append(list(paths))
+            return {path: [CodeIssue(path, 1, 0, "warning", "maintainability", "fake issue", rule_id="fake_X1")]
+                    for path in paths}
+
+    def test_batched_plugin_runs_once_per_batch(self, tmp_path):
+        """Test that one linter run covers every changed file and replaces heuristics"""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"m{i}.py"
+            path.write_text("s = ''\ns += str(1)\n")
+            paths.append(path)
+        linter = self.FakeLinter()
+        analyzer = CodeAnalyzer([linter])
+
+        results = analyzer.analyze_paths(paths)
+        assert linter.batches == [[str(path) for path in paths]]
+        for result in results:
+            rule_ids = [issue.rule_id for issue in result.issues]
+            assert "fake_X1" in rule_ids
+            assert "inefficient_string_concat" not in rule_ids
+            assert result.metrics["warnings"] == 1
+
+        # Unchanged files come from the cache; only the edited one is re-linted
+        paths[1].write_text("x = 1\n")
+        analyzer.analyze_paths(paths)
+        assert linter.batches[-1] == [str(paths[1])]
+        assert "fake-1.0" in analyzer.rule_set_version
+
+    @pytest.mark.asyncio
+    async def test_workspace_merges_batched_plugin(self, tmp_path):
+        """Test that workspace analysis runs batched plugins once per chunk, in the parent"""
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        files = [tmp_path / f"m{i}.py" for i in range(5)]
+        for path in files:
+            path.write_text("x = 1\n")
+        linter = self.FakeLinter()
+        engine = RealTimeAnalysisEngine(str(tmp_path))
+        engine.analyzer = CodeAnalyzer([linter])
+
+        results = [result async for result in engine.iter_workspace_analysis(files, max_workers=1, chunk_size=2)]
+        assert sorted(linter.batches) == sorted([[str(path) for path in files[i:i + 2]] for i in range(0, 5, 2)])
+        assert len(results) == 5
+        assert all(result.issues[-1].rule_id == "fake_X1" for result in results)
+
+    def test_ruff_classification(self):
+        """Test mapping of ruff codes to severity and category"""
+        from maahelper.features.analyzer_plugins import RuffPlugin
+
+        assert RuffPlugin.classify("E999") == ("error", "syntax")
+        assert RuffPlugin.classify("F821") == ("error", "syntax")
+        assert RuffPlugin.classify("F401") == ("warning", "maintainability")
+        assert RuffPlugin.classify("S307") == ("warning", "security")
+        assert RuffPlugin.classify("SIM108") == ("suggestion", "style")
+        assert RuffPlugin.classify("E501") == ("info", "style")
+
+    def test_ruff_plugin(self, tmp_path):
+        """Test the ruff backend on real files when ruff is installed"""
+        from maahelper.features.analyzer_plugins import RuffPlugin
+
+        if not RuffPlugin.is_available():
+            pytest.skip("ruff not installed")
+        path = tmp_path / "lint_me.py"
+        path.write_text("import os\nprint(undefined_name)\n")
+
+        plugin = RuffPlugin()
+        batch = plugin.check_files([str(path)])[str(path)]
+        single = plugin.check(str(path), path.read_text())
+        assert {"ruff_F401", "ruff_F821"} <= {issue.rule_id for issue in batch}
+        assert [(i.line_number, i.rule_id) for i in batch] == [(i.line_number, i.rule_id) for i in single]
+
+    def test_pyflakes_plugin(self):
+        """Test the in-process pyflakes backend when pyflakes is installed"""
+        from maahelper.features.analyzer_plugins import PyflakesPlugin
+
+        if not PyflakesPlugin.is_available():
+            pytest.skip("pyflakes not installed")
+        issues = PyflakesPlugin().check("m.py", "import os\nprint(undefined_name)\n")
+        assert [(issue.line_number, issue.rule_id, issue.severity) for issue in issues] == [
+            (1, "pyflakes_UnusedImport", "warning"),
+            (2, "pyflakes_UndefinedName", "error"),
+        ]
+        assert PyflakesPlugin().check("bad.py", "def (:") == []
+
+
+class TestIssueStore:
+    """Test incrementally maintained issue counters and columnar filters"""
+
+    @staticmethod
+    def _result(path, *severities):
+        from maahelper.features.realtime_analysis import AnalysisResult, CodeIssue
+
+        issues = [CodeIssue(path, i + 1, 0, severity, "style" if severity == "info" else "security",
+                            f"issue {i}", rule_id=f"rule_{severity}") for i, severity in enumerate(severities)]
+        return AnalysisResult(file_path=path, issues=issues)
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_counters_follow_replacement(self, use_numpy):
+        """Test that summaries and filters reflect replaced and removed results"""
+        from maahelper.features.issue_store import IssueStore
+
+        store = IssueStore(columnar=True, use_numpy=use_numpy)
+        store["a.py"] = self._result("a.py", "error", "warning", "info")
+        store["b.py"] = self._result("b.py", "warning", "warning")
+        store["a.py"] = self._result("a.py", "suggestion")
+
+        summary = store.summary()
+        assert summary["files_analyzed"] == 2
+        assert summary["total_issues"] == 3
+        assert (summary["errors"], summary["warnings"], summary["suggestions"]) == (0, 2, 1)
+        assert summary["files_with_errors"] == 0
+        assert summary["by_category"] == {"security": 3}
+        assert store.file_counts("b.py")["warning"] == 2
+
+        assert [issue.file_path for issue in store.filter(severity="warning")] == ["b.py", "b.py"]
+        assert store.filter(file_path="a.py", rule_id="rule_suggestion")[0].severity == "suggestion"
+        assert store.filter(severity="error") == []
+        assert store.columns.count(category="security") == 3
+
+        del store["b.py"]
+        assert store.summary()["warnings"] == 0
+        assert store.filter(severity="warning") == []
+
+    def test_compaction_keeps_live_rows(self):
+        """Test that repeatedly replaced files do not grow the columns without bound"""
+        from maahelper.features.issue_store import IssueStore
+
+        store = IssueStore(columnar=True)
+        for _ in range(300):
+            store["hot.py"] = self._result("hot.py", *["warning"] * 10)
+        store["cold.py"] = self._result("cold.py", "error")
+
+        assert store.columns._size < 3000
+        assert len(store.filter(file_path="hot.py")) == 10
+        assert store.summary()["errors"] == 1
+
+    def test_engine_summary(self):
+        """Test that the engine's summary and panel use the store"""
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        engine = RealTimeAnalysisEngine(".")
+        assert engine.get_summary() == {}
+        engine._on_analysis_result(self._result("x.py", "warning", "suggestion"))
+        assert engine.get_summary()["warnings"] == 1
+        assert engine._create_summary_panel() is not None
+        engine._on_file_removed("x.py")
+        assert engine.get_summary() == {}
+
+    def test_live_display_is_rebuilt_on_changes(self):
+        """Test that the live panel is built where results change, not in Rich's refresh thread"""
+        from maahelper.features.realtime_analysis import RealTimeAnalysisEngine
+
+        class FakeLive:
+            def __init__(self):
+                self.panels = []
+
+            def update(self, renderable):
+                self.panels.append(renderable)
+
+        engine = RealTimeAnalysisEngine(".")
+        engine.live_display = FakeLive()
+        engine._on_analysis_result(self._result("x.py", "warning"))
+        engine._on_file_removed("x.py")
+        assert len(engine.live_display.panels) == 2
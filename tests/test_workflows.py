@@ -87,6 +87,11 @@ class TestWorkflowEngine:
         status = workflow_engine.get_workflow_status(workflow_id)
         assert status is not None
         assert status['completed_steps'] == 1
+
+        # The final status is snapshotted and the delta log folded in
+        state_dir = workflow_engine.state_manager.state_dir
+        assert json.loads((state_dir / f"{workflow_id}.json").read_text())["status"] == "completed"
+        assert not (state_dir / f"{workflow_id}.log").exists()
     
     @pytest.mark.asyncio
     async def test_workflow_with_dependencies(self, workflow_engine):
@@ -120,6 +125,139 @@ class TestWorkflowEngine:
         success = await workflow_engine.execute_workflow(workflow_id)
         assert success is True
 
+    @staticmethod
+    def _timed_steps(engine, durations):
+        """Register a 'timed' node that sleeps per step and records start/end order"""
+        events = []
+
+        async def timed_node(inputs):
+            events.append(("start", inputs["tag"]))
+            await asyncio.sleep(durations[inputs["tag"]])
+            events.append(("end", inputs["tag"]))
+            return {inputs["tag"]: True}
+
+        engine.nodes.nodes["timed"] = timed_node
+        steps = [
+            {"id": tag, "name": tag, "description": tag, "node_type": "timed", "inputs": {"tag": tag}}
+            for tag in durations
+        ]
+        return steps, events
+
+    @pytest.mark.asyncio
+    async def test_step_starts_when_own_dependencies_finish(self, workflow_engine):
+        """Test that a step does not wait for unrelated slow siblings"""
+        steps, events = self._timed_steps(workflow_engine, {"slow": 0.3, "fast": 0.01, "after_fast": 0.01})
+        workflow_id = await workflow_engine.create_workflow(
+            "DAG", "Ready-queue scheduling", steps, {"after_fast": ["fast"]}
+        )
+
+        assert await workflow_engine.execute_workflow(workflow_id) is True
+        assert events.index(("end", "after_fast")) < events.index(("end", "slow"))
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, mock_llm_client, temp_workspace):
+        """Test that no more than max_concurrent_steps run at once"""
+        engine = WorkflowEngine(mock_llm_client, temp_workspace, max_concurrent_steps=2)
+        steps, events = self._timed_steps(engine, {f"s{i}": 0.02 for i in range(5)})
+        workflow_id = await engine.create_workflow("Limited", "Worker limit", steps)
+
+        assert await engine.execute_workflow(workflow_id) is True
+        running = peak = 0
+        for kind, _ in events:
+            running += 1 if kind == "start" else -1
+            peak = max(peak, running)
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_dependents_only(self, workflow_engine):
+        """Test that independent branches still run after a failure"""
+        steps, events = self._timed_steps(workflow_engine, {"ok": 0.01, "child": 0.01})
+        steps.append({"id": "bad", "name": "bad", "description": "bad", "node_type": "missing_node"})
+        workflow_id = await workflow_engine.create_workflow(
+            "Failure", "Failure isolation", steps, {"child": ["bad"]}
+        )
+
+        assert await workflow_engine.execute_workflow(workflow_id) is False
+        assert ("end", "ok") in events
+        assert ("start", "child") not in events
+        workflow = workflow_engine.active_workflows[workflow_id]
+        assert {step.id: step.status for step in workflow.steps} == {"ok": "completed", "child": "pending", "bad": "failed"}
+
+    @pytest.mark.asyncio
+    async def test_cycle_rejected_upfront(self, workflow_engine):
+        """Test that cyclic and unknown dependencies are rejected before execution"""
+        from maahelper.workflows.engine import WorkflowCycleError
+
+        steps, _ = self._timed_steps(workflow_engine, {"a": 0, "b": 0, "c": 0})
+        with pytest.raises(WorkflowCycleError, match="a → b → c → a"):
+            await workflow_engine.create_workflow("Cycle", "Cycle", steps, {"b": ["a"], "c": ["b"], "a": ["c"]})
+        with pytest.raises(WorkflowCycleError, match="unknown step 'z'"):
+            await workflow_engine.create_workflow("Unknown", "Unknown", steps, {"a": ["z"]})
+        assert workflow_engine.active_workflows == {}
+
+    @pytest.mark.asyncio
+    async def test_command_output_streams_to_step_events(self, workflow_engine):
+        """Test that command output reaches step_output handlers line by line, per step"""
+        import sys
+
+        lines = []
+        workflow_engine.add_event_handler("step_output", lambda workflow_id, data: lines.append(data))
+        steps = [
+            {"id": name, "name": name, "description": name, "node_type": "run_tests",
+             "inputs": {"test_command": f'"{sys.executable}" -c "print(\'{name} 1\'); print(\'{name} 2\')"',
+                        "test_path": ""}}
+            for name in ("one", "two")
+        ]
+        workflow_id = await workflow_engine.create_workflow("Commands", "Streamed output", steps)
+
+        assert await workflow_engine.execute_workflow(workflow_id) is True
+        for name in ("one", "two"):
+            assert [entry["line"] for entry in lines if entry["step_id"] == name] == [f"{name} 1", f"{name} 2"]
+
+    @pytest.mark.asyncio
+    async def test_resume_continues_from_frontier(self, temp_workspace):
+        """Test that a resumed workflow keeps completed outputs and runs only the rest"""
+        from maahelper.workflows.outputs import BLOB_THRESHOLD
+
+        calls = []
+        big = "x" * BLOB_THRESHOLD
+        flaky = {"fail": True}
+
+        def register(engine):
+            async def expensive(inputs):
+                calls.append("expensive")
+                return {"report": big}
+
+            async def finish(inputs):
+                calls.append("finish")
+                if flaky["fail"]:
+                    raise RuntimeError("interrupted")
+                return {"length": len(inputs.get("report"))}
+
+            engine.nodes.nodes.update({"expensive": expensive, "finish": finish})
+
+        # Memoization off, so only resume can avoid repeating the expensive step
+        engine = WorkflowEngine(None, temp_workspace, memoize=False)
+        register(engine)
+        workflow_id = await engine.create_workflow("Resume", "Resume after failure", [
+            {"id": "a", "name": "a", "description": "a", "node_type": "expensive"},
+            {"id": "b", "name": "b", "description": "b", "node_type": "finish"},
+        ], {"b": ["a"]})
+        assert await engine.execute_workflow(workflow_id) is False
+
+        # A fresh engine, as after a restart, picks up from the persisted state
+        flaky["fail"] = False
+        resumed = WorkflowEngine(None, temp_workspace, memoize=False)
+        register(resumed)
+        assert await resumed.resume_workflow(workflow_id) is True
+
+        assert calls == ["expensive", "finish", "finish"]
+        workflow = resumed.active_workflows[workflow_id]
+        assert workflow.steps[1].outputs == {"length": BLOB_THRESHOLD}
+        state = await resumed.state_manager.load_workflow_state(workflow_id)
+        assert state["status"] == "completed"
+        assert state["completed_steps"] == ["a", "b"]
+
 
 class TestWorkflowTemplates:
     """Test workflow templates"""
@@ -236,6 +374,342 @@ class TestWorkflowStateManager:
         assert restored_data is not None
         assert restored_data["restored"] is True
 
+    @pytest.mark.asyncio
+    async def test_deltas_replay_from_log(self, temp_workspace):
+        """Test that appended deltas survive a restart and fold into a snapshot"""
+        manager = WorkflowStateManager(temp_workspace, snapshot_interval=60)
+        definition = {"id": "wf", "steps": [{"id": "a", "status": "pending", "outputs": {}}]}
+        await manager.save_workflow_state("wf", {"status": "running", "definition": definition})
+        await manager.append_delta("wf", {"step": {"id": "a", "status": "running"}})
+        await manager.append_delta("wf", {"step": {"id": "a", "status": "completed", "outputs": {"n": 1}},
+                                          "context": {"n": 1}})
+
+        log_file = manager.state_dir / "wf.log"
+        assert len(log_file.read_text().splitlines()) == 2
+
+        # A fresh manager (e.g. after a crash) replays the log over the snapshot
+        loaded = await WorkflowStateManager(temp_workspace).load_workflow_state("wf")
+        assert loaded["completed_steps"] == ["a"]
+        assert loaded["context"] == {"n": 1}
+        assert loaded["definition"]["steps"][0]["outputs"] == {"n": 1}
+
+        await manager.flush_workflow_state("wf")
+        assert not log_file.exists()
+        assert json.loads((manager.state_dir / "wf.json").read_text())["completed_steps"] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_snapshots_are_coalesced(self, temp_workspace):
+        """Test that many deltas lead to one timed snapshot"""
+        manager = WorkflowStateManager(temp_workspace, snapshot_interval=0.05)
+        await manager.save_workflow_state("wf", {"status": "running"})
+        writes = []
+        original = manager._write_snapshot
+
+        async def counting_write(*args):
+            writes.append(args[0])
+            await original(*args)
+
+        manager._write_snapshot = counting_write
+        for i in range(20):
+            await manager.append_delta("wf", {"context": {f"k{i}": i}})
+        await asyncio.sleep(0.2)
+
+        assert writes == ["wf"]
+        assert len(json.loads((manager.state_dir / "wf.json").read_text())["context"]) == 20
+
+    @pytest.mark.asyncio
+    async def test_large_values_stored_once_by_hash(self, temp_workspace):
+        """Test that large outputs go to the blob store and resolve on load"""
+        from maahelper.workflows.outputs import BLOB_THRESHOLD
+
+        manager = WorkflowStateManager(temp_workspace, snapshot_interval=60)
+        big = "x" * BLOB_THRESHOLD
+        await manager.save_workflow_state("wf", {"status": "running", "context": {"content": big}})
+        await manager.append_delta("wf", {"context": {"copy": big}})
+        await manager.flush_workflow_state("wf")
+
+        assert len(list((manager.state_dir / "blobs").iterdir())) == 1
+        assert (manager.state_dir / "wf.json").stat().st_size < 1024
+        loaded = await WorkflowStateManager(temp_workspace).load_workflow_state("wf")
+        assert loaded["context"] == {"content": big, "copy": big}
+
+    @pytest.mark.asyncio
+    async def test_truncated_delta_is_ignored(self, temp_workspace):
+        """Test that a torn final log line does not break loading"""
+        manager = WorkflowStateManager(temp_workspace, snapshot_interval=60)
+        await manager.save_workflow_state("wf", {"status": "running"})
+        await manager.append_delta("wf", {"status": "paused"})
+        with open(manager.state_dir / "wf.log", "a") as f:
+            f.write('{"status": "compl')
+
+        loaded = await WorkflowStateManager(temp_workspace).load_workflow_state("wf")
+        assert loaded["status"] == "paused"
+
+    @pytest.mark.asyncio
+    async def test_workflows_persist_independently(self, temp_workspace):
+        """Test that a slow write for one workflow does not hold up another"""
+        import threading
+        import time
+
+        manager = WorkflowStateManager(temp_workspace)
+        original = manager._write_snapshot_sync
+        in_slow_write = threading.Event()
+
+        def write(workflow_id, state):
+            if workflow_id == "slow":
+                in_slow_write.set()
+                time.sleep(0.3)
+            original(workflow_id, state)
+
+        manager._write_snapshot_sync = write
+        slow = asyncio.ensure_future(manager.save_workflow_state("slow", {"status": "running"}))
+        while not in_slow_write.is_set():
+            await asyncio.sleep(0.01)
+
+        assert await manager.save_workflow_state("fast", {"status": "running"}) is True
+        assert not slow.done()
+        assert await slow is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_saves_are_atomic(self, temp_workspace):
+        """Test that many concurrent workflows leave complete state files and no temp files"""
+        manager = WorkflowStateManager(temp_workspace, snapshot_interval=0.01)
+
+        async def run(n):
+            await manager.save_workflow_state(f"wf{n}", {"status": "running", "context": {"n": n}})
+            for i in range(5):
+                await manager.append_delta(f"wf{n}", {"context": {f"k{i}": "v" * 1000}})
+            await manager.save_workflow_state(f"wf{n}", {"status": "completed"})
+
+        await asyncio.gather(*(run(n) for n in range(20)))
+
+        assert not list(manager.state_dir.glob("*.tmp"))
+        for n in range(20):
+            state = json.loads((manager.state_dir / f"wf{n}.json").read_text())
+            assert state["status"] == "completed"
+            assert state["context"]["n"] == n and len(state["context"]) == 6
+
+    @pytest.mark.asyncio
+    async def test_catalog_serves_listing_and_statistics(self, temp_workspace, monkeypatch):
+        """Test that listings, statistics and cleanup read the catalog, not state files"""
+        manager = WorkflowStateManager(temp_workspace)
+        definition = {"name": "Audit", "steps": [{"id": "a"}, {"id": "b"}]}
+        await manager.save_workflow_state("done", {"status": "completed", "definition": definition,
+                                                   "completed_steps": ["a", "b"]})
+        await manager.save_workflow_state("broken", {"status": "failed", "definition": definition,
+                                                     "completed_steps": ["a"], "failed_steps": ["b"]})
+        await manager.save_workflow_state("live", {"status": "running", "definition": definition})
+
+        def no_parsing(*args, **kwargs):
+            raise AssertionError("state files must not be parsed")
+
+        monkeypatch.setattr(json, "loads", no_parsing)
+        workflows = {wf["id"]: wf for wf in await manager.list_all_workflows()}
+        assert workflows["broken"]["name"] == "Audit"
+        assert workflows["broken"]["total_steps"] == 2
+        assert workflows["broken"]["failed_steps"] == 1
+        assert [wf["id"] for wf in await manager.list_all_workflows("running")] == ["live"]
+
+        stats = await manager.get_workflow_statistics()
+        assert stats["total_workflows"] == 3
+        assert stats["by_status"] == {"completed": 1, "failed": 1, "running": 1}
+        assert stats["total_completed_steps"] == 3
+        monkeypatch.undo()
+
+        # Only finished workflows are cleaned up
+        assert await manager.cleanup_old_workflows(days_old=-1) == 2
+        assert [wf["id"] for wf in await manager.list_all_workflows()] == ["live"]
+        assert not (manager.state_dir / "done.json").exists()
+
+    @pytest.mark.asyncio
+    async def test_catalog_backfills_existing_states(self, temp_workspace):
+        """Test that state files written before the catalog existed are catalogued once"""
+        state_dir = Path(temp_workspace) / ".maahelper" / "workflows"
+        state_dir.mkdir(parents=True)
+        (state_dir / "old.json").write_text(json.dumps({
+            "workflow_id": "old", "status": "completed", "completed_steps": ["a"],
+            "definition": {"name": "Legacy", "steps": [{"id": "a"}]}
+        }))
+
+        workflows = await WorkflowStateManager(temp_workspace).list_all_workflows()
+        assert [(wf["id"], wf["name"], wf["completed_steps"]) for wf in workflows] == [("old", "Legacy", 1)]
+
+
+class TestOutputStore:
+    """Test the content-addressed step output store"""
+
+    def test_values_are_deduplicated_and_spill_to_disk(self, tmp_path):
+        """Test that equal values share one blob and evicted values reload from disk"""
+        from maahelper.workflows.outputs import OutputStore
+
+        store = OutputStore(tmp_path / "blobs", memory_limit=100)
+        first = store.put({"content": "a" * 80})
+        second = store.put({"content": "a" * 80})
+        store.put("b" * 80)  # evicts the first value from memory
+
+        assert first == second
+        assert len(list((tmp_path / "blobs").iterdir())) == 2
+        assert store.get(first) == {"content": "a" * 80}
+
+    def test_context_resolves_lazily(self, tmp_path, monkeypatch):
+        """Test that large context values are references read only on access"""
+        from maahelper.workflows.outputs import BLOB_THRESHOLD, OutputRef, OutputStore, WorkflowContext
+
+        store = OutputStore(tmp_path / "blobs")
+        context = WorkflowContext(store, {"small": 1, "big": "x" * BLOB_THRESHOLD})
+        assert isinstance(context.raw()["big"], OutputRef)
+        assert context.raw()["small"] == 1
+
+        reads = []
+        original = store.get
+        monkeypatch.setattr(store, "get", lambda ref: reads.append(ref) or original(ref))
+        inputs = context.step_inputs({"small": 2})
+        assert inputs.get("small") == 2
+        assert "big" in inputs and reads == []
+        assert inputs["big"] == "x" * BLOB_THRESHOLD
+        assert len(reads) == 1
+
+    @pytest.mark.asyncio
+    async def test_workflow_passes_large_outputs_by_reference(self, tmp_path):
+        """Test that a large output reaches downstream steps but not the state log"""
+        from maahelper.workflows.outputs import BLOB_THRESHOLD, OutputRef
+
+        engine = WorkflowEngine(None, str(tmp_path))
+        big = "line\n" * BLOB_THRESHOLD
+        received = []
+
+        async def produce(inputs):
+            return {"content": big}
+
+        async def consume(inputs):
+            received.append(inputs.get("content"))
+            return {"length": len(inputs.get("content"))}
+
+        engine.nodes.nodes.update({"produce": produce, "consume": consume})
+        workflow_id = await engine.create_workflow("Refs", "Large outputs", [
+            {"id": "p", "name": "p", "description": "p", "node_type": "produce"},
+            {"id": "c", "name": "c", "description": "c", "node_type": "consume"},
+        ], {"c": ["p"]})
+
+        assert await engine.execute_workflow(workflow_id) is True
+        assert received == [big]
+        assert isinstance(engine.active_workflows[workflow_id].steps[0].outputs["content"], OutputRef)
+        assert (engine.state_manager.state_dir / f"{workflow_id}.json").stat().st_size < BLOB_THRESHOLD
+
+
+class TestStepMemoization:
+    """Test reuse of unchanged step outputs across runs"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_steps_are_skipped(self, tmp_path):
+        """Test that steps re-run only when the inputs or files they read change"""
+        source = tmp_path / "module.py"
+        source.write_text("def f():\n    return 1\n")
+        client = Mock()
+        client.achat_completion = AsyncMock(return_value="Docs")
+        engine = WorkflowEngine(client, str(tmp_path))
+
+        async def run(**kwargs):
+            workflow_id = await engine.create_workflow("Docs", "Generate docs", [
+                {"id": "read", "name": "Read", "description": "Read", "node_type": "read_file",
+                 "inputs": {"file_path": str(source)}},
+                {"id": "docs", "name": "Docs", "description": "Docs", "node_type": "generate_docs"},
+            ], {"docs": ["read"]})
+            client.achat_completion.reset_mock()
+            assert await engine.execute_workflow(workflow_id, **kwargs) is True
+            return client.achat_completion.await_count
+
+        assert await run() == 1
+        assert await run() == 0
+
+        source.write_text("def f():\n    return 2\n")
+        assert await run() == 1
+        assert await run(force=["docs"]) == 1
+        assert await run(force=True) == 1
+        assert await run() == 0
+
+    @pytest.mark.asyncio
+    async def test_side_effect_nodes_always_run(self, tmp_path):
+        """Test that nodes with side effects are never memoized"""
+        engine = WorkflowEngine(None, str(tmp_path))
+        target = tmp_path / "out.txt"
+        steps = [{"id": "write", "name": "Write", "description": "Write", "node_type": "write_file",
+                  "inputs": {"file_path": str(target), "content": "hello"}}]
+
+        for _ in range(2):
+            workflow_id = await engine.create_workflow("Writer", "Write a file", steps)
+            target.unlink(missing_ok=True)
+            assert await engine.execute_workflow(workflow_id) is True
+            assert target.read_text() == "hello"
+
+
+class TestWorkerPool:
+    """Test running CPU-bound nodes in worker processes"""
+
+    @pytest.mark.asyncio
+    async def test_cpu_nodes_run_in_workers(self, tmp_path):
+        """Test that scan and per-file analysis run in workers and feed in-loop steps"""
+        project = tmp_path / "project"
+        project.mkdir()
+        for name in ("a.py", "b.py"):
+            (project / name).write_text(f"def {name[0]}():\n    return 1\n")
+        engine = WorkflowEngine(None, str(tmp_path), worker_processes=2)
+        collected = []
+
+        async def collect(inputs):
+            collected.append(inputs.get("results"))
+            return {"collected": len(inputs.get("results"))}
+
+        engine.nodes.nodes["collect"] = collect
+        steps = [
+            {"id": "scan", "name": "Scan", "description": "Scan", "node_type": "scan_project",
+             "inputs": {"project_path": str(project)}},
+            {"id": "analyze", "name": "Analyze", "description": "Analyze", "node_type": "map",
+             "inputs": {"items_from": "files", "root_from": "project_path", "item_key": "file_path",
+                        "operations": [{"node_type": "analyze_file"}], "keep": ["file_path", "outline"]}},
+            {"id": "collect", "name": "Collect", "description": "Collect", "node_type": "collect"},
+        ]
+        dependencies = {"analyze": ["scan"], "collect": ["analyze"]}
+        try:
+            workflow_id = await engine.create_workflow("Workers", "Offloaded analysis", steps, dependencies)
+            assert await engine.execute_workflow(workflow_id) is True
+            assert [Path(item["file_path"]).name for item in collected[0]] == ["a.py", "b.py"]
+            assert all(item["outline"] for item in collected[0])
+            assert len(engine.workers._processes) == 2
+
+            # Reads recorded in the worker let the memo skip the unchanged scan
+            workflow_id = await engine.create_workflow("Workers", "Offloaded analysis", steps, dependencies)
+            assert await engine.execute_workflow(workflow_id) is True
+            state = await engine.state_manager.load_workflow_state(workflow_id)
+            assert state["context"]["file_count"] == 2
+            # scan + 2 analyses, then only the 2 analyses again
+            assert next(engine.workers._task_ids) == 5
+        finally:
+            engine.close()
+
+    @pytest.mark.asyncio
+    async def test_cancel_and_errors(self, tmp_path):
+        """Test that cancelling stops the worker and that node errors come back as exceptions"""
+        import time
+        from maahelper.workflows.workers import WorkerPool
+
+        pool = WorkerPool(1, tmp_path / "blobs", placement={"sleep", "analyze_file"})
+        try:
+            task = asyncio.ensure_future(pool.run("sleep", {"duration": 30}))
+            await asyncio.sleep(3)
+            start = time.perf_counter()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            # The stopped worker is replaced and the pool keeps working
+            assert await pool.run("sleep", {"duration": 0}) == {"slept_duration": 0}
+            assert time.perf_counter() - start < 20
+            with pytest.raises(RuntimeError, match="FileNotFoundError"):
+                await pool.run("analyze_file", {"file_path": str(tmp_path / "missing.py")})
+        finally:
+            pool.shutdown()
+
 
 class TestWorkflowNodes:
     """Test workflow nodes"""
@@ -298,7 +772,107 @@ class TestWorkflowNodes:
         assert result is not None
         assert result["ai_response"] == "AI response"
         assert result["prompt"] == "Test prompt"
-    
+
+    @pytest.mark.asyncio
+    async def test_map_node_chains_operations_per_item(self, nodes, tmp_path):
+        """Test map node runs its operations for every file and keeps input order"""
+        for name in ("a.py", "b.py", "c.py"):
+            (tmp_path / name).write_text(f"# {name}\n")
+        inputs = {
+            "files": ["a.py", "b.py", "c.py"],
+            "project_path": str(tmp_path),
+            "items_from": "files",
+            "root_from": "project_path",
+            "item_key": "file_path",
+            "operations": [
+                {"node_type": "analyze_file", "inputs": {}},
+                {"node_type": "code_review", "inputs": {}}
+            ],
+            "keep": ["file_path", "review_result"],
+            "max_concurrency": 2,
+            "output_key": "data"
+        }
+        result = await nodes.execute_node("map", inputs)
+
+        assert result["item_count"] == 3
+        assert result["failed_count"] == 0
+        assert [Path(item["file_path"]).name for item in result["results"]] == ["a.py", "b.py", "c.py"]
+        assert all(set(item) == {"file_path", "review_result"} for item in result["results"])
+        assert result["data"] == result["results"]
+
+    @pytest.mark.asyncio
+    async def test_map_node_bounds_concurrency(self, nodes):
+        """Test map node never runs more items at once than max_concurrency"""
+        active = 0
+        peak = 0
+
+        async def tracked(inputs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if inputs["item"] == 3:
+                raise ValueError("bad item")
+            return {"double": inputs["item"] * 2}
+
+        nodes.nodes["tracked"] = tracked
+        result = await nodes.execute_node("map", {
+            "items": list(range(8)),
+            "operations": [{"node_type": "tracked"}],
+            "max_concurrency": 3
+        })
+
+        assert peak == 3
+        assert result["failed_count"] == 1
+        assert "error" in result["results"][3]
+        assert [item.get("double") for item in result["results"]] == [0, 2, 4, None, 8, 10, 12, 14]
+
+    @pytest.mark.asyncio
+    async def test_command_nodes_do_not_block_the_loop(self, nodes):
+        """Test that command nodes run in parallel instead of one after another"""
+        import sys
+        import time
+
+        command = f'"{sys.executable}" -c "import time; time.sleep(0.5); print(1)"'
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            nodes.execute_node("build_project", {"build_command": command}) for _ in range(3)
+        ))
+
+        assert all(result["success"] and result["stdout"] == "1\n" for result in results)
+        assert time.perf_counter() - start < 1.2
+
+    @pytest.mark.asyncio
+    async def test_command_timeout_cancellation_and_output_cap(self, nodes):
+        """Test that commands are stopped on timeout or cancellation and output is capped"""
+        import sys
+        import time
+
+        sleeper = f'"{sys.executable}" -c "print(1, flush=True); import time; time.sleep(30)"'
+        start = time.perf_counter()
+        result = await nodes.execute_node("deploy_project", {"deploy_command": sleeper, "timeout": 0.5})
+        assert result["timed_out"] is True and result["success"] is False
+        assert result["stdout"] == "1\n"
+
+        task = asyncio.ensure_future(nodes.execute_node("deploy_project", {"deploy_command": sleeper}))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert time.perf_counter() - start < 5
+
+        chatty = f'"{sys.executable}" -c "[print(i) for i in range(10000)]"'
+        result = await nodes.execute_node("build_project", {"build_command": chatty, "max_output": 100})
+        assert result["success"] and result["output_truncated"]
+        assert result["stdout"].endswith("9999\n") and len(result["stdout"]) <= 100
+
+        # A single line far longer than the limit is cut to its tail, never buffered whole
+        long_line = f'"{sys.executable}" -c "import sys; sys.stdout.write(\'x\' * 500000 + \'end\')"'
+        result = await nodes.execute_node("build_project", {"build_command": long_line, "max_output": 100})
+        assert result["success"] and result["output_truncated"]
+        assert result["stdout"].endswith("xend") and len(result["stdout"]) <= 100
+
     def test_get_available_nodes(self, nodes):
         """Test getting available node types"""
         available = nodes.get_available_nodes()
@@ -350,6 +924,19 @@ class TestWorkflowCommands:
         result = await commands.get_workflow_statistics()
         assert "statistics retrieved" in result.lower()
 
+    def test_worker_processes_from_config(self, mock_llm_client, temp_workspace, monkeypatch):
+        """Test that the configured worker count reaches the engine and close() stops it"""
+        import maahelper.workflows.commands as commands_module
+
+        settings = commands_module.config_manager.config.performance
+        monkeypatch.setattr(settings, "workflow_worker_processes", 2)
+        commands = commands_module.WorkflowCommands(mock_llm_client, temp_workspace)
+        assert commands.engine.workers is not None and commands.engine.workers.size == 2
+        assert WorkflowCommands(mock_llm_client, temp_workspace, worker_processes=0).engine.workers is None
+
+        commands.close()
+        assert commands.engine.workers._closed
+
 
 class TestIntegration:
     """Integration tests for the complete workflow system"""